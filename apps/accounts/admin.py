@@ -1,7 +1,10 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.db.models import F
+from django.utils import timezone
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
+from .authentication import invalidate_cached_user
 from .models import User, Household
 
 
@@ -54,13 +57,19 @@ class UserAdmin(BaseUserAdmin):
 
     def activate_users(self, request, queryset):
         """Activate selected users"""
-        count = queryset.update(is_active=True, is_deleted=False)
+        count = queryset.update(
+            is_active=True, is_deleted=False, updated_at=timezone.now(), auth_version=F('auth_version') + 1
+        )
+        self._invalidate_cached_users(queryset)
         self.message_user(request, f'{count} user(s) activated successfully.')
     activate_users.short_description = "Activate selected users"
 
     def deactivate_users(self, request, queryset):
         """Deactivate selected users"""
-        count = queryset.update(is_active=False)
+        count = queryset.update(
+            is_active=False, updated_at=timezone.now(), auth_version=F('auth_version') + 1
+        )
+        self._invalidate_cached_users(queryset)
         self.message_user(request, f'{count} user(s) deactivated successfully.')
     deactivate_users.short_description = "Deactivate selected users"
 
@@ -73,6 +82,11 @@ class UserAdmin(BaseUserAdmin):
         self.message_user(request, f'{count} user(s) soft deleted successfully.')
     soft_delete_users.short_description = "Soft delete selected users"
 
+    def _invalidate_cached_users(self, queryset):
+        """Bulk updates bypass the post_save signal that invalidates the user cache"""
+        for user_id, version in queryset.values_list('pk', 'auth_version'):
+            invalidate_cached_user(user_id, version)
+
 
 @admin.register(Household)
 class HouseholdAdmin(admin.ModelAdmin):
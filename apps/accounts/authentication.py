@@ -0,0 +1,131 @@
+import logging
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+
+# Fields of the cached copy of a user: what authentication and permission
+# checks read. Anything else (password hash, profile) is deferred and loaded
+# from the database only if accessed.
+CACHED_FIELDS = ('id', 'is_active', 'is_staff', 'is_superuser', 'auth_version')
+# The same in model field order, as Model.from_db takes them
+_CACHED_ATTNAMES = tuple(
+    field.attname for field in User._meta.concrete_fields if field.attname in CACHED_FIELDS
+)
+
+
+def _version_key(user_id):
+    return f'auth:user:{user_id}:version'
+
+
+def _user_key(user_id, version):
+    return f'auth:user:{user_id}:{version}'
+
+
+def _load_user(user_id):
+    return User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).only(*CACHED_FIELDS).first()
+
+
+def get_cached_user(user_id):
+    """
+    Load a user by id through the cache
+
+    The cache keeps a pointer to the user's current auth_version and, keyed
+    on it, the CACHED_FIELDS of the row. Writes bump auth_version and move
+    the pointer once they commit, so earlier entries become unreachable,
+    including one cached by a request that read the row just before the
+    write committed. Without a pointer (never set or evicted) the row is
+    read from the database and its own auth_version is used. Falls back to
+    the database when the cache is unavailable.
+    """
+    try:
+        version = cache.get(_version_key(user_id))
+        values = None if version is None else cache.get(_user_key(user_id, version))
+    except Exception as exc:
+        logger.warning(f'User cache unavailable, loading user from the database: {exc}')
+        return _load_user(user_id)
+
+    if values is not None:
+        return User.from_db(DEFAULT_DB_ALIAS, _CACHED_ATTNAMES, values)
+
+    user = _load_user(user_id)
+    if user is not None:
+        try:
+            # add(): a write committed since the read has already moved the pointer
+            cache.add(_version_key(user_id), user.auth_version, None)
+            cache.set(
+                _user_key(user_id, user.auth_version),
+                [getattr(user, field) for field in _CACHED_ATTNAMES],
+                settings.AUTH_USER_CACHE_TTL
+            )
+        except Exception as exc:
+            logger.warning(f'Failed to cache user {user_id}: {exc}')
+    return user
+
+
+def invalidate_cached_user(user_id, version):
+    """
+    Point the cache at ``version`` of a user once the current transaction commits
+
+    ``version`` is the auth_version the write stored, or None for a deleted
+    user.
+    """
+    def point():
+        try:
+            cache.set(_version_key(user_id), 'deleted' if version is None else version, None)
+        except Exception as exc:
+            logger.error(f'Failed to invalidate cached user {user_id}: {exc}')
+
+    transaction.on_commit(point)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the token's user through the cache
+
+    The cached user is invalidated whenever the row changes (see
+    apps.accounts.signals), so authenticated requests normally make no
+    database query for identity. With CHECK_REVOKE_TOKEN the password hash,
+    which is never cached, is loaded per request.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
+
+
+class CachedJWTAuthenticationScheme(SimpleJWTScheme):
+    """OpenAPI security scheme for CachedJWTAuthentication"""
+
+    target_class = CachedJWTAuthentication
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import F
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.core.validators import RegexValidator
 from phonenumber_field.modelfields import PhoneNumberField
@@ -46,6 +47,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     is_deleted = models.BooleanField(default=False, db_index=True)
+    # Bumped by every write; keys the copy CachedJWTAuthentication caches
+    auth_version = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -65,6 +68,16 @@ class User(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return str(self.phone)
     
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            # Incremented by the UPDATE itself, so a stale instance cannot
+            # write back a version that is already cached. The post_save
+            # handler in apps.accounts.signals reads the stored value back.
+            self.auth_version = F('auth_version') + 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'auth_version'}
+        super().save(*args, **kwargs)
+    
     def soft_delete(self):
         """Soft delete user"""
         self.is_active = False
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from config.expansion import DynamicFieldsMixin
 from .models import Household
 
 User = get_user_model()
@@ -46,7 +47,7 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class HouseholdSerializer(serializers.ModelSerializer):
+class HouseholdSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for household"""
     
     user = UserSerializer(read_only=True)
@@ -58,6 +59,7 @@ class HouseholdSerializer(serializers.ModelSerializer):
             'contact_phone', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'user', 'created_at', 'updated_at']
+        select_related = ('user',)
 
 
 class HouseholdCreateSerializer(serializers.ModelSerializer):
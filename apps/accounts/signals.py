@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_cached_user
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """
+    Point the user cache at the auth_version the write stored
+
+    Covers profile updates, soft_delete and password changes, which all go
+    through User.save.
+    """
+    if not isinstance(instance.auth_version, int):
+        # User.save incremented it with an F() expression
+        instance.refresh_from_db(fields=['auth_version'])
+    invalidate_cached_user(instance.pk, instance.auth_version)
+
+
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    """Deleted users no longer authenticate from the cache"""
+    invalidate_cached_user(instance.pk, None)
@@ -0,0 +1,99 @@
+from unittest import mock
+
+from django.contrib.admin import site
+from django.core.cache import cache
+from django.test import TestCase
+
+from .admin import UserAdmin
+from .authentication import _CACHED_ATTNAMES, _user_key, _version_key, get_cached_user
+from .models import User
+
+
+class CachedUserTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(phone='+8801700000001', password='secret', email='a@example.com')
+
+    def setUp(self):
+        cache.clear()
+
+    def cached(self):
+        return get_cached_user(self.user.pk)
+
+    def test_caches_only_authentication_fields(self):
+        self.cached()
+
+        version = cache.get(_version_key(self.user.pk))
+        values = cache.get(_user_key(self.user.pk, version))
+        self.assertEqual(dict(zip(_CACHED_ATTNAMES, values)), {
+            'id': self.user.pk,
+            'is_active': True,
+            'is_staff': False,
+            'is_superuser': False,
+            'auth_version': self.user.auth_version,
+        })
+
+    def test_second_lookup_makes_no_query(self):
+        self.cached()
+
+        with self.assertNumQueries(0):
+            user = self.cached()
+
+        self.assertEqual((user.pk, user.is_active), (self.user.pk, True))
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'a@example.com')
+
+    def test_save_invalidates(self):
+        self.cached()
+
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+
+        self.assertFalse(self.cached().is_active)
+
+    def test_save_with_update_fields_invalidates(self):
+        self.cached()
+
+        self.user.is_staff = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(update_fields=['is_staff'])
+
+        self.assertTrue(self.cached().is_staff)
+
+    def test_stale_instance_cannot_reuse_a_cached_version(self):
+        stale = User.objects.get(pk=self.user.pk)
+        self.user.is_staff = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertTrue(self.cached().is_staff)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            stale.save()
+
+        self.assertFalse(self.cached().is_staff)
+        self.assertEqual(stale.auth_version, self.user.auth_version + 1)
+
+    def test_admin_bulk_deactivation_invalidates(self):
+        self.cached()
+        user_admin = UserAdmin(User, site)
+
+        with mock.patch.object(user_admin, 'message_user'), self.captureOnCommitCallbacks(execute=True):
+            user_admin.deactivate_users(None, User.objects.filter(pk=self.user.pk))
+
+        self.assertFalse(self.cached().is_active)
+
+    def test_evicted_version_reads_the_database(self):
+        self.cached()
+        User.objects.filter(pk=self.user.pk).update(is_active=False, auth_version=self.user.auth_version + 1)
+        cache.delete(_version_key(self.user.pk))
+
+        self.assertFalse(self.cached().is_active)
+
+    def test_deleted_user(self):
+        self.cached()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.get(pk=self.user.pk).delete()
+
+        self.assertIsNone(self.cached())
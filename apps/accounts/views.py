@@ -8,6 +8,8 @@ from django.contrib.auth import get_user_model
 from drf_spectacular.utils import extend_schema, extend_schema_view
 from django.db import connection
 
+from config.conditional import ConditionalGetMixin
+from config.expansion import ExpandableViewSetMixin
 from .models import Household
 from .serializers import (
     UserRegistrationSerializer,
@@ -21,7 +23,7 @@ User = get_user_model()
 
 
 class HealthCheckView(views.APIView):
-    """Health check endpoint"""
+    """Health check endpoint, probed on both the WSGI and the ASGI deployments"""
     permission_classes = [AllowAny]
     
     def get(self, request):
@@ -90,7 +92,8 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [IsAuthenticated]
     
     def get_object(self):
-        return self.request.user
+        # request.user only holds the fields cached for authentication
+        return User.objects.get(pk=self.request.user.pk)
 
 
 @extend_schema_view(
@@ -144,13 +147,14 @@ class PasswordChangeView(generics.GenericAPIView):
         description='Delete household',
     ),
 )
-class HouseholdViewSet(viewsets.ModelViewSet):
+class HouseholdViewSet(ConditionalGetMixin, ExpandableViewSetMixin, viewsets.ModelViewSet):
     """Household CRUD operations"""
     
+    queryset = Household.objects.all()
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return Household.objects.filter(user=self.request.user)
+        return super().get_queryset().filter(user=self.request.user)
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class AuditConfig(AppConfig):
+    name = 'apps.audit'
+
+    def ready(self):
+        # Registers the shutdown flush hooks of the buffered writer
+        from . import buffer  # noqa: F401
+        from . import signals  # noqa: F401
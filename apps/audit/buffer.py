@@ -0,0 +1,164 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLogBuffer:
+    """
+    In-process buffer of unsaved AuditLog rows
+
+    Entries are queued by AuditLog.log and written by a daemon thread with
+    bulk_create, either when ``AUDIT_LOG_BATCH_SIZE`` entries are waiting or
+    ``AUDIT_LOG_FLUSH_INTERVAL`` seconds after the first one was queued.
+    A batch that fails to write is retried AUDIT_LOG_WRITE_RETRIES times,
+    waiting AUDIT_LOG_RETRY_DELAY seconds and doubling the wait each time,
+    then written row by row so one bad entry cannot drop the others.
+    ``shutdown`` stops the thread and writes whatever is left; it runs at
+    interpreter exit and when a Celery worker process shuts down.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        self._stopping = threading.Event()
+
+    @property
+    def batch_size(self):
+        return settings.AUDIT_LOG_BATCH_SIZE
+
+    @property
+    def flush_interval(self):
+        return settings.AUDIT_LOG_FLUSH_INTERVAL
+
+    @property
+    def write_retries(self):
+        return settings.AUDIT_LOG_WRITE_RETRIES
+
+    @property
+    def retry_delay(self):
+        return settings.AUDIT_LOG_RETRY_DELAY
+
+    def put(self, entry):
+        """Queue an unsaved AuditLog instance for writing"""
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            # Apply backpressure instead of dropping entries
+            self._write([entry])
+
+    def flush(self):
+        """Write all queued entries from the calling thread"""
+        if self._queue is None:
+            return
+
+        while True:
+            batch = self._take(self.batch_size)
+            if not batch:
+                return
+            self._write(batch)
+
+    def shutdown(self, timeout=5):
+        """Stop the writer thread and flush the remaining entries"""
+        self._stopping.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        self.flush()
+
+    def _ensure_worker(self):
+        # A forked process (gunicorn/Celery prefork) inherits a dead thread
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=settings.AUDIT_LOG_QUEUE_SIZE)
+            self._pid = os.getpid()
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+            self._thread.start()
+
+    def _take(self, limit):
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            close_old_connections()
+            self._write(batch)
+            close_old_connections()
+
+    def _write(self, batch):
+        from .models import AuditLog
+
+        for attempt in range(self.write_retries + 1):
+            if attempt:
+                time.sleep(self.retry_delay * 2 ** (attempt - 1))
+            try:
+                AuditLog.objects.bulk_create(batch, batch_size=self.batch_size)
+                return
+            except Exception as exc:
+                logger.warning(f'Failed to write {len(batch)} audit log entries (attempt {attempt + 1}): {exc}')
+                # Drops a broken connection so the next attempt reconnects
+                close_old_connections()
+
+        self._write_rows(batch)
+
+    def _write_rows(self, batch):
+        """Last resort after the retries: insert entries one at a time"""
+        failed = 0
+        for entry in batch:
+            try:
+                entry.save(force_insert=True)
+            except Exception:
+                failed += 1
+                logger.exception(f'Failed to write audit log entry {entry.entity_type}:{entry.entity_id}')
+                close_old_connections()
+
+        if failed:
+            logger.error(f'Dropped {failed} of {len(batch)} audit log entries')
+
+
+audit_buffer = AuditLogBuffer()
+
+atexit.register(audit_buffer.shutdown)
+
+
+@worker_process_shutdown.connect
+def _flush_on_worker_shutdown(**kwargs):
+    """Celery prefork children exit without running atexit handlers"""
+    audit_buffer.shutdown()
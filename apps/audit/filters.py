@@ -0,0 +1,27 @@
+import django_filters
+
+from .models import AuditLog
+
+
+class AuditLogFilter(django_filters.FilterSet):
+    """
+    Filters for AuditLog model
+
+    audit_logs is partitioned by month on created_at, so the date range
+    filters also restrict the query to the matching partitions.
+    """
+
+    created_after = django_filters.IsoDateTimeFilter(
+        field_name='created_at',
+        lookup_expr='gte',
+        label='Created at or after (ISO 8601)'
+    )
+    created_before = django_filters.IsoDateTimeFilter(
+        field_name='created_at',
+        lookup_expr='lt',
+        label='Created before (ISO 8601)'
+    )
+
+    class Meta:
+        model = AuditLog
+        fields = ['entity_type', 'action', 'actor_user', 'created_after', 'created_before']
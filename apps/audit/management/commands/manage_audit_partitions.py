@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.audit.partitions import maintain_partitions
+
+
+class Command(BaseCommand):
+    """Pre-create audit_logs partitions and archive expired ones"""
+
+    help = 'Create upcoming monthly audit_logs partitions and archive partitions past retention'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ahead',
+            type=int,
+            default=settings.AUDIT_LOG_PARTITIONS_AHEAD,
+            help='Number of months of partitions to create past the current month'
+        )
+        parser.add_argument(
+            '--retention-months',
+            type=int,
+            default=settings.AUDIT_LOG_RETENTION_MONTHS,
+            help='Archive and drop partitions older than this many months'
+        )
+        parser.add_argument(
+            '--archive-dir',
+            default=settings.AUDIT_LOG_ARCHIVE_DIR,
+            help='Directory for the gzipped JSON lines archives'
+        )
+        parser.add_argument(
+            '--keep-all',
+            action='store_true',
+            help='Only create partitions, do not apply the retention policy'
+        )
+
+    def handle(self, *args, **options):
+        result = maintain_partitions(
+            months_ahead=options['ahead'],
+            retention_months=None if options['keep_all'] else options['retention_months'],
+            archive_dir=options['archive_dir'],
+        )
+
+        for name in result['created']:
+            self.stdout.write(f'Created partition {name}')
+        for name, path, rows in result['archived']:
+            self.stdout.write(f'Archived {rows} row(s) from {name} to {path}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(result['created'])} partition(s) created, {len(result['archived'])} archived"
+        ))
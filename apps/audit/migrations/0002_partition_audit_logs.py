@@ -0,0 +1,196 @@
+# Generated by Django 4.2.9 on 2026-10-17 05:12
+
+from datetime import date
+
+from django.db import migrations
+from django.utils import timezone
+
+# Months of partitions created past the current month; the
+# maintain_audit_partitions task keeps creating them from here on
+PARTITIONS_AHEAD = 3
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_audit_logs(apps, schema_editor):
+    """
+    Rebuild audit_logs as a table partitioned by RANGE (created_at)
+
+    PostgreSQL requires the partition key in the primary key, so the new
+    primary key is (id, created_at); ids still come from audit_logs_id_seq.
+    Indexes and foreign keys keep their names so later schema changes can
+    find them.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT indexrelid::regclass::text, pg_get_indexdef(indexrelid)
+            FROM pg_index
+            WHERE indrelid = 'audit_logs'::regclass AND NOT indisprimary
+            """
+        )
+        indexes = cursor.fetchall()
+
+        cursor.execute(
+            """
+            SELECT conname, pg_get_constraintdef(oid)
+            FROM pg_constraint
+            WHERE conrelid = 'audit_logs'::regclass AND contype = 'f'
+            """
+        )
+        foreign_keys = cursor.fetchall()
+
+        cursor.execute(
+            """
+            SELECT min(created_at), GREATEST(
+                max(id),
+                pg_sequence_last_value(pg_get_serial_sequence('audit_logs', 'id'))
+            )
+            FROM audit_logs
+            """
+        )
+        oldest, max_id = cursor.fetchone()
+
+    schema_editor.execute("ALTER TABLE audit_logs RENAME TO audit_logs_legacy")
+    schema_editor.execute(
+        "ALTER TABLE audit_logs_legacy RENAME CONSTRAINT audit_logs_pkey TO audit_logs_legacy_pkey"
+    )
+    for name, _ in indexes:
+        schema_editor.execute(f"DROP INDEX {name}")
+    for name, _ in foreign_keys:
+        schema_editor.execute(
+            f"ALTER TABLE audit_logs_legacy DROP CONSTRAINT {name}"
+        )
+    schema_editor.execute(
+        "ALTER TABLE audit_logs_legacy ALTER COLUMN id DROP IDENTITY IF EXISTS"
+    )
+
+    schema_editor.execute(
+        """
+        CREATE TABLE audit_logs (
+            LIKE audit_logs_legacy INCLUDING DEFAULTS INCLUDING STORAGE,
+            CONSTRAINT audit_logs_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    schema_editor.execute("CREATE SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    schema_editor.execute(
+        "ALTER TABLE audit_logs ALTER COLUMN id SET DEFAULT nextval('audit_logs_id_seq')"
+    )
+    if max_id is not None:
+        schema_editor.execute("SELECT setval('audit_logs_id_seq', %s)", [max_id])
+
+    current = timezone.now().date().replace(day=1)
+    month = oldest.date().replace(day=1) if oldest else current
+    while month <= add_months(current, PARTITIONS_AHEAD):
+        schema_editor.execute(
+            f"CREATE TABLE audit_logs_p{month.year:04d}_{month.month:02d} "
+            f"PARTITION OF audit_logs FOR VALUES FROM (%s) TO (%s)",
+            [
+                f"{month.isoformat()} 00:00:00+00",
+                f"{add_months(month, 1).isoformat()} 00:00:00+00",
+            ],
+        )
+        month = add_months(month, 1)
+    schema_editor.execute("CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT")
+
+    schema_editor.execute("INSERT INTO audit_logs SELECT * FROM audit_logs_legacy")
+    schema_editor.execute("DROP TABLE audit_logs_legacy")
+
+    for _, definition in indexes:
+        schema_editor.execute(
+            definition.replace(" ON public.audit_logs_legacy ", " ON public.audit_logs ")
+        )
+    for name, definition in foreign_keys:
+        schema_editor.execute(f"ALTER TABLE audit_logs ADD CONSTRAINT {name} {definition}")
+
+
+def unpartition_audit_logs(apps, schema_editor):
+    """Copy the partitions back into a plain audit_logs table"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT indexrelid::regclass::text, pg_get_indexdef(indexrelid)
+            FROM pg_index
+            WHERE indrelid = 'audit_logs'::regclass AND NOT indisprimary
+            """
+        )
+        indexes = cursor.fetchall()
+
+        cursor.execute(
+            """
+            SELECT conname, pg_get_constraintdef(oid)
+            FROM pg_constraint
+            WHERE conrelid = 'audit_logs'::regclass AND contype = 'f'
+            """
+        )
+        foreign_keys = cursor.fetchall()
+
+        cursor.execute(
+            """
+            SELECT GREATEST(max(id), pg_sequence_last_value('audit_logs_id_seq'))
+            FROM audit_logs
+            """
+        )
+        max_id = cursor.fetchone()[0]
+
+    schema_editor.execute("ALTER TABLE audit_logs RENAME TO audit_logs_partitioned")
+    schema_editor.execute(
+        "ALTER TABLE audit_logs_partitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_partitioned_pkey"
+    )
+    for name, _ in indexes:
+        schema_editor.execute(f"DROP INDEX {name}")
+    for name, _ in foreign_keys:
+        schema_editor.execute(
+            f"ALTER TABLE audit_logs_partitioned DROP CONSTRAINT {name}"
+        )
+    schema_editor.execute(
+        "ALTER TABLE audit_logs_partitioned ALTER COLUMN id DROP DEFAULT"
+    )
+    schema_editor.execute("DROP SEQUENCE audit_logs_id_seq")
+
+    schema_editor.execute(
+        """
+        CREATE TABLE audit_logs (
+            LIKE audit_logs_partitioned INCLUDING DEFAULTS INCLUDING STORAGE,
+            CONSTRAINT audit_logs_pkey PRIMARY KEY (id)
+        )
+        """
+    )
+    schema_editor.execute(
+        "ALTER TABLE audit_logs ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY"
+    )
+    schema_editor.execute("INSERT INTO audit_logs SELECT * FROM audit_logs_partitioned")
+    if max_id is not None:
+        schema_editor.execute(
+            "SELECT setval(pg_get_serial_sequence('audit_logs', 'id'), %s)", [max_id]
+        )
+    schema_editor.execute("DROP TABLE audit_logs_partitioned CASCADE")
+
+    for _, definition in indexes:
+        schema_editor.execute(
+            definition.replace(
+                " ON ONLY public.audit_logs_partitioned ", " ON public.audit_logs "
+            ).replace(" ON public.audit_logs_partitioned ", " ON public.audit_logs ")
+        )
+    for name, definition in foreign_keys:
+        schema_editor.execute(f"ALTER TABLE audit_logs ADD CONSTRAINT {name} {definition}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("audit", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_audit_logs, unpartition_audit_logs),
+    ]
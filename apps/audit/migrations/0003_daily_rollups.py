@@ -0,0 +1,69 @@
+# Generated by Django 4.2.9 on 2026-10-17 03:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("audit", "0002_partition_audit_logs"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuditLogDailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(db_index=True)),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("create", "Create"),
+                            ("update", "Update"),
+                            ("delete", "Delete"),
+                            ("approve", "Approve"),
+                            ("reject", "Reject"),
+                            ("terminate", "Terminate"),
+                            ("renew", "Renew"),
+                            ("payment", "Payment"),
+                            ("refund", "Refund"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("entity_type", models.CharField(max_length=100)),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "actor_user",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "audit_log_daily_rollups",
+                "ordering": ["-day"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="auditlogdailyrollup",
+            constraint=models.UniqueConstraint(
+                fields=("day", "action", "entity_type", "actor_user"),
+                name="audit_rollups_unique_group",
+            ),
+        ),
+    ]
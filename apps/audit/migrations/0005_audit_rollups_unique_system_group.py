@@ -0,0 +1,20 @@
+# Generated by Django 4.2.9 on 2026-10-17 04:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("audit", "0004_audit_log_created_at_default"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="auditlogdailyrollup",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("actor_user__isnull", True)),
+                fields=("day", "action", "entity_type"),
+                name="audit_rollups_unique_system_group",
+            ),
+        ),
+    ]
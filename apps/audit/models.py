@@ -1,4 +1,6 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
@@ -60,7 +62,8 @@ class AuditLog(models.Model):
     )
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(null=True, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Set when the event is logged, not when a buffered entry is written
+    created_at = models.DateTimeField(default=timezone.now, editable=False, db_index=True)
     
     class Meta:
         db_table = 'audit_logs'
@@ -81,6 +84,11 @@ class AuditLog(models.Model):
         """
         Create an audit log entry
         
+        With AUDIT_LOG_BUFFERED the entry is handed to the background writer
+        once the surrounding transaction commits and the returned instance is
+        unsaved; otherwise it is inserted immediately. Either way created_at
+        is the time of the call.
+        
         Args:
             entity_type: Type of entity
             entity_id: ID of entity
@@ -96,6 +104,7 @@ class AuditLog(models.Model):
             'action': action,
             'data': data,
             'actor_user': user,
+            'created_at': timezone.now(),
         }
         
         if content_object:
@@ -105,7 +114,14 @@ class AuditLog(models.Model):
             log_data['ip_address'] = cls._get_client_ip(request)
             log_data['user_agent'] = request.META.get('HTTP_USER_AGENT', '')
         
-        return cls.objects.create(**log_data)
+        if not settings.AUDIT_LOG_BUFFERED:
+            return cls.objects.create(**log_data)
+        
+        from .buffer import audit_buffer
+        
+        entry = cls(**log_data)
+        transaction.on_commit(lambda: audit_buffer.put(entry))
+        return entry
     
     @staticmethod
     def _get_client_ip(request):
@@ -116,3 +132,37 @@ class AuditLog(models.Model):
         else:
             ip = request.META.get('REMOTE_ADDR')
         return ip
+
+
+class AuditLogDailyRollup(models.Model):
+    """Daily audit log counts per action, entity type and actor"""
+    
+    day = models.DateField(db_index=True)
+    action = models.CharField(max_length=20, choices=AuditLog.ACTION_CHOICES)
+    entity_type = models.CharField(max_length=100)
+    actor_user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+'
+    )
+    count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'audit_log_daily_rollups'
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'action', 'entity_type', 'actor_user'],
+                name='audit_rollups_unique_group'
+            ),
+            # NULLs are distinct in the constraint above, so system events need their own
+            models.UniqueConstraint(
+                fields=['day', 'action', 'entity_type'],
+                condition=models.Q(actor_user__isnull=True),
+                name='audit_rollups_unique_system_group'
+            ),
+        ]
+    
+    def __str__(self):
+        return f'{self.day} - {self.action} - {self.entity_type}: {self.count}'
@@ -0,0 +1,227 @@
+"""
+Monthly range partitions of the audit_logs table
+
+audit_logs is partitioned by RANGE (created_at) in migration 0002 with one
+partition per calendar month (UTC) named ``audit_logs_pYYYY_MM`` and a
+DEFAULT partition catching rows outside the created ranges. Partitions are
+pre-created ahead of time; partitions past the retention period are
+archived to gzipped JSON lines files and dropped.
+"""
+import gzip
+import logging
+import os
+import re
+from datetime import date
+from pathlib import Path
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from config.conditional import bump_conditional_version
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = AuditLog._meta.db_table
+DEFAULT_PARTITION = f'{PARENT_TABLE}_default'
+PARTITION_NAME_RE = re.compile(rf'^{PARENT_TABLE}_p(\d{{4}})_(\d{{2}})$')
+
+ARCHIVE_CHUNK_SIZE = 2000
+
+
+def add_months(month, count):
+    """First day of the month ``count`` months after ``month``"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{PARENT_TABLE}_p{month.year:04d}_{month.month:02d}'
+
+
+def is_partitioned():
+    """Whether audit_logs is a partitioned table (PostgreSQL only)"""
+    if connection.vendor != 'postgresql':
+        return False
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)",
+            [PARENT_TABLE]
+        )
+        row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def list_partitions():
+    """Months of the attached monthly partitions, oldest first"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(%s)
+            """,
+            [PARENT_TABLE]
+        )
+        names = [name for name, in cursor.fetchall()]
+
+    months = []
+    for name in names:
+        match = PARTITION_NAME_RE.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def create_partition(month):
+    """
+    Create the partition for ``month`` if it does not exist
+
+    Rows already in the DEFAULT partition for that month are moved into the
+    new partition, since PostgreSQL refuses to create a partition whose
+    range overlaps rows in the default one.
+
+    Returns:
+        True if the partition was created
+    """
+    if month in list_partitions():
+        return False
+
+    name = partition_name(month)
+    lower = f'{month.isoformat()} 00:00:00+00'
+    upper = f'{add_months(month, 1).isoformat()} 00:00:00+00'
+    in_range = 'created_at >= %s AND created_at < %s'
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_range})',
+            [lower, upper]
+        )
+        default_has_rows = cursor.fetchone()[0]
+
+        if default_has_rows:
+            cursor.execute(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION {DEFAULT_PARTITION}')
+
+        cursor.execute(
+            f'CREATE TABLE {name} PARTITION OF {PARENT_TABLE} '
+            f'FOR VALUES FROM (%s) TO (%s)',
+            [lower, upper]
+        )
+
+        if default_has_rows:
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE {in_range} RETURNING *) '
+                f'INSERT INTO {PARENT_TABLE} SELECT * FROM moved',
+                [lower, upper]
+            )
+            logger.info(f'Moved {cursor.rowcount} audit log rows from {DEFAULT_PARTITION} to {name}')
+            cursor.execute(f'ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT')
+
+    logger.info(f'Created audit log partition {name}')
+    return True
+
+
+def default_partition_months():
+    """Months that have rows in the DEFAULT partition"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC')::date "
+            f"FROM {DEFAULT_PARTITION}"
+        )
+        return sorted(month for month, in cursor.fetchall())
+
+
+def ensure_partitions(months_ahead):
+    """
+    Create partitions for the current month and ``months_ahead`` months after it
+
+    Months with rows in the DEFAULT partition also get their partition, so
+    those rows fall under the retention policy.
+    """
+    current = timezone.now().date().replace(day=1)
+    months = {add_months(current, offset) for offset in range(months_ahead + 1)}
+    months.update(default_partition_months())
+
+    return [partition_name(month) for month in sorted(months) if create_partition(month)]
+
+
+def archive_partition(month, archive_dir):
+    """
+    Write the rows of a partition to ``<archive_dir>/<partition>.jsonl.gz``
+
+    Rows are streamed with a server-side cursor, one ``row_to_json`` object
+    per line, and the file is renamed into place only once complete.
+
+    Returns:
+        (archive path, number of rows)
+    """
+    name = partition_name(month)
+    archive_dir = Path(archive_dir)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    path = archive_dir / f'{name}.jsonl.gz'
+    partial_path = archive_dir / f'{name}.jsonl.gz.partial'
+
+    rows = 0
+    with transaction.atomic(), connection.chunked_cursor() as cursor:
+        cursor.execute(f'SELECT row_to_json(t)::text FROM {name} t ORDER BY id')
+        with gzip.open(partial_path, 'wt', encoding='utf-8') as archive:
+            while True:
+                chunk = cursor.fetchmany(ARCHIVE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                archive.writelines(f'{line}\n' for line, in chunk)
+                rows += len(chunk)
+
+    os.replace(partial_path, path)
+    return path, rows
+
+
+def drop_expired_partitions(retention_months, archive_dir):
+    """
+    Archive and drop partitions older than ``retention_months``
+
+    A partition is dropped only after its archive file has been written, so
+    an interrupted run leaves the partition attached to be retried.
+
+    Returns:
+        List of (partition name, archive path, number of rows)
+    """
+    cutoff = add_months(timezone.now().date().replace(day=1), -retention_months)
+    archived = []
+
+    for month in list_partitions():
+        if month >= cutoff:
+            break
+
+        name = partition_name(month)
+        path, rows = archive_partition(month, archive_dir)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}')
+            cursor.execute(f'DROP TABLE {name}')
+            bump_conditional_version(AuditLog)
+
+        logger.info(f'Archived {rows} audit log rows from {name} to {path} and dropped the partition')
+        archived.append((name, str(path), rows))
+
+    return archived
+
+
+def maintain_partitions(months_ahead, retention_months, archive_dir):
+    """
+    Pre-create upcoming partitions and apply the retention policy
+
+    A ``retention_months`` of None keeps every partition.
+    """
+    if not is_partitioned():
+        logger.warning(f'{PARENT_TABLE} is not partitioned, skipping partition maintenance')
+        return {'created': [], 'archived': []}
+
+    created = ensure_partitions(months_ahead)
+    archived = []
+    if retention_months is not None:
+        archived = drop_expired_partitions(retention_months, archive_dir)
+
+    return {'created': created, 'archived': archived}
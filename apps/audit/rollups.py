@@ -0,0 +1,167 @@
+"""
+Daily rollups of audit_logs for the statistics endpoint
+
+AuditLogDailyRollup holds complete days up to the last rolled-up day; the
+statistics combine it with a live aggregate over the rows created after
+that day, so they cost O(days) instead of O(rows).
+"""
+import logging
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import AuditLog, AuditLogDailyRollup
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+# Days rebuilt per transaction
+CHUNK_DAYS = 31
+
+GROUP_FIELDS = ('action', 'entity_type', 'actor_user_id')
+
+
+def day_start(day):
+    """Aware datetime at the start of ``day`` in the current time zone"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def rolled_up_through():
+    """Last day covered by the rollups, or None"""
+    return AuditLogDailyRollup.objects.aggregate(day=Max('day'))['day']
+
+
+def rebuild_days(first_day, last_day):
+    """Recompute the rollups for the days from first_day to last_day inclusive"""
+    logs = AuditLog.objects.filter(
+        created_at__gte=day_start(first_day),
+        created_at__lt=day_start(last_day + timedelta(days=1))
+    ).annotate(
+        day=TruncDate('created_at')
+    ).values('day', *GROUP_FIELDS).annotate(
+        count=Count('id')
+    ).order_by()
+
+    with transaction.atomic():
+        AuditLogDailyRollup.objects.filter(day__range=(first_day, last_day)).delete()
+        rollups = AuditLogDailyRollup.objects.bulk_create(
+            [AuditLogDailyRollup(**row) for row in logs],
+            batch_size=1000
+        )
+
+    return len(rollups)
+
+
+def roll_up():
+    """
+    Roll up every complete day not covered yet
+
+    The last rolled-up day is rebuilt as well, so rows flushed late by the
+    buffered writer are picked up.
+
+    Returns:
+        (first day, last day) rebuilt, or None if there was nothing to do
+    """
+    yesterday = timezone.localdate() - timedelta(days=1)
+    first_day = rolled_up_through()
+
+    if first_day is None:
+        oldest = AuditLog.objects.aggregate(created_at=Min('created_at'))['created_at']
+        if oldest is None:
+            return None
+        first_day = timezone.localdate(oldest)
+
+    if first_day > yesterday:
+        return None
+
+    day = first_day
+    while day <= yesterday:
+        last_day = min(day + timedelta(days=CHUNK_DAYS - 1), yesterday)
+        rows = rebuild_days(day, last_day)
+        logger.info(f'Rolled up audit logs for {day} to {last_day} into {rows} rows')
+        day = last_day + timedelta(days=1)
+
+    return first_day, yesterday
+
+
+FOLD_ACTOR_SQL = """
+WITH removed AS (
+    DELETE FROM audit_log_daily_rollups WHERE actor_user_id = %s
+    RETURNING day, action, entity_type, count
+)
+INSERT INTO audit_log_daily_rollups (day, action, entity_type, actor_user_id, count)
+SELECT day, action, entity_type, NULL, count FROM removed
+ON CONFLICT (day, action, entity_type) WHERE actor_user_id IS NULL
+DO UPDATE SET count = audit_log_daily_rollups.count + EXCLUDED.count
+"""
+
+
+def fold_actor_rollups(user_id):
+    """
+    Merge a user's rollup rows into the actor-less ones before the user is deleted
+
+    Deleting the user would otherwise set actor_user to NULL on rows that
+    collide with existing actor-less rows of the same day and group.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(FOLD_ACTOR_SQL, [user_id])
+
+
+def statistics(top_actors_limit=10):
+    """
+    Audit statistics from the rollups plus the rows after the last rolled-up day
+
+    Returns the same shape as the original full-table aggregates.
+    """
+    through = rolled_up_through()
+    rollups = AuditLogDailyRollup.objects.order_by()
+    tail = AuditLog.objects.order_by()
+    if through is not None:
+        tail = tail.filter(created_at__gte=day_start(through + timedelta(days=1)))
+
+    actions = Counter()
+    entity_types = Counter()
+    actors = Counter()
+
+    for row in rollups.values(*GROUP_FIELDS).annotate(count=Sum('count')):
+        _add_group(row, actions, entity_types, actors)
+    for row in tail.values(*GROUP_FIELDS).annotate(count=Count('id')):
+        _add_group(row, actions, entity_types, actors)
+
+    top = actors.most_common(top_actors_limit)
+    users = User.objects.only('phone', 'email').in_bulk([user_id for user_id, _ in top])
+
+    return {
+        'total_logs': sum(actions.values()),
+        'actions_breakdown': [
+            {'action': action, 'count': count}
+            for action, count in actions.most_common()
+        ],
+        'entity_types_breakdown': [
+            {'entity_type': entity_type, 'count': count}
+            for entity_type, count in entity_types.most_common()
+        ],
+        'top_actors': [
+            {
+                'actor_user__id': user_id,
+                'actor_user__phone': str(users[user_id].phone),
+                'actor_user__email': users[user_id].email,
+                'action_count': count,
+            }
+            for user_id, count in top
+            if user_id in users
+        ],
+    }
+
+
+def _add_group(row, actions, entity_types, actors):
+    actions[row['action']] += row['count']
+    entity_types[row['entity_type']] += row['count']
+    if row['actor_user_id'] is not None:
+        actors[row['actor_user_id']] += row['count']
@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from config.expansion import DynamicFieldsMixin
 from .models import AuditLog
 
 
-class AuditLogSerializer(serializers.ModelSerializer):
+class AuditLogSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for AuditLog model"""
 
     actor_name = serializers.CharField(source='actor_user.get_full_name', read_only=True)
@@ -30,4 +31,5 @@ class AuditLogSerializer(serializers.ModelSerializer):
             'created_at',
         ]
         read_only_fields = ['id', 'created_at']
+        select_related = ('actor_user', 'content_type')
 
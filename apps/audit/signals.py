@@ -0,0 +1,17 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from config.conditional import connect_conditional_versions
+from .rollups import fold_actor_rollups
+from .views import AuditLogViewSet
+
+User = get_user_model()
+
+connect_conditional_versions(AuditLogViewSet)
+
+
+@receiver(pre_delete, sender=User)
+def fold_deleted_actor_rollups(sender, instance, **kwargs):
+    """Merge the user's rollup rows into the actor-less ones before SET_NULL collides with them"""
+    fold_actor_rollups(instance.pk)
@@ -0,0 +1,47 @@
+from celery import shared_task
+from django.conf import settings
+import logging
+
+from . import rollups
+from .partitions import maintain_partitions
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name='apps.audit.tasks.maintain_audit_partitions')
+def maintain_audit_partitions():
+    """
+    Create upcoming audit_logs partitions and archive expired ones
+    Run daily
+    """
+    result = maintain_partitions(
+        months_ahead=settings.AUDIT_LOG_PARTITIONS_AHEAD,
+        retention_months=settings.AUDIT_LOG_RETENTION_MONTHS,
+        archive_dir=settings.AUDIT_LOG_ARCHIVE_DIR,
+    )
+
+    logger.info(
+        f"Audit partitions: {len(result['created'])} created, "
+        f"{len(result['archived'])} archived"
+    )
+    return {
+        'partitions_created': result['created'],
+        'partitions_archived': [name for name, _, _ in result['archived']],
+    }
+
+
+@shared_task(name='apps.audit.tasks.roll_up_audit_logs')
+def roll_up_audit_logs():
+    """
+    Roll up completed days of audit logs for the statistics endpoint
+    Run daily
+    """
+    rebuilt = rollups.roll_up()
+
+    if rebuilt is None:
+        logger.info('Audit log rollups are up to date')
+        return {'first_day': None, 'last_day': None}
+
+    first_day, last_day = rebuilt
+    logger.info(f'Rolled up audit logs for {first_day} to {last_day}')
+    return {'first_day': first_day.isoformat(), 'last_day': last_day.isoformat()}
@@ -0,0 +1,100 @@
+import queue
+from datetime import timedelta
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .buffer import AuditLogBuffer
+from .models import AuditLog
+
+
+def entry(entity_id, **fields):
+    return AuditLog(entity_type='Payment', entity_id=entity_id, action='create', data={}, **fields)
+
+
+@override_settings(AUDIT_LOG_BATCH_SIZE=2, AUDIT_LOG_WRITE_RETRIES=2, AUDIT_LOG_RETRY_DELAY=0.5)
+class AuditLogBufferTests(TestCase):
+    def setUp(self):
+        # Queue filled directly: put() would start the writer thread, which
+        # writes on a connection outside the test transaction
+        self.buffer = AuditLogBuffer()
+        self.buffer._queue = queue.Queue()
+        self.sleep = self.patch('apps.audit.buffer.time.sleep')
+        # Would close the connection holding the test transaction
+        self.patch('apps.audit.buffer.close_old_connections')
+
+    def patch(self, target):
+        patcher = mock.patch(target)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def logged_ids(self):
+        return sorted(AuditLog.objects.values_list('entity_id', flat=True))
+
+    def test_flush_writes_queued_entries_in_batches(self):
+        for entity_id in range(1, 6):
+            self.buffer._queue.put(entry(entity_id))
+
+        with mock.patch.object(AuditLog.objects, 'bulk_create', wraps=AuditLog.objects.bulk_create) as bulk_create:
+            self.buffer.flush()
+
+        self.assertEqual([len(call.args[0]) for call in bulk_create.call_args_list], [2, 2, 1])
+        self.assertEqual(self.logged_ids(), [1, 2, 3, 4, 5])
+        self.assertTrue(self.buffer._queue.empty())
+
+    def test_keeps_created_at_of_the_logged_event(self):
+        logged_at = timezone.now() - timedelta(minutes=5)
+        self.buffer._queue.put(entry(1, created_at=logged_at))
+
+        self.buffer.flush()
+
+        self.assertEqual(AuditLog.objects.get().created_at, logged_at)
+
+    def test_retries_failed_batch_with_backoff(self):
+        bulk_create = AuditLog.objects.bulk_create
+        failures = [DatabaseError('connection lost'), DatabaseError('connection lost')]
+
+        def flaky_bulk_create(*args, **kwargs):
+            if failures:
+                raise failures.pop()
+            return bulk_create(*args, **kwargs)
+
+        with mock.patch.object(AuditLog.objects, 'bulk_create', side_effect=flaky_bulk_create):
+            self.buffer._write([entry(1), entry(2)])
+
+        self.assertEqual(self.logged_ids(), [1, 2])
+        self.assertEqual([call.args[0] for call in self.sleep.call_args_list], [0.5, 1.0])
+
+    def test_falls_back_to_row_inserts_after_retries(self):
+        bad = entry(2)
+        batch = [entry(1), bad, entry(3)]
+
+        with mock.patch.object(AuditLog.objects, 'bulk_create', side_effect=DatabaseError('down')) as bulk_create, \
+                mock.patch.object(bad, 'save', side_effect=DatabaseError('bad row')):
+            self.buffer._write(batch)
+
+        self.assertEqual(bulk_create.call_count, 3)
+        self.assertEqual(self.logged_ids(), [1, 3])
+
+
+class AuditLogLogTests(TestCase):
+    def test_unbuffered_log_writes_immediately(self):
+        logged = AuditLog.log('Payment', 1, 'create', {'amount': '100.00'})
+
+        self.assertIsNotNone(logged.pk)
+        self.assertTrue(AuditLog.objects.filter(pk=logged.pk).exists())
+
+    @override_settings(AUDIT_LOG_BUFFERED=True)
+    def test_buffered_log_queues_entry_on_commit(self):
+        with mock.patch('apps.audit.buffer.audit_buffer.put') as put:
+            with self.captureOnCommitCallbacks(execute=True):
+                before = timezone.now()
+                logged = AuditLog.log('Payment', 1, 'create', {})
+                put.assert_not_called()
+
+        put.assert_called_once_with(logged)
+        self.assertIsNone(logged.pk)
+        self.assertGreaterEqual(logged.created_at, before)
+        self.assertFalse(AuditLog.objects.exists())
@@ -1,11 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AuditLogViewSet
+from .views import AuditLogViewSet, AuditStatisticsView
 
 router = DefaultRouter()
 router.register(r'logs', AuditLogViewSet, basename='audit-log')
 
 urlpatterns = [
+    # Ahead of the router, which would match it as a detail route
+    path('logs/statistics/', AuditStatisticsView.as_view(), name='audit-log-statistics'),
     path('', include(router.urls)),
 ]
 
@@ -5,8 +5,14 @@ from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
-from django.db.models import Count
 
+from config.async_views import CachedStatisticsView
+from config.conditional import ConditionalGetMixin
+from config.expansion import ExpandableViewSetMixin
+from config.exports import ExportMixin
+from config.pagination import PageNumberOrCursorPagination
+from . import rollups
+from .filters import AuditLogFilter
 from .models import AuditLog
 from .serializers import AuditLogSerializer
 
@@ -22,8 +28,12 @@ from .serializers import AuditLogSerializer
         summary="Get audit log detail",
         tags=['Audit']
     ),
+    export=extend_schema(
+        summary="Export audit logs",
+        tags=['Audit']
+    ),
 )
-class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
+class AuditLogViewSet(ExportMixin, ConditionalGetMixin, ExpandableViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for AuditLog model (Read-only)
 
@@ -31,14 +41,31 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     This ViewSet provides read-only access to view audit trail.
     """
 
-    queryset = AuditLog.objects.select_related('actor_user', 'content_type')
+    conditional_field = 'created_at'
+    # Rows are only ever removed by dropping expired partitions, which bumps the version
+    conditional_count = False
+    conditional_dependencies = (AuditLog,)
+    queryset = AuditLog.objects.all()
     serializer_class = AuditLogSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = PageNumberOrCursorPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['entity_type', 'action', 'actor_user']
+    filterset_class = AuditLogFilter
     search_fields = ['entity_type', 'entity_id', 'actor_user__phone', 'actor_user__email']
     ordering_fields = ['created_at', 'action', 'entity_type']
     ordering = ['-created_at']
+    export_name = 'audit-logs'
+    export_fields = (
+        ('id', 'id'),
+        ('created_at', 'created_at'),
+        ('action', 'action'),
+        ('entity_type', 'entity_type'),
+        ('entity_id', 'entity_id'),
+        ('actor', 'actor_user__phone'),
+        ('ip_address', 'ip_address'),
+        ('user_agent', 'user_agent'),
+        ('data', 'data'),
+    )
 
     @extend_schema(
         description="Get audit logs for a specific entity",
@@ -73,7 +100,7 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        logs = self.queryset.filter(entity_type=entity_type, entity_id=entity_id)
+        logs = self.filter_queryset(self.get_queryset()).filter(entity_type=entity_type, entity_id=entity_id)
         serializer = self.get_serializer(logs, many=True)
         return Response(serializer.data)
 
@@ -102,48 +129,10 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        logs = self.queryset.filter(actor_user_id=user_id)
+        logs = self.filter_queryset(self.get_queryset()).filter(actor_user_id=user_id)
         serializer = self.get_serializer(logs, many=True)
         return Response(serializer.data)
 
-    @extend_schema(
-        description="Get audit log statistics",
-        summary="Get audit statistics",
-        tags=['Audit']
-    )
-    @action(detail=False, methods=['get'])
-    def statistics(self, request):
-        """Get audit log statistics"""
-        # Actions breakdown
-        actions_stats = self.queryset.values('action').annotate(
-            count=Count('id')
-        ).order_by('-count')
-
-        # Entity types breakdown
-        entity_stats = self.queryset.values('entity_type').annotate(
-            count=Count('id')
-        ).order_by('-count')
-
-        # Top actors
-        top_actors = self.queryset.filter(
-            actor_user__isnull=False
-        ).values(
-            'actor_user__id',
-            'actor_user__phone',
-            'actor_user__email'
-        ).annotate(
-            action_count=Count('id')
-        ).order_by('-action_count')[:10]
-
-        stats = {
-            'total_logs': self.queryset.count(),
-            'actions_breakdown': list(actions_stats),
-            'entity_types_breakdown': list(entity_stats),
-            'top_actors': list(top_actors),
-        }
-
-        return Response(stats)
-
     @extend_schema(
         description="Get recent audit logs",
         summary="Get recent audit logs",
@@ -162,7 +151,15 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     def recent(self, request):
         """Get recent audit logs"""
         limit = int(request.query_params.get('limit', 50))
-        logs = self.queryset[:limit]
+        logs = self.filter_queryset(self.get_queryset())[:limit]
         serializer = self.get_serializer(logs, many=True)
         return Response(serializer.data)
 
+
+class AuditStatisticsView(CachedStatisticsView):
+    """Audit log statistics, served by an async view from the cache"""
+
+    cache_key = 'statistics:audit'
+
+    def compute(self):
+        return rollups.statistics()
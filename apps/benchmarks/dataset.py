@@ -0,0 +1,601 @@
+"""
+Synthetic dataset at production-like scale
+
+Every value is drawn from one ``random.Random(seed)``, so the same scale and
+seed produce the same dataset on every run and benchmark reports of
+different commits are comparable. Rows are written with bulk_create in
+batches; since timestamps are backdated over the whole window, the
+auto_now/auto_now_add fields are switched off while inserting.
+"""
+import logging
+import random
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils import timezone
+
+from apps.accounts.models import Household, User
+from apps.audit import partitions
+from apps.audit import rollups as audit_rollups
+from apps.audit.models import AuditLog
+from apps.billing.models import Bill
+from apps.contracts.models import RentalContract, RentalContractAuthor, RentalContractParticipant
+from apps.payments import rollups as payment_rollups
+from apps.payments.models import Payment
+from apps.properties.models import (
+    Location, Property, RentalTerms, Unit, UnitPolicy, UnitRoomSummary, UnitUtility, UtilityType
+)
+from config.caching import bump_all_cache_versions
+
+logger = logging.getLogger(__name__)
+
+# Prefix of the phone numbers of seeded users and households
+PHONE_PREFIX = '+880199'
+BENCHMARK_USER_PHONE = f'{PHONE_PREFIX}0000000'
+BENCHMARK_USER_PASSWORD = 'benchmark'
+
+BATCH_SIZE = 2000
+
+# Contracts whose bills, payments and audit logs are generated per transaction
+CONTRACT_CHUNK = 500
+
+LOCATIONS = {
+    'Dhaka': {
+        'Dhaka': ['Dhanmondi', 'Mirpur', 'Mohammadpur', 'Uttara', 'Gulshan', 'Badda', 'Rampura'],
+        'Gazipur': ['Tongi', 'Joydebpur', 'Board Bazar'],
+        'Narayanganj': ['Fatullah', 'Siddhirganj'],
+    },
+    'Chattogram': {
+        'Chattogram': ['Agrabad', 'Nasirabad', 'Halishahar', 'Panchlaish'],
+        "Cox's Bazar": ['Kolatoli', 'Jhilongja'],
+    },
+    'Khulna': {
+        'Khulna': ['Sonadanga', 'Khalishpur', 'Boyra'],
+    },
+    'Rajshahi': {
+        'Rajshahi': ['Shaheb Bazar', 'Uposhohor', 'Motihar'],
+    },
+    'Sylhet': {
+        'Sylhet': ['Zindabazar', 'Ambarkhana', 'Shahjalal Upashahar'],
+    },
+}
+
+FIRST_NAMES = [
+    'Rahim', 'Karim', 'Nasrin', 'Farhana', 'Tanvir', 'Sadia', 'Imran', 'Mitu', 'Arif', 'Shirin',
+    'Hasan', 'Rumana', 'Sabbir', 'Tania', 'Jamal', 'Nusrat', 'Fahim', 'Lima', 'Rafiq', 'Sumaiya',
+]
+LAST_NAMES = [
+    'Ahmed', 'Hossain', 'Rahman', 'Islam', 'Chowdhury', 'Khan', 'Uddin', 'Akter', 'Sarker', 'Miah',
+]
+HOUSE_NAMES = [
+    'Shanti Niloy', 'Nitol Villa', 'Green View', 'Lake Palace', 'Rose Garden', 'Sunrise Tower',
+    'Bismillah Manzil', 'Nur Mahal', 'Kazi Bhaban', 'Amin Court', 'Hill Crest', 'River Side',
+]
+
+UTILITIES = [
+    # (name, billing types, share of units that have it, share included in rent, monthly amount range)
+    ('Electricity', ['meter', 'card'], 1.0, 0.0, (800, 4500)),
+    ('Gas', ['meter', 'fixed'], 0.8, 0.3, (975, 1080)),
+    ('Water', ['fixed', 'meter'], 0.9, 0.5, (300, 900)),
+    ('Internet', ['fixed'], 0.4, 0.2, (500, 1500)),
+]
+
+UTILITY_AMOUNTS = {name: amounts for name, *_, amounts in UTILITIES}
+
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/120.0 Safari/537.36',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_1 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148',
+    'Mozilla/5.0 (Linux; Android 13) AppleWebKit/537.36 Chrome/119.0 Mobile Safari/537.36',
+    'RentalApp/2.4.1 (Android 12)',
+]
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create keep the created_at/updated_at values set on the objects"""
+    fields = [
+        field
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now = auto_now
+            field.auto_now_add = auto_now_add
+
+
+def is_seeded():
+    return User.objects.filter(phone=BENCHMARK_USER_PHONE).exists()
+
+
+class DatasetGenerator:
+    """
+    Generate locations, properties and units with their terms, policies and
+    utilities, tenants with a contract history per unit, the monthly bills of
+    every contract over ``months`` months, their payments and the audit logs
+    the API would have written along the way.
+
+    The scale is set by ``properties``; everything else is derived from it:
+    about 10 units per property, 85% of units rented, one landlord per ten
+    properties besides the staff benchmark user, who is a landlord too.
+    """
+
+    OCCUPANCY = 0.85
+
+    def __init__(self, properties=200, months=24, seed=1, batch_size=BATCH_SIZE, log=None):
+        self.property_count = properties
+        self.months = months
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.log = log or logger.info
+
+        self.today = timezone.localdate()
+        self.current_month = self.today.replace(day=1)
+        self.window_start = partitions.add_months(self.current_month, -(months - 1))
+        self.counts = Counter()
+        self._phone_serial = 0
+
+    def generate(self):
+        models = (
+            User, Household, Location, Property, Unit, UnitRoomSummary, RentalTerms, UnitPolicy,
+            UnitUtility, RentalContract, RentalContractParticipant, RentalContractAuthor,
+            Bill, Payment, AuditLog,
+        )
+        with explicit_timestamps(*models):
+            with transaction.atomic():
+                utility_types = self.create_utility_types()
+                landlords = self.create_users()
+                properties = self.create_properties(landlords)
+                units = self.create_units(properties, utility_types)
+
+            self.prepare_audit_partitions()
+
+            contracts = self.plan_contracts(units)
+            for start in range(0, len(contracts), CONTRACT_CHUNK):
+                with transaction.atomic():
+                    self.create_contract_history(contracts[start:start + CONTRACT_CHUNK])
+                self.log(f'Contracts {start + 1}-{min(start + CONTRACT_CHUNK, len(contracts))} of {len(contracts)} done')
+
+        self.roll_up()
+        bump_all_cache_versions()
+        return dict(self.counts)
+
+    # Helpers
+
+    def bulk_create(self, model, objects):
+        created = model.objects.bulk_create(objects, batch_size=self.batch_size)
+        self.counts[model._meta.label] += len(created)
+        return created
+
+    def moment(self, day, earliest=time(8), latest=time(21)):
+        """Aware datetime at a random time of ``day``"""
+        seconds = self.random.randint(
+            earliest.hour * 3600 + earliest.minute * 60,
+            latest.hour * 3600 + latest.minute * 60
+        )
+        return timezone.make_aware(datetime.combine(day, time.min) + timedelta(seconds=seconds))
+
+    def day_between(self, first, last):
+        return first + timedelta(days=self.random.randint(0, max((last - first).days, 0)))
+
+    def money(self, low, high, step=50):
+        return Decimal(self.random.randrange(low, high + 1, step))
+
+    def phone(self):
+        self._phone_serial += 1
+        return f'{PHONE_PREFIX}{self._phone_serial:07d}'
+
+    def person_name(self):
+        return f'{self.random.choice(FIRST_NAMES)} {self.random.choice(LAST_NAMES)}'
+
+    def key(self, prefix):
+        return f'{prefix}_{uuid.UUID(int=self.random.getrandbits(128)).hex}'
+
+    # Reference data and users
+
+    def create_utility_types(self):
+        return {
+            name: UtilityType.objects.get_or_create(name=name)[0]
+            for name, *_ in UTILITIES
+        }
+
+    def create_users(self):
+        password = make_password(BENCHMARK_USER_PASSWORD)
+        created_at = self.moment(partitions.add_months(self.window_start, -12))
+
+        admin = User(
+            phone=BENCHMARK_USER_PHONE,
+            email='benchmark@example.com',
+            password=password,
+            is_staff=True,
+            is_superuser=True,
+            created_at=created_at,
+            updated_at=created_at,
+        )
+        landlords = [
+            User(
+                phone=self.phone(),
+                email=f'landlord{index}@example.com',
+                password=password,
+                created_at=created_at,
+                updated_at=created_at,
+            )
+            for index in range(self.property_count // 10)
+        ]
+        # The benchmark user owns a share of the data like any landlord, so
+        # routes scoped to the user's own rows have something to return
+        landlords = self.bulk_create(User, [admin] + landlords)
+        return landlords
+
+    # Properties and units
+
+    def create_properties(self, landlords):
+        areas = [
+            (division, district, area)
+            for division, districts in LOCATIONS.items()
+            for district, names in districts.items()
+            for area in names
+        ]
+        first_day = partitions.add_months(self.window_start, -24)
+        last_day = self.window_start
+
+        locations = []
+        for index in range(max(1, self.property_count // 5)):
+            division, district, area = areas[index % len(areas)]
+            created_at = self.moment(self.day_between(first_day, last_day))
+            locations.append(Location(
+                area_name=f'{area} Block {chr(65 + index // len(areas) % 26)}',
+                ward=str(self.random.randint(1, 54)),
+                upazila_or_thana=area,
+                city_corporation=f'{district} City Corporation' if district in ('Dhaka', 'Chattogram') else None,
+                district=district,
+                division=division,
+                created_at=created_at,
+                updated_at=created_at,
+            ))
+        locations = self.bulk_create(Location, locations)
+
+        properties = []
+        for index in range(self.property_count):
+            location = self.random.choice(locations)
+            created_at = self.moment(self.day_between(location.created_at.date(), last_day))
+            properties.append(Property(
+                location=location,
+                house_name=f'{self.random.choice(HOUSE_NAMES)} {index + 1}',
+                age_of_building=self.random.randint(0, 30),
+                total_floors=self.random.randint(3, 10),
+                has_lift=self.random.random() < 0.4,
+                has_security_guard=self.random.random() < 0.6,
+                has_parking=self.random.random() < 0.5,
+                is_tiled=self.random.random() < 0.8,
+                created_by=self.random.choice(landlords),
+                created_at=created_at,
+                updated_at=created_at,
+            ))
+        return self.bulk_create(Property, properties)
+
+    def create_units(self, properties, utility_types):
+        units = []
+        for prop in properties:
+            per_floor = self.random.randint(1, 2)
+            for floor_no in range(1, prop.total_floors + 1):
+                for position in range(per_floor):
+                    units.append(Unit(
+                        property=prop,
+                        apartment_no=f'{floor_no}{chr(65 + position)}',
+                        floor_no=floor_no,
+                        facing_direction=self.random.choice(Unit.FACING_CHOICES)[0],
+                        size_sqft=self.random.randrange(650, 2400, 50),
+                        created_at=prop.created_at,
+                        updated_at=prop.created_at,
+                    ))
+        units = self.bulk_create(Unit, units)
+
+        summaries, terms, policies, utilities = [], [], [], []
+        for unit in units:
+            stamps = {'created_at': unit.created_at, 'updated_at': unit.created_at}
+            bedrooms = max(1, min(5, unit.size_sqft // 450))
+            bathrooms = max(1, bedrooms - self.random.randint(0, 1))
+            attached = self.random.randint(0, bathrooms)
+            summaries.append(UnitRoomSummary(
+                unit=unit,
+                bedrooms=bedrooms,
+                master_bedrooms=min(bedrooms, self.random.randint(0, 2)),
+                bathrooms=bathrooms,
+                attached_baths=attached,
+                common_baths=bathrooms - attached,
+                kitchens=1,
+                balconies=self.random.randint(0, 3),
+                has_separate_dining=unit.size_sqft > 1200,
+                **stamps
+            ))
+
+            rent = Decimal(unit.size_sqft * self.random.randint(12, 30) // 500 * 500)
+            terms.append(RentalTerms(
+                unit=unit,
+                asking_rent=rent,
+                minimum_rent=rent * Decimal('0.9'),
+                advance_months=self.random.randint(1, 3),
+                service_charge=self.money(0, 5000, 500),
+                payment_due_day=self.random.randint(1, 10),
+                **stamps
+            ))
+
+            policies.append(UnitPolicy(
+                unit=unit,
+                pets_allowed=self.random.random() < 0.2,
+                bachelor_allowed=self.random.random() < 0.5,
+                sublet_allowed=self.random.random() < 0.1,
+                gender_restricted=self.random.choice(['any', 'any', 'any', 'male', 'female']),
+                roof_access=self.random.random() < 0.5,
+                **stamps
+            ))
+
+            for name, billing_types, share, included_share, _ in UTILITIES:
+                if self.random.random() < share:
+                    utilities.append(UnitUtility(
+                        unit=unit,
+                        utility_type=utility_types[name],
+                        billing_type=self.random.choice(billing_types),
+                        is_included_in_rent=self.random.random() < included_share,
+                        **stamps
+                    ))
+
+        self.bulk_create(UnitRoomSummary, summaries)
+        self.bulk_create(RentalTerms, terms)
+        self.bulk_create(UnitPolicy, policies)
+        self.bulk_create(UnitUtility, utilities)
+
+        # Attached for planning contracts and utility bills
+        terms_by_unit = {term.unit_id: term for term in terms}
+        billed_by_unit = {}
+        for utility in utilities:
+            if not utility.is_included_in_rent:
+                billed_by_unit.setdefault(utility.unit_id, []).append(utility.utility_type)
+        for unit in units:
+            unit.terms = terms_by_unit[unit.pk]
+            unit.billed_utilities = billed_by_unit.get(unit.pk, [])
+        return units
+
+    # Contracts
+
+    def plan_contracts(self, units):
+        """Unsaved contracts: a back-to-back history per rented unit"""
+        contracts = []
+        for unit in units:
+            if self.random.random() >= self.OCCUPANCY:
+                continue
+
+            start = partitions.add_months(self.window_start, -self.random.randint(0, 11))
+            while start <= self.today:
+                length = self.random.choice([6, 12, 12, 12, 24])
+                end = partitions.add_months(start, length) - timedelta(days=1)
+                terminated = end < self.today and self.random.random() < 0.1
+                if terminated:
+                    end = partitions.add_months(start, self.random.randint(2, length)) - timedelta(days=1)
+
+                contract = RentalContract(
+                    unit=unit,
+                    contract_from=start,
+                    contract_to=end,
+                    rent_amount_at_contract=unit.terms.asking_rent - self.money(0, 2000, 500),
+                    advance_paid_months=unit.terms.advance_months,
+                    service_charge_at_contract=unit.terms.service_charge,
+                    status='active' if end >= self.today else 'terminated' if terminated else 'expired',
+                    created_by=unit.property.created_by,
+                )
+                if terminated:
+                    contract.terminated_at = self.moment(end)
+                    contract.termination_reason = self.random.choice([
+                        'Tenant relocated', 'Rent dispute', 'Tenant bought an apartment', 'Job transfer',
+                    ])
+                contracts.append(contract)
+
+                # Vacancy between tenants
+                start = partitions.add_months(end + timedelta(days=1), self.random.choice([0, 0, 0, 1, 2]))
+        return contracts
+
+    def create_contract_history(self, contracts):
+        households = []
+        for contract in contracts:
+            signed = self.moment(contract.contract_from - timedelta(days=self.random.randint(3, 20)))
+            contract.created_at = signed
+            contract.updated_at = contract.terminated_at or signed
+            households.append(Household(
+                user=contract.created_by,
+                name=self.person_name(),
+                date_of_birth=date(self.random.randint(1960, 2000), self.random.randint(1, 12), self.random.randint(1, 28)),
+                nid=str(self.random.randint(10 ** 9, 10 ** 10 - 1)),
+                contact_phone=self.phone(),
+                created_at=signed,
+                updated_at=signed,
+            ))
+        households = self.bulk_create(Household, households)
+        for contract, household in zip(contracts, households):
+            contract.tenant_household = household
+        contracts = self.bulk_create(RentalContract, contracts)
+
+        participants, authors = [], []
+        for contract in contracts:
+            participants.append(RentalContractParticipant(
+                contract=contract,
+                household=contract.tenant_household,
+                role='primary',
+                created_at=contract.created_at,
+            ))
+            authors.append(RentalContractAuthor(
+                contract=contract,
+                user=contract.created_by,
+                role='primary',
+                can_approve=True,
+                can_terminate=True,
+                can_renew=True,
+                created_at=contract.created_at,
+            ))
+        self.bulk_create(RentalContractParticipant, participants)
+        self.bulk_create(RentalContractAuthor, authors)
+
+        bills = self.plan_bills(contracts)
+        payments = self.plan_payments(bills)
+        self.bulk_create(Bill, bills)
+        self.bulk_create(Payment, payments)
+        self.create_audit_logs(contracts, bills, payments)
+
+    # Bills and payments
+
+    def plan_bills(self, contracts):
+        bills = []
+        for contract in contracts:
+            month = max(contract.contract_from.replace(day=1), self.window_start)
+            last_month = min(contract.contract_to, self.today).replace(day=1)
+            terms = contract.unit.terms
+
+            while month <= last_month:
+                issued = self.moment(month, time(0, 5), time(0, 30))
+                due_date = month.replace(day=min(terms.payment_due_day, 28))
+                for utility_type in [None] + contract.unit.billed_utilities:
+                    if utility_type is None:
+                        amount = contract.rent_amount_at_contract
+                    else:
+                        amount = self.money(*UTILITY_AMOUNTS[utility_type.name], 5)
+                    bills.append(Bill(
+                        contract=contract,
+                        utility_type=utility_type,
+                        amount=amount,
+                        billing_month=month.strftime('%Y-%m'),
+                        due_date=due_date,
+                        status=self.bill_status(due_date),
+                        external_ref=self.key('ub') if utility_type else None,
+                        created_at=issued,
+                        updated_at=issued,
+                    ))
+                month = partitions.add_months(month, 1)
+        return bills
+
+    def bill_status(self, due_date):
+        if due_date >= self.today:
+            return 'paid' if self.random.random() < 0.3 else 'pending'
+
+        roll = self.random.random()
+        if roll < 0.9:
+            return 'paid'
+        if roll < 0.95:
+            return 'partial'
+        return 'overdue'
+
+    def plan_payments(self, bills):
+        """Unsaved payments of the bills, setting amount_paid and paid_on to match"""
+        payments = []
+        for bill in bills:
+            if bill.status == 'pending':
+                continue
+
+            paid_day = min(self.day_between(bill.created_at.date(), bill.due_date + timedelta(days=10)), self.today)
+            if bill.status == 'overdue':
+                if self.random.random() < 0.5:
+                    payments.append(self.payment(bill, bill.amount, 'failed', paid_day))
+                continue
+
+            if self.random.random() < 0.04:
+                payments.append(self.payment(bill, bill.amount, 'failed', paid_day))
+
+            amount = bill.amount if bill.status == 'paid' else (bill.amount / 2).quantize(Decimal('1'))
+            payment = self.payment(bill, amount, 'succeeded', paid_day)
+            payments.append(payment)
+
+            bill.amount_paid = amount
+            if bill.status == 'paid':
+                bill.paid_on = payment.created_at
+            bill.updated_at = payment.created_at
+        return payments
+
+    def payment(self, bill, amount, status, day):
+        provider = self.random.choice(['stripe', 'cash', 'bank_transfer', 'mobile_money', 'mobile_money'])
+        created_at = self.moment(day)
+        return Payment(
+            contract=bill.contract,
+            bill=bill,
+            amount=amount,
+            payment_type='rent' if bill.utility_type is None else 'utility',
+            provider=provider,
+            provider_payment_id=self.key('pi') if provider == 'stripe' else None,
+            status=status,
+            idempotency_key=self.key('seed'),
+            received_by_user=bill.contract.created_by if provider == 'cash' else None,
+            created_at=created_at,
+            updated_at=created_at,
+        )
+
+    # Audit logs
+
+    def create_audit_logs(self, contracts, bills, payments):
+        content_types = ContentType.objects.get_for_models(RentalContract, Bill, Payment)
+        logs = []
+
+        def log(obj, action, data, user, created_at):
+            logs.append(AuditLog(
+                content_type=content_types[type(obj)],
+                object_id=obj.pk,
+                entity_type=type(obj).__name__,
+                entity_id=obj.pk,
+                action=action,
+                data=data,
+                actor_user=user,
+                ip_address=f'10.{self.random.randint(0, 255)}.{self.random.randint(0, 255)}.{self.random.randint(1, 254)}',
+                user_agent=self.random.choice(USER_AGENTS),
+                created_at=created_at,
+            ))
+
+        for contract in contracts:
+            log(contract, 'create', {
+                'unit_id': contract.unit_id,
+                'tenant_household_id': contract.tenant_household_id,
+                'rent_amount_at_contract': str(contract.rent_amount_at_contract),
+            }, contract.created_by, contract.created_at)
+            if contract.terminated_at:
+                log(contract, 'terminate', {
+                    'termination_reason': contract.termination_reason,
+                }, contract.created_by, contract.terminated_at)
+
+        for payment in payments:
+            log(payment, 'payment', {
+                'bill_id': payment.bill_id,
+                'amount': str(payment.amount),
+                'provider': payment.provider,
+                'status': payment.status,
+            }, payment.received_by_user, payment.created_at)
+
+        for bill in bills:
+            if bill.paid_on and self.random.random() < 0.2:
+                log(bill, 'update', {'status': 'paid'}, bill.contract.created_by, bill.paid_on)
+
+        # Only rows before the window's partitions would land in DEFAULT
+        self.bulk_create(AuditLog, [entry for entry in logs if entry.created_at.date() >= self.window_start])
+
+    def prepare_audit_partitions(self):
+        """Create the monthly partitions the backdated audit logs go into"""
+        if not partitions.is_partitioned():
+            return
+
+        month = self.window_start
+        while month <= self.current_month:
+            partitions.create_partition(month)
+            month = partitions.add_months(month, 1)
+
+    def roll_up(self):
+        """Build the statistics rollups the nightly tasks would have built"""
+        audit_rollups.roll_up()
+        payment_rollups.roll_up(settings.PAYMENT_ROLLUP_WINDOW_DAYS)
@@ -0,0 +1,107 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts.models import User
+from apps.benchmarks.dataset import BENCHMARK_USER_PHONE
+from apps.benchmarks.suite import compare, run_benchmarks
+
+
+class Command(BaseCommand):
+    """Benchmark every API route and the billing tasks"""
+
+    help = 'Measure p50/p95 latency and query counts of the API and billing tasks and write a JSON report'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20,
+            help='Measured runs per benchmark'
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=2,
+            help='Unmeasured runs before the measured ones'
+        )
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            metavar='NAME',
+            help='Run only benchmarks whose name contains one of these, e.g. bill-list'
+        )
+        parser.add_argument(
+            '--user',
+            default=BENCHMARK_USER_PHONE,
+            help='Phone number of the user the requests are authenticated as'
+        )
+        parser.add_argument(
+            '--no-cache',
+            action='store_true',
+            help='Measure with a dummy cache backend, bypassing response and user caching'
+        )
+        parser.add_argument(
+            '--output',
+            help='Write the JSON report to this file'
+        )
+        parser.add_argument(
+            '--compare',
+            metavar='REPORT',
+            help='Print the changes against an earlier JSON report'
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+
+        user = User.objects.filter(phone=options['user']).first()
+        if user is None:
+            raise CommandError(f"User {options['user']} does not exist; run seed_dataset first or pass --user")
+
+        baseline = None
+        if options['compare']:
+            try:
+                baseline = json.loads(Path(options['compare']).read_text())
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read {options['compare']}: {exc}")
+
+        report = run_benchmarks(
+            user,
+            iterations=options['iterations'],
+            warmup=options['warmup'],
+            select=options['only'],
+            cache=not options['no_cache'],
+            log=self.write_result,
+        )
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2))
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+        if baseline:
+            self.write_comparison(compare(report, baseline), baseline)
+
+    def write_result(self, result):
+        status = f" [{result['status']}]" if 'status' in result else ''
+        line = (
+            f"{result['name']:<36} p50 {result['p50_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms  "
+            f"queries {result['queries']:>4}{status}"
+        )
+        if result.get('status', 200) >= 400:
+            line = self.style.WARNING(line)
+        self.stdout.write(line)
+
+    def write_comparison(self, rows, baseline):
+        self.stdout.write(f"\nChanges since {baseline.get('git_commit') or 'baseline'}:")
+        for row in rows:
+            change = row['p50_change']
+            line = (
+                f"{row['name']:<36} p50 {row['p50_ms'][0]:>9.2f} -> {row['p50_ms'][1]:>9.2f} ms "
+                f"({'n/a' if change is None else f'{change:+.1f}%'})  "
+                f"queries {row['queries'][0]} -> {row['queries'][1]}"
+            )
+            if row['queries'][1] > row['queries'][0]:
+                line = self.style.WARNING(line)
+            self.stdout.write(line)
@@ -0,0 +1,366 @@
+"""
+Latency and query count benchmarks of the API and the billing tasks
+
+Every route registered by the API routers is run: list, retrieve and each
+custom action (standard create/update/delete are left out), plus the async
+statistics views registered next to the routers. The bill and
+contract list pages are also rendered by both JSON renderers. Requests go
+through the full middleware and JWT authentication stack with the test
+client. Writes, i.e. POST actions and tasks, run in a transaction that is
+rolled back after every run, so the dataset is identical for each run and
+each commit.
+
+Reports are plain JSON with the git revision, the dataset row counts and
+p50/p95 latency, query count and DB time per benchmark; ``compare``
+lines up two reports.
+"""
+import math
+import platform
+import subprocess
+import time
+from contextlib import ExitStack
+from datetime import datetime
+
+import django
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Max, Min
+from django.http import HttpResponse
+from django.test.utils import override_settings
+from django.urls import URLResolver, get_resolver, reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.accounts.models import Household, User
+from apps.audit import partitions
+from apps.audit.models import AuditLog
+from apps.billing.models import Bill
+from apps.billing.tasks import check_overdue_bills, generate_bill_shard, send_bill_reminders
+from apps.contracts.models import RentalContract
+from apps.payments.models import Payment
+from apps.properties.models import Location, Property, Unit
+from config.middleware import QueryMetrics
+from config.renderers import ORJSONRenderer
+
+# Standard writes are not benchmarked, custom actions are
+SKIPPED_ACTIONS = {'create', 'update', 'partial_update', 'destroy'}
+
+# Rows a detail route is run against, by URL name; called with the user
+SAMPLE_FILTERS = {
+    'household-detail': lambda user: {'user': user},
+    'bill-mark-paid': lambda user: {'status': 'overdue'},
+    'contract-terminate': lambda user: {'status': 'active'},
+}
+
+DATASET_MODELS = (
+    User, Household, Location, Property, Unit, RentalContract, Bill, Payment, AuditLog,
+)
+
+
+def _audit_entity_params():
+    entity = AuditLog.objects.filter(entity_type='RentalContract').values('entity_type', 'entity_id').first()
+    return entity or {'entity_type': 'RentalContract', 'entity_id': 0}
+
+
+def _audit_user_params():
+    actor = AuditLog.objects.exclude(actor_user=None).values_list('actor_user_id', flat=True).first()
+    return {'user_id': actor or 0}
+
+
+# Query parameters of routes that require them, by URL name
+QUERY_PARAMS = {
+    'audit-log-by-entity': _audit_entity_params,
+    'audit-log-by-user': _audit_user_params,
+}
+
+# List pages rendered by each JSON renderer, with their query parameters
+RENDER_ROUTES = {
+    'bill-list': {'expand': 'contract,utility_type'},
+    'contract-list': {'expand': 'unit.property,tenant_household'},
+}
+
+# Async views outside the routers (see config.async_views), run as GETs
+ASYNC_ROUTES = ('payment-statistics', 'audit-log-statistics')
+
+REQUEST_DATA = {
+    'contract-terminate': {'termination_reason': 'Benchmark'},
+}
+
+
+def percentile(samples, percent):
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
+
+
+def git_revision():
+    """(commit, whether tracked files have uncommitted changes), or (None, None)"""
+    def git(*args):
+        return subprocess.run(
+            ['git', *args], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+
+    try:
+        return git('rev-parse', 'HEAD'), bool(git('status', '--porcelain', '--untracked-files=no'))
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+class Benchmark:
+    """A named callable run repeatedly; ``write`` runs are rolled back"""
+
+    def __init__(self, name, kind, target, run, write=False):
+        self.name = name
+        self.kind = kind
+        self.target = target
+        self.run = run
+        self.write = write
+
+    def measure(self, iterations, warmup):
+        durations, query_counts, db_times = [], [], []
+        outcome = None
+
+        for index in range(warmup + iterations):
+            metrics = QueryMetrics()
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                if self.write:
+                    stack.enter_context(transaction.atomic())
+
+                start = time.perf_counter()
+                outcome = self.run()
+                duration = time.perf_counter() - start
+
+                if self.write:
+                    transaction.set_rollback(True)
+
+            if index >= warmup:
+                durations.append(duration)
+                query_counts.append(metrics.count)
+                db_times.append(metrics.duration)
+
+        result = {
+            'name': self.name,
+            'kind': self.kind,
+            'target': self.target,
+            'iterations': iterations,
+            'p50_ms': round(percentile(durations, 50) * 1000, 3),
+            'p95_ms': round(percentile(durations, 95) * 1000, 3),
+            'mean_ms': round(sum(durations) / len(durations) * 1000, 3),
+            'max_ms': round(max(durations) * 1000, 3),
+            'queries': percentile(query_counts, 50),
+            'queries_max': max(query_counts),
+            'db_p50_ms': round(percentile(db_times, 50) * 1000, 3),
+        }
+        if self.kind == 'request':
+            result['status'] = outcome.status_code
+            result['bytes'] = len(outcome.content)
+        return result
+
+
+def api_routes():
+    """URL name and view of every router route, in URLconf order"""
+    routes = {}
+
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns)
+            elif getattr(pattern.callback, 'actions', None) and pattern.name not in routes:
+                routes[pattern.name] = pattern
+
+    walk(get_resolver().url_patterns)
+    return routes
+
+
+def _sample_pk(model, filters):
+    """Primary key of the middle row, so runs on the same dataset pick the same row"""
+    pks = model.objects.filter(**filters).order_by('pk').values_list('pk', flat=True)
+    count = pks.count()
+    return pks[count // 2] if count else None
+
+
+def _get(client, path, params):
+    response = client.get(path, params, secure=True)
+    if response.streaming:
+        # Exports stream their rows; read them within the measured run
+        response = HttpResponse(b''.join(response.streaming_content), status=response.status_code)
+    return response
+
+
+def request_benchmarks(client, user):
+    benchmarks = []
+    for name, pattern in api_routes().items():
+        view = pattern.callback
+        lookup = view.cls.lookup_url_kwarg or view.cls.lookup_field
+
+        kwargs = {}
+        if lookup in pattern.pattern.regex.groupindex:
+            filters = SAMPLE_FILTERS[name](user) if name in SAMPLE_FILTERS else {}
+            pk = _sample_pk(view.cls.queryset.model, filters)
+            if pk is None:
+                continue
+            kwargs[lookup] = pk
+        path = reverse(name, kwargs=kwargs)
+
+        for method, action in view.actions.items():
+            if action in SKIPPED_ACTIONS or method not in ('get', 'post'):
+                continue
+
+            params = QUERY_PARAMS[name]() if name in QUERY_PARAMS else {}
+            if method == 'get':
+                run = (lambda path=path, params=params: _get(client, path, params))
+            else:
+                data = REQUEST_DATA.get(name, {})
+                run = (lambda path=path, data=data: client.post(path, data, format='json', secure=True))
+
+            benchmarks.append(Benchmark(
+                name=name if method == 'get' else f'{name}:{method}',
+                kind='request',
+                target=f'{method.upper()} {path}',
+                run=run,
+                write=method != 'get',
+            ))
+
+    for name in ASYNC_ROUTES:
+        path = reverse(name)
+        benchmarks.append(Benchmark(
+            name=name,
+            kind='request',
+            target=f'GET {path}',
+            run=(lambda path=path: client.get(path, secure=True)),
+        ))
+    return benchmarks
+
+
+def task_benchmarks():
+    """
+    The billing tasks, run in-process
+
+    generate_monthly_bills only fans out into shards through a chord, so its
+    work is measured as one shard covering every active contract, billing
+    the next month.
+    """
+    next_month = partitions.add_months(timezone.localdate().replace(day=1), 1)
+    bounds = RentalContract.objects.filter(status='active').aggregate(first=Min('id'), last=Max('id'))
+
+    benchmarks = [
+        Benchmark('check_overdue_bills', 'task', check_overdue_bills.name, check_overdue_bills.run, write=True),
+        Benchmark('send_bill_reminders', 'task', send_bill_reminders.name, send_bill_reminders.run),
+    ]
+    if bounds['first'] is not None:
+        benchmarks.insert(0, Benchmark(
+            'generate_bill_shard',
+            'task',
+            generate_bill_shard.name,
+            lambda: generate_bill_shard.run(next_month.isoformat(), bounds['first'], bounds['last']),
+            write=True,
+        ))
+    return benchmarks
+
+
+def render_benchmarks(client):
+    """
+    Encoding cost of the stdlib and orjson renderers on full list pages
+
+    Each RENDER_ROUTES page is fetched once and its data rendered by both
+    renderers, isolating the serialization step from the request.
+    """
+    benchmarks = []
+    for name, params in RENDER_ROUTES.items():
+        response = client.get(reverse(name), params, secure=True)
+        if response.status_code != 200:
+            continue
+
+        for label, renderer in (('json', JSONRenderer()), ('orjson', ORJSONRenderer())):
+            benchmarks.append(Benchmark(
+                name=f'render:{name}:{label}',
+                kind='render',
+                target=f'{type(renderer).__name__} {name}',
+                run=(lambda renderer=renderer, data=response.data: renderer.render(data)),
+            ))
+    return benchmarks
+
+
+def run_benchmarks(user, iterations=20, warmup=2, select=None, cache=True, log=None):
+    """
+    Run the benchmarks whose name contains one of ``select`` (all by default)
+
+    With ``cache`` False the cache is replaced by a dummy backend, so cached
+    endpoints are measured on their uncached path.
+
+    Returns:
+        The report dict
+    """
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+    # Audit rows are written synchronously, so the benchmarks that read them
+    # see those of the requests before
+    overrides = {
+        'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver'],
+        'AUDIT_LOG_BUFFERED': False,
+    }
+    if not cache:
+        overrides['CACHES'] = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+    with override_settings(**overrides):
+        benchmarks = request_benchmarks(client, user) + render_benchmarks(client) + task_benchmarks()
+        if select:
+            benchmarks = [
+                benchmark for benchmark in benchmarks
+                if any(term in benchmark.name for term in select)
+            ]
+
+        cache_backend = settings.CACHES['default']['BACKEND']
+        results = []
+        for benchmark in benchmarks:
+            result = benchmark.measure(iterations, warmup)
+            results.append(result)
+            if log:
+                log(result)
+
+    commit, dirty = git_revision()
+    return {
+        'git_commit': commit,
+        'git_dirty': dirty,
+        'created_at': datetime.now().astimezone().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connections['default'].vendor,
+            'debug': settings.DEBUG,
+            'cache_backend': cache_backend,
+        },
+        'iterations': iterations,
+        'warmup': warmup,
+        'dataset': {
+            model._meta.label: model.objects.count()
+            for model in DATASET_MODELS
+        },
+        'results': results,
+    }
+
+
+def compare(report, baseline):
+    """Per-benchmark changes from ``baseline`` to ``report``"""
+    previous = {result['name']: result for result in baseline['results']}
+    rows = []
+    for result in report['results']:
+        before = previous.get(result['name'])
+        if before is None:
+            continue
+        rows.append({
+            'name': result['name'],
+            'p50_ms': (before['p50_ms'], result['p50_ms']),
+            'p95_ms': (before['p95_ms'], result['p95_ms']),
+            'queries': (before['queries'], result['queries']),
+            'p50_change': (
+                round((result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100, 1)
+                if before['p50_ms'] else None
+            ),
+        })
+    return rows
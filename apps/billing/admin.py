@@ -88,9 +88,11 @@ class BillAdmin(admin.ModelAdmin):
 
     def mark_as_paid(self, request, queryset):
         """Mark bills as paid"""
+        now = timezone.now()
         count = queryset.update(
             status='paid',
-            paid_on=timezone.now()
+            paid_on=now,
+            updated_at=now
         )
         self.message_user(request, f'{count} bill(s) marked as paid.')
     mark_as_paid.short_description = "Mark as paid"
@@ -100,13 +102,13 @@ class BillAdmin(admin.ModelAdmin):
         count = queryset.filter(
             status='pending',
             due_date__lt=timezone.now().date()
-        ).update(status='overdue')
+        ).update(status='overdue', updated_at=timezone.now())
         self.message_user(request, f'{count} bill(s) marked as overdue.')
     mark_as_overdue.short_description = "Mark as overdue"
 
     def mark_as_pending(self, request, queryset):
         """Mark bills as pending"""
-        count = queryset.update(status='pending', paid_on=None)
+        count = queryset.update(status='pending', paid_on=None, updated_at=timezone.now())
         self.message_user(request, f'{count} bill(s) marked as pending.')
     mark_as_pending.short_description = "Mark as pending"
 
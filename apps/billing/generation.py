@@ -0,0 +1,145 @@
+from datetime import date
+import logging
+
+from django.db import connection, transaction
+
+from .models import Bill
+from apps.contracts.models import RentalContract
+from apps.properties.models import UnitUtility
+
+logger = logging.getLogger(__name__)
+
+# Contracts loaded, computed and written per round trip
+BATCH_SIZE = 2000
+
+
+def generate_bills(today, contracts=None, batch_size=BATCH_SIZE):
+    """
+    Generate rent and utility bills for the month containing ``today``
+
+    Contracts are walked in primary key order, ``batch_size`` at a time. Each
+    batch costs a fixed number of queries regardless of its size: one for the
+    contracts joined with their rental terms, one for the non-included unit
+    utilities, one for the bills that already exist and one conflict-ignoring
+    bulk insert, which reports the rows it actually inserted.
+
+    Args:
+        today: Date the run is performed for
+        contracts: Optional RentalContract queryset restricting the run
+        batch_size: Number of contracts processed per batch
+
+    Returns:
+        dict with ``bills_created`` and ``bills_skipped`` counts
+    """
+    billing_month = today.strftime('%Y-%m')
+
+    if contracts is None:
+        contracts = RentalContract.objects.all()
+
+    active_contracts = contracts.filter(
+        status='active',
+        contract_from__lte=today,
+        contract_to__gte=today
+    ).order_by('id')
+
+    bills_created = 0
+    bills_skipped = 0
+    last_id = 0
+
+    while True:
+        batch = list(
+            active_contracts.filter(id__gt=last_id).values_list(
+                'id',
+                'unit_id',
+                'rent_amount_at_contract',
+                'unit__rental_terms__payment_due_day',
+            )[:batch_size]
+        )
+        if not batch:
+            break
+        last_id = batch[-1][0]
+
+        created, skipped = _generate_batch(today, billing_month, batch)
+        bills_created += created
+        bills_skipped += skipped
+
+    return {'bills_created': bills_created, 'bills_skipped': bills_skipped}
+
+
+def _generate_batch(today, billing_month, batch):
+    """Compute and insert the bills for one batch of contract rows"""
+    unit_ids = {unit_id for _, unit_id, _, _ in batch}
+
+    utilities_by_unit = {}
+    for unit_id, utility_type_id in UnitUtility.objects.filter(
+        unit_id__in=unit_ids,
+        is_included_in_rent=False
+    ).values_list('unit_id', 'utility_type_id'):
+        utilities_by_unit.setdefault(unit_id, []).append(utility_type_id)
+
+    contract_ids = [row[0] for row in batch]
+
+    with transaction.atomic():
+        existing = set(Bill.objects.filter(
+            contract_id__in=contract_ids,
+            billing_month=billing_month
+        ).values_list('contract_id', 'utility_type_id'))
+
+        bills = []
+        skipped = 0
+        for contract_id, unit_id, rent_amount, due_day in batch:
+            if due_day is None:
+                logger.error(f'Error generating bills for contract {contract_id}: unit has no rental terms')
+                continue
+
+            due_date = date(today.year, today.month, min(due_day, 28))
+
+            # Rent bill (utility_type=None) followed by utilities not included in rent
+            for utility_type_id in [None] + utilities_by_unit.get(unit_id, []):
+                if (contract_id, utility_type_id) in existing:
+                    skipped += 1
+                    continue
+
+                bills.append(Bill(
+                    contract_id=contract_id,
+                    utility_type_id=utility_type_id,
+                    billing_month=billing_month,
+                    amount=rent_amount if utility_type_id is None else 0,  # Utilities updated by landlord
+                    due_date=due_date,
+                    status='pending'
+                ))
+
+        if not bills:
+            return 0, skipped
+
+        # Conflicts are rows another run inserted since ``existing`` was read
+        created = _insert_new_bills(bills)
+
+    return created, skipped + len(bills) - created
+
+
+def _insert_new_bills(bills):
+    """
+    Insert ``bills`` with INSERT ... ON CONFLICT DO NOTHING RETURNING id
+
+    bulk_create(ignore_conflicts=True) cannot tell which rows were inserted,
+    and counting the month's bills afterwards would include those of a
+    concurrent run.
+
+    Returns:
+        Number of bills inserted
+    """
+    fields = [field for field in Bill._meta.concrete_fields if not field.primary_key]
+    rows = [
+        [field.get_db_prep_save(field.pre_save(bill, True), connection) for field in fields]
+        for bill in bills
+    ]
+    row_sql = '(' + ', '.join(['%s'] * len(fields)) + ')'
+    sql = 'INSERT INTO {table} ({columns}) VALUES {rows} ON CONFLICT DO NOTHING RETURNING id'.format(
+        table=connection.ops.quote_name(Bill._meta.db_table),
+        columns=', '.join(connection.ops.quote_name(field.column) for field in fields),
+        rows=', '.join([row_sql] * len(rows)),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [value for row in rows for value in row])
+        return len(cursor.fetchall())
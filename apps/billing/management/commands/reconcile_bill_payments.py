@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from apps.billing.models import Bill, expected_amount_paid
+
+
+class Command(BaseCommand):
+    """Detect and repair drift between Bill.amount_paid and its payments and allocations"""
+
+    help = 'Recompute Bill.amount_paid from succeeded payments and allocations and repair drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drifted bills without repairing them'
+        )
+
+    def handle(self, *args, **options):
+        drifted = list(
+            Bill.objects.annotate(
+                expected=expected_amount_paid()
+            ).exclude(
+                amount_paid=F('expected')
+            ).values_list('id', 'amount_paid', 'expected')
+        )
+
+        for bill_id, amount_paid, expected in drifted:
+            self.stdout.write(f'Bill #{bill_id}: amount_paid {amount_paid}, payments total {expected}')
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('No drift found'))
+            return
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(drifted)} bill(s) drifted (dry run, nothing repaired)'))
+            return
+
+        # Recomputed inside the UPDATE so payments saved since the scan are included
+        repaired = Bill.objects.filter(
+            pk__in=[bill_id for bill_id, _, _ in drifted]
+        ).recalculate_amount_paid()
+
+        self.stdout.write(self.style.SUCCESS(f'Repaired {repaired} bill(s)'))
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.9 on 2026-10-17 03:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("billing", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="bill",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("utility_type__isnull", True)),
+                fields=("contract", "billing_month"),
+                name="bills_unique_rent_per_month",
+            ),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.9 on 2026-10-17 03:34
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_amount_paid(apps, schema_editor):
+    Bill = apps.get_model("billing", "Bill")
+    Payment = apps.get_model("payments", "Payment")
+
+    paid = (
+        Payment.objects.filter(bill=OuterRef("pk"), status="succeeded")
+        .values("bill")
+        .annotate(total=Sum("amount"))
+        .values("total")
+    )
+    Bill.objects.update(
+        amount_paid=Coalesce(Subquery(paid), Value(0), output_field=models.DecimalField())
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("billing", "0002_bill_unique_rent_per_month"),
+        ("payments", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bill",
+            name="amount_paid",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=0,
+                editable=False,
+                help_text="Total of succeeded payments, maintained by Payment.save",
+                max_digits=10,
+            ),
+        ),
+        migrations.RunPython(backfill_amount_paid, migrations.RunPython.noop),
+    ]
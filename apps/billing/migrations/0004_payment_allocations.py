@@ -0,0 +1,23 @@
+# Generated by Django 4.2.9 on 2026-10-17 04:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("billing", "0003_bill_amount_paid"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="bill",
+            name="amount_paid",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=0,
+                editable=False,
+                help_text="Total of succeeded payments and allocations, maintained by Payment.save and the allocation engine",
+                max_digits=10,
+            ),
+        ),
+    ]
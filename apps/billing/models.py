@@ -1,4 +1,7 @@
 from django.db import models
+from django.db.models import Case, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.core.validators import MinValueValidator
 from django.contrib.auth import get_user_model
 from apps.contracts.models import RentalContract
@@ -7,6 +10,74 @@ from apps.properties.models import UtilityType
 User = get_user_model()
 
 
+def expected_amount_paid():
+    """
+    Expression of what a bill's amount_paid should be: its succeeded
+    payments plus the allocations of payments without a bill
+    """
+    from apps.payments.models import Payment, PaymentAllocation
+    
+    paid = Payment.objects.filter(
+        bill=OuterRef('pk'),
+        status='succeeded'
+    ).values('bill').annotate(
+        total=Sum('amount')
+    ).values('total')
+    allocated = PaymentAllocation.objects.filter(
+        bill=OuterRef('pk')
+    ).values('bill').annotate(
+        total=Sum('amount')
+    ).values('total')
+    
+    return (
+        Coalesce(Subquery(paid), Value(0), output_field=models.DecimalField())
+        + Coalesce(Subquery(allocated), Value(0), output_field=models.DecimalField())
+    )
+
+
+class BillQuerySet(models.QuerySet):
+    """QuerySet for Bill model"""
+    
+    def recalculate_amount_paid(self):
+        """
+        Recompute amount_paid from payments and allocations in a single UPDATE
+        
+        Returns:
+            Number of bills updated
+        """
+        return self.update(
+            amount_paid=expected_amount_paid(),
+            updated_at=timezone.now()
+        )
+    
+    def sync_payment_status(self):
+        """
+        Set status from amount_paid in a single UPDATE
+        
+        Fully paid bills become 'paid' (keeping an existing paid_on),
+        partly paid ones 'partial'. Bills left unpaid after a refund or a
+        failed payment go back to 'pending', or 'overdue' once past due.
+        
+        Returns:
+            Number of bills updated
+        """
+        now = timezone.now()
+        return self.update(
+            status=Case(
+                When(amount__gt=0, amount_paid__gte=F('amount'), then=Value('paid')),
+                When(amount_paid__gt=0, then=Value('partial')),
+                When(status__in=['paid', 'partial'], due_date__lt=now.date(), then=Value('overdue')),
+                When(status__in=['paid', 'partial'], then=Value('pending')),
+                default=F('status')
+            ),
+            paid_on=Case(
+                When(amount__gt=0, amount_paid__gte=F('amount'), then=Coalesce(F('paid_on'), Value(now))),
+                default=Value(None)
+            ),
+            updated_at=now
+        )
+
+
 class Bill(models.Model):
     """Bills for rent and utilities"""
     
@@ -40,6 +111,13 @@ class Bill(models.Model):
         db_index=True,
         help_text='Format: YYYY-MM'
     )
+    amount_paid = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text='Total of succeeded payments and allocations, maintained by Payment.save and the allocation engine'
+    )
     due_date = models.DateField(db_index=True)
     paid_on = models.DateTimeField(null=True, blank=True)
     status = models.CharField(
@@ -57,6 +135,8 @@ class Bill(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = BillQuerySet.as_manager()
+    
     class Meta:
         db_table = 'bills'
         ordering = ['-billing_month', '-due_date']
@@ -66,6 +146,14 @@ class Bill(models.Model):
             models.Index(fields=['due_date', 'status']),
         ]
         unique_together = [['contract', 'billing_month', 'utility_type']]
+        constraints = [
+            # NULLs never collide in unique_together, so rent bills need their own constraint
+            models.UniqueConstraint(
+                fields=['contract', 'billing_month'],
+                condition=models.Q(utility_type__isnull=True),
+                name='bills_unique_rent_per_month'
+            ),
+        ]
     
     def __str__(self):
         bill_type = self.utility_type.name if self.utility_type else 'Rent'
@@ -77,15 +165,6 @@ class Bill(models.Model):
         from django.utils import timezone
         return self.status == 'pending' and self.due_date < timezone.now().date()
     
-    @property
-    def amount_paid(self):
-        """Calculate total amount paid"""
-        return self.payments.filter(
-            status='succeeded'
-        ).aggregate(
-            total=models.Sum('amount')
-        )['total'] or 0
-    
     @property
     def amount_remaining(self):
         """Calculate remaining amount"""
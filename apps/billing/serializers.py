@@ -1,10 +1,11 @@
 from rest_framework import serializers
+from config.expansion import DynamicFieldsMixin
 from .models import Bill
 from apps.contracts.serializers import RentalContractSerializer
 from apps.properties.serializers import UtilityTypeSerializer
 
 
-class BillSerializer(serializers.ModelSerializer):
+class BillSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Bill model"""
 
     contract_detail = RentalContractSerializer(source='contract', read_only=True)
@@ -18,6 +19,8 @@ class BillSerializer(serializers.ModelSerializer):
         model = Bill
         fields = '__all__'
         read_only_fields = ('id', 'created_at', 'updated_at', 'paid_on')
+        expandable_fields = {'contract': 'contract_detail', 'utility_type': 'utility_type_detail'}
+        select_related = ('utility_type',)
 
     def get_bill_type(self, obj):
         """Get human-readable bill type"""
@@ -1,83 +1,111 @@
-from celery import shared_task
+from celery import chord, shared_task
+from django.conf import settings
+from django.db import InterfaceError, OperationalError
+from django.db.models import Count, Max, Min
 from django.utils import timezone
-from django.db import transaction
-from datetime import datetime, timedelta
+from datetime import date, timedelta
 import logging
+import math
 
+from .generation import generate_bills
 from .models import Bill
 from apps.contracts.models import RentalContract
-from apps.properties.models import UtilityType
+from config.db_router import use_replica
 
 logger = logging.getLogger(__name__)
 
 
-@shared_task(name='apps.billing.tasks.generate_monthly_bills')
-def generate_monthly_bills():
+@shared_task(bind=True, name='apps.billing.tasks.generate_monthly_bills')
+def generate_monthly_bills(self):
     """
     Generate monthly bills for all active rental contracts
     Run on 1st of every month
+
+    The active contracts are split into contract id range shards that run
+    in parallel as a chord; this task is replaced by the chord so its result
+    is the aggregated result of the shards.
     """
     today = timezone.now().date()
     billing_month = today.strftime('%Y-%m')
     
     logger.info(f'Generating bills for {billing_month}')
     
-    active_contracts = RentalContract.objects.filter(
+    shards = _contract_shards(today, settings.BILLING_SHARD_SIZE)
+    
+    if not shards:
+        logger.info(f'No active contracts to bill for {billing_month}')
+        return {'bills_created': 0, 'bills_skipped': 0, 'billing_month': billing_month}
+    
+    logger.info(f'Dispatching {len(shards)} bill generation shards for {billing_month}')
+    
+    header = [
+        generate_bill_shard.s(today.isoformat(), first_id, last_id)
+        for first_id, last_id in shards
+    ]
+    raise self.replace(chord(header, aggregate_bill_shards.s(billing_month)))
+
+
+@shared_task(
+    name='apps.billing.tasks.generate_bill_shard',
+    autoretry_for=(OperationalError, InterfaceError),
+    retry_backoff=True,
+    max_retries=5,
+    acks_late=True
+)
+def generate_bill_shard(billing_date, first_id, last_id):
+    """
+    Generate bills for active contracts with ids in [first_id, last_id]
+
+    Safe to retry: bills that already exist are skipped, so re-running a
+    shard never duplicates bills.
+    """
+    today = date.fromisoformat(billing_date)
+    contracts = RentalContract.objects.filter(id__gte=first_id, id__lte=last_id)
+    
+    result = generate_bills(today, contracts=contracts)
+    
+    logger.info(
+        f"Shard {first_id}-{last_id}: generated {result['bills_created']} bills "
+        f"({result['bills_skipped']} already existed)"
+    )
+    return result
+
+
+@shared_task(name='apps.billing.tasks.aggregate_bill_shards')
+def aggregate_bill_shards(results, billing_month):
+    """Sum the results of the bill generation shards"""
+    bills_created = sum(result['bills_created'] for result in results)
+    bills_skipped = sum(result['bills_skipped'] for result in results)
+    
+    logger.info(
+        f'Generated {bills_created} bills for {billing_month} '
+        f'({bills_skipped} already existed)'
+    )
+    return {
+        'bills_created': bills_created,
+        'bills_skipped': bills_skipped,
+        'billing_month': billing_month,
+    }
+
+
+def _contract_shards(today, shard_size):
+    """Split the ids of contracts to bill into (first_id, last_id) ranges"""
+    bounds = RentalContract.objects.filter(
         status='active',
         contract_from__lte=today,
         contract_to__gte=today
-    )
+    ).aggregate(first_id=Min('id'), last_id=Max('id'), total=Count('id'))
+    
+    if not bounds['total']:
+        return []
     
-    bills_created = 0
-    
-    for contract in active_contracts:
-        try:
-            with transaction.atomic():
-                # Get rental terms
-                rental_terms = contract.unit.rental_terms
-                
-                # Calculate due date
-                due_day = rental_terms.payment_due_day
-                due_date = datetime(today.year, today.month, min(due_day, 28)).date()
-                
-                # Create rent bill
-                rent_bill, created = Bill.objects.get_or_create(
-                    contract=contract,
-                    billing_month=billing_month,
-                    utility_type=None,  # Rent
-                    defaults={
-                        'amount': contract.rent_amount_at_contract,
-                        'due_date': due_date,
-                        'status': 'pending'
-                    }
-                )
-                
-                if created:
-                    bills_created += 1
-                    logger.info(f'Created rent bill for contract {contract.id}')
-                
-                # Create utility bills if not included in rent
-                for unit_utility in contract.unit.utilities.filter(is_included_in_rent=False):
-                    utility_bill, created = Bill.objects.get_or_create(
-                        contract=contract,
-                        billing_month=billing_month,
-                        utility_type=unit_utility.utility_type,
-                        defaults={
-                            'amount': 0,  # To be updated by landlord
-                            'due_date': due_date,
-                            'status': 'pending'
-                        }
-                    )
-                    
-                    if created:
-                        bills_created += 1
-                        logger.info(f'Created {unit_utility.utility_type.name} bill for contract {contract.id}')
-        
-        except Exception as e:
-            logger.error(f'Error generating bills for contract {contract.id}: {str(e)}')
-    
-    logger.info(f'Generated {bills_created} bills for {billing_month}')
-    return {'bills_created': bills_created, 'billing_month': billing_month}
+    shard_count = math.ceil(bounds['total'] / shard_size)
+    width = math.ceil((bounds['last_id'] - bounds['first_id'] + 1) / shard_count)
+    
+    return [
+        (first_id, min(first_id + width - 1, bounds['last_id']))
+        for first_id in range(bounds['first_id'], bounds['last_id'] + 1, width)
+    ]
 
 
 @shared_task(name='apps.billing.tasks.check_overdue_bills')
@@ -95,17 +123,18 @@ def check_overdue_bills():
         due_date__lt=today
     )
     
-    count = overdue_bills.update(status='overdue')
+    count = overdue_bills.update(status='overdue', updated_at=timezone.now())
     
     logger.info(f'Marked {count} bills as overdue')
     return {'overdue_count': count}
 
 
 @shared_task(name='apps.billing.tasks.send_bill_reminders')
+@use_replica
 def send_bill_reminders():
     """
     Send reminders for upcoming bills
-    Run daily
+    Run daily; reads from a replica when configured
     """
     today = timezone.now().date()
     reminder_date = today + timedelta(days=3)  # 3 days before due
@@ -0,0 +1,277 @@
+import csv
+import json
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from itertools import count
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from apps.accounts.models import Household, User
+from apps.contracts.models import RentalContract
+from apps.properties.models import Location, Property, RentalTerms, Unit, UnitUtility, UtilityType
+from config.exports import CSVRenderer
+from .generation import generate_bills
+from .tasks import _contract_shards, aggregate_bill_shards, generate_bill_shard
+from .models import Bill
+
+_phones = count(1)
+
+
+def create_contract(rent=Decimal('20000')):
+    """An active contract on a new unit, with the users and property it needs"""
+    user = User.objects.create_user(phone=f'+88017{next(_phones):08d}', password='x')
+    location = Location.objects.create(district='Dhaka', division='Dhaka')
+    property_obj = Property.objects.create(
+        location=location, house_name='Test House', total_floors=5, created_by=user
+    )
+    unit = Unit.objects.create(
+        property=property_obj, apartment_no='1A', floor_no=1, facing_direction='north', size_sqft=900
+    )
+    household = Household.objects.create(user=user, name='Tenant', contact_phone=user.phone)
+    return RentalContract.objects.create(
+        unit=unit,
+        tenant_household=household,
+        contract_from=date(2024, 1, 1),
+        contract_to=date(2024, 12, 31),
+        rent_amount_at_contract=rent,
+        created_by=user
+    )
+
+
+def create_bill(contract, billing_month='2024-01', amount=None, due_date=None):
+    return Bill.objects.create(
+        contract=contract,
+        amount=contract.rent_amount_at_contract if amount is None else amount,
+        billing_month=billing_month,
+        due_date=due_date or date.fromisoformat(f'{billing_month}-05')
+    )
+
+
+class ReconcileBillPaymentsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from apps.payments.models import Payment
+
+        cls.contract = create_contract()
+        cls.bill = create_bill(cls.contract)
+        cls.other_bill = create_bill(cls.contract, '2024-02')
+        Payment.objects.create(
+            contract=cls.contract,
+            bill=cls.bill,
+            amount=Decimal('12000'),
+            payment_type='rent',
+            status='succeeded',
+            idempotency_key='reconcile-1'
+        )
+
+    def reconcile(self, *args):
+        out = StringIO()
+        call_command('reconcile_bill_payments', *args, stdout=out)
+        return out.getvalue()
+
+    def test_no_drift(self):
+        self.assertIn('No drift found', self.reconcile())
+
+    def test_dry_run_reports_without_repairing(self):
+        Bill.objects.filter(pk=self.bill.pk).update(amount_paid=0)
+
+        output = self.reconcile('--dry-run')
+
+        self.assertIn(f'Bill #{self.bill.pk}: amount_paid 0.00, payments total 12000.00', output)
+        self.assertEqual(Bill.objects.get(pk=self.bill.pk).amount_paid, 0)
+
+    def test_repairs_drifted_bills(self):
+        Bill.objects.filter(pk=self.bill.pk).update(amount_paid=0)
+        Bill.objects.filter(pk=self.other_bill.pk).update(amount_paid=Decimal('500'))
+
+        output = self.reconcile()
+
+        self.assertIn('Repaired 2 bill(s)', output)
+        self.assertEqual(Bill.objects.get(pk=self.bill.pk).amount_paid, Decimal('12000'))
+        self.assertEqual(Bill.objects.get(pk=self.other_bill.pk).amount_paid, 0)
+        self.assertIn('No drift found', self.reconcile())
+
+
+class GenerateBillsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.contracts = [create_contract(Decimal(rent)) for rent in ('20000', '15000', '18000')]
+        for contract in cls.contracts:
+            RentalTerms.objects.create(
+                unit=contract.unit, asking_rent=contract.rent_amount_at_contract,
+                minimum_rent=contract.rent_amount_at_contract, payment_due_day=10
+            )
+        gas = UtilityType.objects.create(name='Gas')
+        water = UtilityType.objects.create(name='Water')
+        unit = cls.contracts[0].unit
+        UnitUtility.objects.create(unit=unit, utility_type=gas, billing_type='meter')
+        UnitUtility.objects.create(unit=unit, utility_type=water, billing_type='fixed', is_included_in_rent=True)
+
+    def test_creates_rent_and_utility_bills(self):
+        result = generate_bills(date(2024, 3, 15), batch_size=2)
+
+        self.assertEqual(result, {'bills_created': 4, 'bills_skipped': 0})
+        bills = Bill.objects.filter(billing_month='2024-03')
+        self.assertEqual(
+            sorted((bill.contract_id, bill.utility_type is not None, bill.amount) for bill in bills),
+            sorted([
+                (self.contracts[0].pk, False, Decimal('20000')),
+                (self.contracts[0].pk, True, Decimal('0')),
+                (self.contracts[1].pk, False, Decimal('15000')),
+                (self.contracts[2].pk, False, Decimal('18000')),
+            ])
+        )
+        self.assertEqual({bill.due_date for bill in bills}, {date(2024, 3, 10)})
+
+    def test_rerun_does_not_duplicate(self):
+        generate_bills(date(2024, 3, 15))
+
+        result = generate_bills(date(2024, 3, 20), batch_size=2)
+
+        self.assertEqual(result, {'bills_created': 0, 'bills_skipped': 4})
+        self.assertEqual(Bill.objects.filter(billing_month='2024-03').count(), 4)
+
+    def test_rerun_fills_in_missing_bills(self):
+        generate_bills(date(2024, 3, 15))
+        Bill.objects.filter(contract=self.contracts[1]).delete()
+
+        result = generate_bills(date(2024, 3, 15))
+
+        self.assertEqual(result, {'bills_created': 1, 'bills_skipped': 3})
+
+    def test_skips_inactive_contracts_and_units_without_terms(self):
+        RentalContract.objects.filter(pk=self.contracts[1].pk).update(status='terminated')
+        RentalTerms.objects.filter(unit=self.contracts[2].unit).delete()
+
+        result = generate_bills(date(2024, 3, 15), contracts=RentalContract.objects.exclude(pk=self.contracts[0].pk))
+
+        self.assertEqual(result, {'bills_created': 0, 'bills_skipped': 0})
+        self.assertFalse(Bill.objects.exists())
+
+
+class BillShardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.contracts = [create_contract() for _ in range(5)]
+        for contract in cls.contracts:
+            RentalTerms.objects.create(
+                unit=contract.unit, asking_rent=contract.rent_amount_at_contract,
+                minimum_rent=contract.rent_amount_at_contract
+            )
+
+    def test_shards_cover_every_active_contract_once(self):
+        ids = [contract.pk for contract in self.contracts]
+
+        shards = _contract_shards(date(2024, 3, 1), shard_size=2)
+
+        self.assertEqual(len(shards), 3)
+        covered = [pk for pk in ids for first_id, last_id in shards if first_id <= pk <= last_id]
+        self.assertEqual(covered, ids)
+
+    def test_no_shards_without_active_contracts(self):
+        self.assertEqual(_contract_shards(date(2025, 3, 1), shard_size=2), [])
+
+    def test_shards_and_retried_shard_add_up(self):
+        shards = _contract_shards(date(2024, 3, 1), shard_size=2)
+
+        results = [generate_bill_shard('2024-03-01', first_id, last_id) for first_id, last_id in shards]
+        retried = generate_bill_shard('2024-03-01', *shards[0])
+
+        self.assertEqual(aggregate_bill_shards(results, '2024-03'), {
+            'bills_created': 5,
+            'bills_skipped': 0,
+            'billing_month': '2024-03',
+        })
+        self.assertEqual(retried, {'bills_created': 0, 'bills_skipped': 2})
+        self.assertEqual(Bill.objects.filter(billing_month='2024-03').count(), 5)
+
+
+class BillExportTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.contract = create_contract()
+        cls.user = cls.contract.created_by
+        cls.january = create_bill(cls.contract, '2024-01')
+        cls.february = create_bill(cls.contract, '2024-02', amount=Decimal('1500.50'))
+        cls.paid = create_bill(cls.contract, '2024-03')
+        Bill.objects.filter(pk=cls.paid.pk).update(status='paid')
+        Bill.objects.filter(pk=cls.february.pk).update(external_ref='=HYPERLINK("http://x")')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def export(self, **params):
+        response = self.client.get(reverse('bill-export'), params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode()
+
+    def csv_rows(self, **params):
+        _, content = self.export(**params)
+        return list(csv.DictReader(StringIO(content)))
+
+    def test_csv_export_honors_filters_and_ordering(self):
+        rows = self.csv_rows(status='pending')
+
+        self.assertEqual([row['id'] for row in rows], [str(self.february.pk), str(self.january.pk)])
+        self.assertEqual(rows[0]['unit'], '1A')
+        self.assertEqual(rows[0]['amount'], '1500.50')
+
+    def test_csv_export_honors_search_and_ordering_parameters(self):
+        rows = self.csv_rows(search='2024-0', ordering='amount')
+
+        self.assertEqual(rows[0]['id'], str(self.february.pk))
+        self.assertEqual(len(rows), 3)
+
+    def test_csv_export_escapes_formulas(self):
+        rows = self.csv_rows(billing_month='2024-02')
+
+        self.assertEqual(rows[0]['external_ref'], '\'=HYPERLINK("http://x")')
+
+    def test_jsonl_export(self):
+        response, content = self.export(format='jsonl', status='pending', ordering='billing_month')
+
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+        self.assertRegex(response['Content-Disposition'], r'attachment; filename="bills-\d{8}T\d{6}Z\.jsonl"')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.january.pk, self.february.pk])
+        self.assertEqual(rows[1]['amount'], '1500.50')
+        self.assertEqual(rows[1]['external_ref'], '=HYPERLINK("http://x")')
+
+    def test_chunked_export_matches(self):
+        _, whole = self.export()
+
+        with self.settings(EXPORT_CHUNK_SIZE=1):
+            _, chunked = self.export()
+
+        self.assertEqual(chunked, whole)
+
+    def test_invalid_filter_is_a_json_error(self):
+        response = self.client.get(reverse('bill-export'), {'contract': 'x'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+
+class CSVRendererCellTests(TestCase):
+    def setUp(self):
+        self.cell = CSVRenderer().cell
+
+    def test_formula_prefixes_are_escaped(self):
+        for value in ('=1+1', '+1', '-1', '@SUM(A1)', '\tx', '\rx'):
+            with self.subTest(value=value):
+                self.assertEqual(self.cell(value), "'" + value)
+
+    def test_plain_values_are_kept(self):
+        self.assertEqual(self.cell('Flat 1-A'), 'Flat 1-A')
+        self.assertEqual(self.cell(Decimal('-5.00')), Decimal('-5.00'))
+        self.assertEqual(self.cell(None), '')
+
+    def test_datetimes_and_json(self):
+        self.assertEqual(
+            self.cell(datetime(2024, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc)), '2024-01-02T03:04:05Z'
+        )
+        self.assertEqual(self.cell({'a': [1, 2]}), '{"a":[1,2]}')
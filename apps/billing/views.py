@@ -6,6 +6,10 @@ from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema, extend_schema_view
 from django.utils import timezone
 
+from config.conditional import ConditionalGetMixin
+from config.expansion import ExpandableViewSetMixin
+from config.exports import ExportMixin
+from config.pagination import PageNumberOrCursorPagination
 from .models import Bill
 from .serializers import BillSerializer
 
@@ -41,23 +45,38 @@ from .serializers import BillSerializer
         summary="Delete bill",
         tags=['Billing']
     ),
+    export=extend_schema(
+        summary="Export bills",
+        tags=['Billing']
+    ),
 )
-class BillViewSet(viewsets.ModelViewSet):
+class BillViewSet(ExportMixin, ConditionalGetMixin, ExpandableViewSetMixin, viewsets.ModelViewSet):
     """ViewSet for Bill model"""
 
-    queryset = Bill.objects.select_related(
-        'contract',
-        'contract__unit',
-        'contract__tenant_household',
-        'utility_type'
-    ).prefetch_related('payments')
+    queryset = Bill.objects.all()
     serializer_class = BillSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = PageNumberOrCursorPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['contract', 'status', 'utility_type', 'billing_month']
-    search_fields = ['contract__unit__unit_no', 'billing_month', 'external_ref']
+    search_fields = ['contract__unit__apartment_no', 'billing_month', 'external_ref']
     ordering_fields = ['created_at', 'billing_month', 'due_date', 'amount']
     ordering = ['-billing_month', '-due_date']
+    export_name = 'bills'
+    export_fields = (
+        ('id', 'id'),
+        ('contract', 'contract_id'),
+        ('unit', 'contract__unit__apartment_no'),
+        ('utility_type', 'utility_type__name'),
+        ('billing_month', 'billing_month'),
+        ('amount', 'amount'),
+        ('amount_paid', 'amount_paid'),
+        ('status', 'status'),
+        ('due_date', 'due_date'),
+        ('paid_on', 'paid_on'),
+        ('external_ref', 'external_ref'),
+        ('created_at', 'created_at'),
+    )
 
     @extend_schema(
         description="Get pending bills",
@@ -67,7 +86,7 @@ class BillViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def pending(self, request):
         """Get all pending bills"""
-        bills = self.queryset.filter(status='pending')
+        bills = self.get_queryset().filter(status='pending')
         serializer = self.get_serializer(bills, many=True)
         return Response(serializer.data)
 
@@ -79,7 +98,7 @@ class BillViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def overdue(self, request):
         """Get all overdue bills"""
-        bills = self.queryset.filter(status='pending', due_date__lt=timezone.now().date())
+        bills = self.get_queryset().filter(status='pending', due_date__lt=timezone.now().date())
         serializer = self.get_serializer(bills, many=True)
         return Response(serializer.data)
 
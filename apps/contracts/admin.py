@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.utils import timezone
+from config.conditional import bump_conditional_version
 from .models import RentalContract, RentalContractParticipant, RentalContractAuthor
 
 
@@ -108,7 +109,8 @@ class RentalContractAdmin(admin.ModelAdmin):
         count = queryset.filter(
             status='active',
             contract_to__lt=timezone.now().date()
-        ).update(status='expired')
+        ).update(status='expired', updated_at=timezone.now())
+        bump_conditional_version(RentalContract)
         self.message_user(request, f'{count} contract(s) marked as expired.')
     mark_as_expired.short_description = "Mark expired contracts"
 
@@ -203,13 +205,13 @@ class RentalContractAuthorAdmin(admin.ModelAdmin):
 
     def activate_authors(self, request, queryset):
         """Activate selected authors"""
-        count = queryset.update(is_active=True)
+        count = queryset.update(is_active=True, updated_at=timezone.now())
         self.message_user(request, f'{count} author(s) activated successfully.')
     activate_authors.short_description = "Activate selected authors"
 
     def deactivate_authors(self, request, queryset):
         """Deactivate selected authors"""
-        count = queryset.update(is_active=False)
+        count = queryset.update(is_active=False, updated_at=timezone.now())
         self.message_user(request, f'{count} author(s) deactivated successfully.')
     deactivate_authors.short_description = "Deactivate selected authors"
 
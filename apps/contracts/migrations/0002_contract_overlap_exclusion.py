@@ -0,0 +1,39 @@
+# Generated by Django 4.2.9 on 2026-10-17 03:46
+
+import apps.contracts.models
+import django.contrib.postgres.constraints
+from django.contrib.postgres.operations import BtreeGistExtension
+import django.contrib.postgres.fields.ranges
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("contracts", "0001_initial"),
+    ]
+
+    operations = [
+        # Needed for the "unit WITH =" part of the GiST exclusion constraint
+        BtreeGistExtension(),
+        migrations.AddConstraint(
+            model_name="rentalcontract",
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(
+                condition=models.Q(("status", "active")),
+                expressions=[
+                    (
+                        apps.contracts.models.DateRange(
+                            "contract_from",
+                            "contract_to",
+                            django.contrib.postgres.fields.ranges.RangeBoundary(
+                                inclusive_upper=True
+                            ),
+                        ),
+                        "&&",
+                    ),
+                    ("unit", "="),
+                ],
+                name="contracts_no_overlapping_active",
+                violation_error_message="Unit already has an active rental contract for these dates",
+            ),
+        ),
+    ]
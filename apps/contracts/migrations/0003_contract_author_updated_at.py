@@ -0,0 +1,22 @@
+# Generated by Django 4.2.9 on 2026-10-17 04:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("contracts", "0002_contract_overlap_exclusion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="rentalcontractauthor",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        # Existing rows start from their creation time
+        migrations.RunSQL(
+            "UPDATE rental_contract_authors SET updated_at = created_at",
+            migrations.RunSQL.noop
+        ),
+    ]
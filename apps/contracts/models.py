@@ -1,5 +1,8 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Func, Q
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateRangeField, RangeBoundary, RangeOperators
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
 from apps.properties.models import Unit
@@ -7,6 +10,16 @@ from apps.accounts.models import Household
 
 User = get_user_model()
 
+OVERLAP_CONSTRAINT = 'contracts_no_overlapping_active'
+OVERLAP_ERROR = 'Unit already has an active rental contract for these dates'
+
+
+class DateRange(Func):
+    """PostgreSQL daterange(lower, upper, bounds)"""
+    
+    function = 'DATERANGE'
+    output_field = DateRangeField()
+
 
 class RentalContract(models.Model):
     """Rental contract between landlord and tenant"""
@@ -68,6 +81,22 @@ class RentalContract(models.Model):
             models.Index(fields=['tenant_household', 'status']),
             models.Index(fields=['contract_from', 'contract_to']),
         ]
+        constraints = [
+            # Active contracts of a unit may not share a day; enforced by a
+            # GiST index so concurrent writes cannot both pass the check
+            ExclusionConstraint(
+                name=OVERLAP_CONSTRAINT,
+                expressions=[
+                    (
+                        DateRange('contract_from', 'contract_to', RangeBoundary(inclusive_upper=True)),
+                        RangeOperators.OVERLAPS
+                    ),
+                    ('unit', RangeOperators.EQUAL),
+                ],
+                condition=Q(status='active'),
+                violation_error_message=OVERLAP_ERROR,
+            ),
+        ]
     
     def __str__(self):
         return f'{self.unit} - {self.tenant_household.name} ({self.status})'
@@ -76,20 +105,16 @@ class RentalContract(models.Model):
         # Validate contract dates
         if self.contract_to <= self.contract_from:
             raise ValidationError('Contract end date must be after start date')
-        
-        # Check for overlapping active contracts
-        if self.status == 'active':
-            overlapping = RentalContract.objects.filter(
-                unit=self.unit,
-                status='active'
-            ).exclude(pk=self.pk)
-            
-            if overlapping.exists():
-                raise ValidationError('Unit already has an active rental contract')
     
     def save(self, *args, **kwargs):
         self.clean()
-        super().save(*args, **kwargs)
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        except IntegrityError as exc:
+            if getattr(getattr(exc.__cause__, 'diag', None), 'constraint_name', None) == OVERLAP_CONSTRAINT:
+                raise ValidationError(OVERLAP_ERROR) from exc
+            raise
 
 
 class RentalContractParticipant(models.Model):
@@ -148,6 +173,7 @@ class RentalContractAuthor(models.Model):
     can_renew = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'rental_contract_authors'
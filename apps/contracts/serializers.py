@@ -1,10 +1,11 @@
 from rest_framework import serializers
+from config.expansion import DynamicFieldsMixin
 from .models import RentalContract, RentalContractParticipant
 from apps.properties.serializers import UnitSerializer
 from apps.accounts.models import Household
 
 
-class RentalContractSerializer(serializers.ModelSerializer):
+class RentalContractSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for RentalContract model"""
 
     unit_detail = UnitSerializer(source='unit', read_only=True)
@@ -16,6 +17,8 @@ class RentalContractSerializer(serializers.ModelSerializer):
         model = RentalContract
         fields = '__all__'
         read_only_fields = ('id', 'created_by', 'created_at', 'updated_at')
+        expandable_fields = {'unit': 'unit_detail'}
+        select_related = ('tenant_household', 'created_by')
 
     def get_duration_days(self, obj):
         """Calculate contract duration in days"""
@@ -26,7 +29,7 @@ class RentalContractSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class RentalContractParticipantSerializer(serializers.ModelSerializer):
+class RentalContractParticipantSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for RentalContractParticipant model"""
 
     contract_detail = RentalContractSerializer(source='contract', read_only=True)
@@ -36,4 +39,5 @@ class RentalContractParticipantSerializer(serializers.ModelSerializer):
         model = RentalContractParticipant
         fields = '__all__'
         read_only_fields = ('id', 'created_at', 'updated_at')
+        expandable_fields = {'contract': 'contract_detail'}
 
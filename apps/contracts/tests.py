@@ -0,0 +1,57 @@
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+
+from apps.billing.tests import create_contract
+from .models import OVERLAP_ERROR, RentalContract
+
+
+class ContractOverlapTests(TestCase):
+    """Active contracts of a unit may not share a day (the contracts_no_overlapping_active constraint)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Active from 2024-01-01 to 2024-12-31
+        cls.contract = create_contract()
+
+    def create(self, contract_from, contract_to, status='active', unit=None):
+        return RentalContract.objects.create(
+            unit=unit or self.contract.unit,
+            tenant_household=self.contract.tenant_household,
+            contract_from=contract_from,
+            contract_to=contract_to,
+            rent_amount_at_contract=self.contract.rent_amount_at_contract,
+            status=status,
+            created_by=self.contract.created_by
+        )
+
+    def test_rejects_overlapping_active_contract(self):
+        with self.assertRaisesMessage(ValidationError, OVERLAP_ERROR):
+            self.create(date(2024, 6, 1), date(2025, 5, 31))
+
+        self.assertEqual(RentalContract.objects.filter(unit=self.contract.unit).count(), 1)
+
+    def test_end_date_is_inclusive(self):
+        with self.assertRaisesMessage(ValidationError, OVERLAP_ERROR):
+            self.create(date(2024, 12, 31), date(2025, 12, 31))
+
+    def test_allows_disjoint_dates(self):
+        self.create(date(2025, 1, 1), date(2025, 12, 31))
+
+    def test_allows_overlap_with_inactive_contracts(self):
+        self.create(date(2024, 6, 1), date(2025, 5, 31), status='terminated')
+
+    def test_allows_overlap_on_another_unit(self):
+        self.create(date(2024, 6, 1), date(2025, 5, 31), unit=create_contract().unit)
+
+    def test_rejects_reactivating_into_an_overlap(self):
+        other = self.create(date(2024, 6, 1), date(2025, 5, 31), status='terminated')
+
+        other.status = 'active'
+        with self.assertRaisesMessage(ValidationError, OVERLAP_ERROR):
+            other.save()
+
+    def test_rejects_end_before_start(self):
+        with self.assertRaisesMessage(ValidationError, 'Contract end date must be after start date'):
+            self.create(date(2025, 5, 31), date(2025, 1, 1))
@@ -7,6 +7,8 @@ from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiPara
 from drf_spectacular.types import OpenApiTypes
 from django.utils import timezone
 
+from config.conditional import ConditionalGetMixin
+from config.expansion import ExpandableViewSetMixin
 from .models import RentalContract, RentalContractParticipant
 from .serializers import RentalContractSerializer, RentalContractParticipantSerializer
 
@@ -43,15 +45,10 @@ from .serializers import RentalContractSerializer, RentalContractParticipantSeri
         tags=['Contracts']
     ),
 )
-class RentalContractViewSet(viewsets.ModelViewSet):
+class RentalContractViewSet(ConditionalGetMixin, ExpandableViewSetMixin, viewsets.ModelViewSet):
     """ViewSet for RentalContract model"""
 
-    queryset = RentalContract.objects.select_related(
-        'unit',
-        'unit__property',
-        'tenant_household',
-        'created_by'
-    ).prefetch_related('participants')
+    queryset = RentalContract.objects.all()
     serializer_class = RentalContractSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -101,7 +98,7 @@ class RentalContractViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def active(self, request):
         """Get all active contracts"""
-        contracts = self.queryset.filter(status='active')
+        contracts = self.get_queryset().filter(status='active')
         serializer = self.get_serializer(contracts, many=True)
         return Response(serializer.data)
 
@@ -115,8 +112,12 @@ class RentalContractViewSet(viewsets.ModelViewSet):
     def participants(self, request, pk=None):
         """Get all participants for a contract"""
         contract = self.get_object()
-        participants = contract.participants.all()
-        serializer = RentalContractParticipantSerializer(participants, many=True)
+        participants = self.expand_queryset(contract.participants.all(), RentalContractParticipantSerializer)
+        serializer = RentalContractParticipantSerializer(
+            participants,
+            many=True,
+            context=self.get_serializer_context()
+        )
         return Response(serializer.data)
 
 
@@ -152,13 +153,11 @@ class RentalContractViewSet(viewsets.ModelViewSet):
         tags=['Contracts']
     ),
 )
-class RentalContractParticipantViewSet(viewsets.ModelViewSet):
+class RentalContractParticipantViewSet(ConditionalGetMixin, ExpandableViewSetMixin, viewsets.ModelViewSet):
     """ViewSet for RentalContractParticipant model"""
 
-    queryset = RentalContractParticipant.objects.select_related(
-        'contract',
-        'household_member'
-    )
+    conditional_field = 'created_at'
+    queryset = RentalContractParticipant.objects.all()
     serializer_class = RentalContractParticipantSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
@@ -1,7 +1,24 @@
 from django.contrib import admin
 from django.utils.html import format_html
+from django.utils import timezone
+from django.db import transaction
 from django.db.models import Sum, Count
-from .models import Payment, PaymentWebhook
+from . import allocation, rollups
+from .models import Payment, PaymentAllocation, PaymentWebhook
+from apps.billing.models import Bill
+
+
+class PaymentAllocationInline(admin.TabularInline):
+    """Bills a payment without a bill was allocated to"""
+
+    model = PaymentAllocation
+    fields = ['bill', 'amount', 'created_at']
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Payment)
@@ -19,8 +36,9 @@ class PaymentAdmin(admin.ModelAdmin):
         'provider_payment_id',
         'idempotency_key'
     ]
-    readonly_fields = ['created_at', 'updated_at', 'idempotency_key']
+    readonly_fields = ['created_at', 'updated_at', 'idempotency_key', 'amount_allocated']
     autocomplete_fields = ['contract', 'bill', 'received_by_user']
+    inlines = [PaymentAllocationInline]
     date_hierarchy = 'created_at'
 
     fieldsets = (
@@ -31,7 +49,7 @@ class PaymentAdmin(admin.ModelAdmin):
             'fields': ('provider', 'provider_payment_id', 'idempotency_key'),
         }),
         ('Payment Status', {
-            'fields': ('status',),
+            'fields': ('status', 'amount_allocated'),
         }),
         ('Manual Payment Info', {
             'fields': ('received_by_user',),
@@ -73,22 +91,39 @@ class PaymentAdmin(admin.ModelAdmin):
 
     def mark_as_succeeded(self, request, queryset):
         """Mark payments as succeeded"""
-        count = queryset.update(status='succeeded')
+        with transaction.atomic():
+            count = queryset.update(status='succeeded', updated_at=timezone.now())
+            self._recalculate_bills(queryset)
+            rollups.rebuild_days_of(queryset)
         self.message_user(request, f'{count} payment(s) marked as succeeded.')
     mark_as_succeeded.short_description = "Mark as succeeded"
 
     def mark_as_failed(self, request, queryset):
         """Mark payments as failed"""
-        count = queryset.update(status='failed')
+        with transaction.atomic():
+            count = queryset.update(status='failed', updated_at=timezone.now())
+            self._recalculate_bills(queryset)
+            allocation.release_allocations(queryset)
+            rollups.rebuild_days_of(queryset)
         self.message_user(request, f'{count} payment(s) marked as failed.')
     mark_as_failed.short_description = "Mark as failed"
 
     def mark_as_refunded(self, request, queryset):
         """Mark payments as refunded"""
-        count = queryset.filter(status='succeeded').update(status='refunded')
+        with transaction.atomic():
+            count = queryset.filter(status='succeeded').update(status='refunded', updated_at=timezone.now())
+            self._recalculate_bills(queryset)
+            allocation.release_allocations(queryset.exclude(status='succeeded'))
+            rollups.rebuild_days_of(queryset)
         self.message_user(request, f'{count} payment(s) marked as refunded.')
     mark_as_refunded.short_description = "Mark as refunded"
 
+    def _recalculate_bills(self, queryset):
+        """Refresh amount_paid on bills of payments changed by a bulk update"""
+        Bill.objects.filter(
+            pk__in=queryset.exclude(bill=None).values('bill_id')
+        ).recalculate_amount_paid()
+
     def get_queryset(self, request):
         """Optimize queryset"""
         qs = super().get_queryset(request)
@@ -149,7 +184,7 @@ class PaymentWebhookAdmin(admin.ModelAdmin):
             'fields': ('provider', 'event_id', 'event_type'),
         }),
         ('Processing Status', {
-            'fields': ('processed', 'processed_at', 'error_message'),
+            'fields': ('processed', 'processed_at', 'error_message', 'attempts', 'next_attempt_at'),
         }),
         ('Payload', {
             'fields': ('payload',),
@@ -186,22 +221,29 @@ class PaymentWebhookAdmin(admin.ModelAdmin):
 
     def mark_as_processed(self, request, queryset):
         """Mark webhooks as processed"""
-        from django.utils import timezone
         count = queryset.update(processed=True, processed_at=timezone.now())
         self.message_user(request, f'{count} webhook(s) marked as processed.')
     mark_as_processed.short_description = "Mark as processed"
 
     def mark_as_unprocessed(self, request, queryset):
         """Mark webhooks as unprocessed"""
-        count = queryset.update(processed=False, processed_at=None, error_message=None)
+        count = queryset.update(
+            processed=False,
+            processed_at=None,
+            error_message=None,
+            attempts=0,
+            next_attempt_at=timezone.now()
+        )
         self.message_user(request, f'{count} webhook(s) marked as unprocessed.')
     mark_as_unprocessed.short_description = "Mark as unprocessed"
 
     def retry_processing(self, request, queryset):
-        """Retry processing failed webhooks"""
+        """Retry processing failed webhooks on the next processing run"""
         count = queryset.filter(processed=False).update(
             error_message='Retrying...',
-            processed_at=None
+            processed_at=None,
+            attempts=0,
+            next_attempt_at=timezone.now()
         )
         self.message_user(request, f'{count} webhook(s) queued for retry.')
     retry_processing.short_description = "Retry processing"
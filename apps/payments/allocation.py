@@ -0,0 +1,174 @@
+"""
+Allocation of payments without a bill to the open bills of their contract
+
+A succeeded payment not tied to a bill (advance rent, a lump sum covering
+several months, a partial payment) is a credit of its contract. The engine
+applies credits oldest first to open bills (pending, overdue or partial,
+rent and utility alike) oldest due first, recording PaymentAllocation
+rows and raising Bill.amount_paid and Payment.amount_allocated. Whatever a
+credit does not cover stays unallocated for bills generated later.
+
+Credits and bills are laid end to end per contract as running totals; an
+allocation is the overlap of a credit's range with a bill's range, so a
+whole chunk of contracts is allocated by one INSERT ... SELECT. The credit
+payments and open bills are locked first, in the same order as
+Payment.save, so a concurrent payment change waits for the chunk or the
+chunk for it.
+"""
+import logging
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.billing.models import Bill
+from .models import Payment, PaymentAllocation
+
+logger = logging.getLogger(__name__)
+
+OPEN_BILL_STATUSES = ('pending', 'overdue', 'partial')
+
+ALLOCATE_SQL = """
+WITH credits AS (
+    SELECT id AS payment_id, contract_id, amount - amount_allocated AS remaining, created_at
+    FROM payments
+    WHERE contract_id = ANY(%(contract_ids)s)
+      AND status = 'succeeded' AND bill_id IS NULL AND amount_allocated < amount
+), credit_ranges AS (
+    SELECT payment_id, contract_id,
+           SUM(remaining) OVER w - remaining AS start, SUM(remaining) OVER w AS stop
+    FROM credits
+    WINDOW w AS (PARTITION BY contract_id ORDER BY created_at, payment_id)
+), debits AS (
+    SELECT id AS bill_id, contract_id, amount - amount_paid AS remaining, due_date
+    FROM bills
+    WHERE contract_id = ANY(%(contract_ids)s)
+      AND status = ANY(%(open_statuses)s) AND amount_paid < amount
+), bill_ranges AS (
+    SELECT bill_id, contract_id,
+           SUM(remaining) OVER w - remaining AS start, SUM(remaining) OVER w AS stop
+    FROM debits
+    WINDOW w AS (PARTITION BY contract_id ORDER BY due_date, bill_id)
+), allocated AS (
+    INSERT INTO payment_allocations (payment_id, bill_id, amount, created_at)
+    SELECT c.payment_id, b.bill_id,
+           LEAST(c.stop, b.stop) - GREATEST(c.start, b.start), %(now)s
+    FROM credit_ranges c
+    JOIN bill_ranges b
+      ON b.contract_id = c.contract_id AND b.start < c.stop AND c.start < b.stop
+    RETURNING payment_id, bill_id, amount
+), paid_bills AS (
+    UPDATE bills
+    SET amount_paid = bills.amount_paid + t.total, updated_at = %(now)s
+    FROM (SELECT bill_id, SUM(amount) AS total FROM allocated GROUP BY bill_id) t
+    WHERE bills.id = t.bill_id
+    RETURNING bills.id
+), allocated_payments AS (
+    UPDATE payments
+    SET amount_allocated = payments.amount_allocated + t.total, updated_at = %(now)s
+    FROM (SELECT payment_id, SUM(amount) AS total FROM allocated GROUP BY payment_id) t
+    WHERE payments.id = t.payment_id
+    RETURNING payments.id
+)
+SELECT
+    (SELECT COUNT(*) FROM allocated),
+    (SELECT COUNT(*) FROM allocated_payments),
+    ARRAY(SELECT id FROM paid_bills)
+"""
+
+
+def unallocated_contract_ids():
+    """Contracts with money left to allocate, via the payments_unallocated index"""
+    return Payment.objects.filter(
+        status='succeeded',
+        bill__isnull=True,
+        amount_allocated__lt=F('amount')
+    ).values_list('contract_id', flat=True).distinct().order_by('contract_id')
+
+
+def allocate_contracts(contract_ids):
+    """
+    Allocate the credits of ``contract_ids`` in one transaction
+
+    Returns:
+        dict with the number of allocations created, payments drawn on and
+        bills paid into
+    """
+    contract_ids = list(contract_ids)
+    if not contract_ids:
+        return {'allocations': 0, 'payments': 0, 'bills': 0}
+
+    with transaction.atomic():
+        list(Payment.objects.select_for_update().filter(
+            contract_id__in=contract_ids,
+            status='succeeded',
+            bill__isnull=True
+        ).values_list('id', flat=True).order_by('id'))
+        list(Bill.objects.select_for_update().filter(
+            contract_id__in=contract_ids,
+            status__in=OPEN_BILL_STATUSES
+        ).values_list('id', flat=True).order_by('id'))
+
+        with connection.cursor() as cursor:
+            cursor.execute(ALLOCATE_SQL, {
+                'contract_ids': contract_ids,
+                'open_statuses': list(OPEN_BILL_STATUSES),
+                'now': timezone.now(),
+            })
+            allocations, payments, bill_ids = cursor.fetchone()
+
+        if bill_ids:
+            Bill.objects.filter(pk__in=bill_ids).sync_payment_status()
+
+    return {'allocations': allocations, 'payments': payments, 'bills': len(bill_ids)}
+
+
+def allocate_all(chunk_size):
+    """
+    Allocate the credits of every contract, ``chunk_size`` contracts per transaction
+
+    Returns:
+        Totals of allocate_contracts over all chunks
+    """
+    totals = {'allocations': 0, 'payments': 0, 'bills': 0}
+    contract_ids = list(unallocated_contract_ids())
+
+    for start in range(0, len(contract_ids), chunk_size):
+        result = allocate_contracts(contract_ids[start:start + chunk_size])
+        for key, value in result.items():
+            totals[key] += value
+
+    logger.info(
+        f"Allocated {totals['payments']} payments to {totals['bills']} bills "
+        f"across {len(contract_ids)} contracts"
+    )
+    return totals
+
+
+def release_allocations(payments):
+    """
+    Undo the allocations of ``payments``, e.g. once refunded or tied to a bill
+
+    The affected bills get amount_paid recomputed and their status synced;
+    payments still eligible are allocated again by the next run.
+
+    Returns:
+        Number of allocations removed
+    """
+    with transaction.atomic():
+        allocations = PaymentAllocation.objects.filter(payment__in=payments)
+        bill_ids = list(allocations.values_list('bill_id', flat=True).distinct())
+        if not bill_ids:
+            return 0
+
+        removed, _ = allocations.delete()
+        Payment.objects.filter(pk__in=payments.values('pk')).update(
+            amount_allocated=0,
+            updated_at=timezone.now()
+        )
+
+        bills = Bill.objects.filter(pk__in=bill_ids)
+        bills.recalculate_amount_paid()
+        bills.sync_payment_status()
+
+    return removed
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.9 on 2026-10-17 04:12
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("payments", "0002_daily_rollups"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="paymentwebhook",
+            name="attempts",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Failed processing attempts"
+            ),
+        ),
+        migrations.AddField(
+            model_name="paymentwebhook",
+            name="next_attempt_at",
+            field=models.DateTimeField(
+                blank=True,
+                default=django.utils.timezone.now,
+                help_text="When processing is (re)tried; empty once processing gave up",
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="paymentwebhook",
+            index=models.Index(
+                condition=models.Q(("processed", False)),
+                fields=["next_attempt_at", "id"],
+                name="payment_webhooks_queue",
+            ),
+        ),
+    ]
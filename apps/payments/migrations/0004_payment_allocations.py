@@ -0,0 +1,83 @@
+# Generated by Django 4.2.9 on 2026-10-17 04:17
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("billing", "0004_payment_allocations"),
+        ("payments", "0003_webhook_processing_queue"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PaymentAllocation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "amount",
+                    models.DecimalField(
+                        decimal_places=2,
+                        max_digits=10,
+                        validators=[django.core.validators.MinValueValidator(0)],
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                "db_table": "payment_allocations",
+                "ordering": ["created_at", "id"],
+            },
+        ),
+        migrations.AddField(
+            model_name="payment",
+            name="amount_allocated",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=0,
+                editable=False,
+                help_text="Part of a payment without a bill applied to bills, maintained by the allocation engine",
+                max_digits=10,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(
+                condition=models.Q(
+                    ("amount_allocated__lt", models.F("amount")),
+                    ("bill__isnull", True),
+                    ("status", "succeeded"),
+                ),
+                fields=["contract", "created_at"],
+                name="payments_unallocated",
+            ),
+        ),
+        migrations.AddField(
+            model_name="paymentallocation",
+            name="bill",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="allocations",
+                to="billing.bill",
+            ),
+        ),
+        migrations.AddField(
+            model_name="paymentallocation",
+            name="payment",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="allocations",
+                to="payments.payment",
+            ),
+        ),
+    ]
@@ -1,4 +1,10 @@
-from django.db import models
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.backends.utils import format_number
+from django.db.models import F, Max
+from django.utils import timezone
 from django.core.validators import MinValueValidator
 from django.contrib.auth import get_user_model
 from apps.contracts.models import RentalContract
@@ -91,6 +97,13 @@ class Payment(models.Model):
         blank=True,
         help_text='Additional payment metadata'
     )
+    amount_allocated = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text='Part of a payment without a bill applied to bills, maintained by the allocation engine'
+    )
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -102,10 +115,170 @@ class Payment(models.Model):
             models.Index(fields=['bill', 'status']),
             models.Index(fields=['provider', 'provider_payment_id']),
             models.Index(fields=['created_at', 'status']),
+            # Payments with money left to allocate, see apps.payments.allocation
+            models.Index(
+                fields=['contract', 'created_at'],
+                condition=models.Q(status='succeeded', bill__isnull=True, amount_allocated__lt=F('amount')),
+                name='payments_unallocated'
+            ),
         ]
     
     def __str__(self):
         return f'{self.contract} - {self.payment_type} - {self.amount} ({self.status})'
+    
+    # Fields that feed Bill.amount_paid and PaymentDailyRollup
+    TRACKED_FIELDS = ('bill_id', 'status', 'amount', 'payment_type', 'provider', 'created_at')
+    
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            previous = self._locked_stored_state()
+            super().save(*args, **kwargs)
+            current = self._current_state()
+            self._apply_to_bill_ledger(self._ledger_entry(previous), self._ledger_entry(current))
+            PaymentDailyRollup.apply_change(previous, current)
+            
+            # Allocations only stand for an unchanged succeeded payment without a bill
+            if self.amount_allocated and (not self._is_credit(current) or current['amount'] != previous['amount']):
+                self._release_allocations()
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            previous = self._locked_stored_state()
+            if self.amount_allocated:
+                self._release_allocations()
+            result = super().delete(*args, **kwargs)
+            self._apply_to_bill_ledger(self._ledger_entry(previous), None)
+            PaymentDailyRollup.apply_change(previous, None)
+        return result
+    
+    def _current_state(self):
+        state = {field: getattr(self, field) for field in self.TRACKED_FIELDS}
+        # The amount as stored: floats and strings converted and rounded like the column,
+        # so Decimal(0.1) never reaches amount_paid or the rollups
+        field = self._meta.get_field('amount')
+        state['amount'] = Decimal(format_number(
+            field.to_python(state['amount']), field.max_digits, field.decimal_places
+        ))
+        return state
+    
+    def _locked_stored_state(self):
+        """
+        Tracked fields of the stored row, locking it until commit
+        
+        Also loads the stored amount_allocated, which only the allocation
+        engine changes, so saving a stale instance cannot overwrite it.
+        """
+        if self.pk is None:
+            return None
+        
+        state = Payment.objects.select_for_update().filter(
+            pk=self.pk
+        ).values(*self.TRACKED_FIELDS, 'amount_allocated').first()
+        if state is not None:
+            self.amount_allocated = state.pop('amount_allocated')
+        return state
+    
+    @staticmethod
+    def _is_credit(state):
+        """Whether a payment state is allocated to bills by the allocation engine"""
+        return bool(state) and state['status'] == 'succeeded' and not state['bill_id']
+    
+    def _release_allocations(self):
+        from .allocation import release_allocations
+        release_allocations(Payment.objects.filter(pk=self.pk))
+        self.amount_allocated = Decimal(0)
+    
+    @staticmethod
+    def _ledger_entry(state):
+        """(bill_id, amount) a payment state contributes to Bill.amount_paid, if any"""
+        if state and state['status'] == 'succeeded' and state['bill_id']:
+            return state['bill_id'], state['amount']
+        return None
+    
+    @staticmethod
+    def _apply_to_bill_ledger(previous, current):
+        """Move amount_paid on the affected bills from previous to current"""
+        if previous == current:
+            return
+        
+        deltas = defaultdict(Decimal)
+        if previous:
+            deltas[previous[0]] -= previous[1]
+        if current:
+            deltas[current[0]] += current[1]
+        
+        for bill_id, delta in deltas.items():
+            if delta:
+                Bill.objects.filter(pk=bill_id).update(
+                    amount_paid=F('amount_paid') + delta,
+                    updated_at=timezone.now()
+                )
+
+
+class PaymentDailyRollup(models.Model):
+    """Daily payment counts and totals per status, provider and payment type"""
+    
+    day = models.DateField(db_index=True)
+    status = models.CharField(max_length=20, choices=Payment.STATUS_CHOICES)
+    provider = models.CharField(max_length=50, choices=Payment.PROVIDER_CHOICES)
+    payment_type = models.CharField(max_length=20, choices=Payment.PAYMENT_TYPE_CHOICES)
+    count = models.IntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        db_table = 'payment_daily_rollups'
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'status', 'provider', 'payment_type'],
+                name='payment_rollups_unique_group'
+            ),
+        ]
+    
+    def __str__(self):
+        return f'{self.day} - {self.status} - {self.provider}/{self.payment_type}: {self.count}'
+    
+    @classmethod
+    def rolled_up_through(cls):
+        """Last day covered by the rollups, or None"""
+        return cls.objects.aggregate(day=Max('day'))['day']
+    
+    @classmethod
+    def apply_change(cls, previous, current):
+        """
+        Move a payment's contribution from its previous to its current state
+        
+        Only days already rolled up are touched; today's payments are read
+        live, so new payments never contend on rollup rows.
+        """
+        if previous == current:
+            return
+        
+        today = timezone.localdate()
+        states = [
+            (state, sign) for state, sign in ((previous, -1), (current, 1))
+            if state and timezone.localdate(state['created_at']) < today
+        ]
+        if not states:
+            return
+        
+        rolled_up_through = cls.rolled_up_through()
+        for state, sign in states:
+            day = timezone.localdate(state['created_at'])
+            if rolled_up_through is None or day > rolled_up_through:
+                continue
+            
+            group = {
+                'day': day,
+                'status': state['status'],
+                'provider': state['provider'],
+                'payment_type': state['payment_type'],
+            }
+            cls.objects.get_or_create(**group)
+            cls.objects.filter(**group).update(
+                count=F('count') + sign,
+                total_amount=F('total_amount') + sign * state['amount']
+            )
 
 
 class PaymentWebhook(models.Model):
@@ -118,6 +291,13 @@ class PaymentWebhook(models.Model):
     processed = models.BooleanField(default=False, db_index=True)
     processed_at = models.DateTimeField(null=True, blank=True)
     error_message = models.TextField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0, help_text='Failed processing attempts')
+    next_attempt_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        default=timezone.now,
+        help_text='When processing is (re)tried; empty once processing gave up'
+    )
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     
     class Meta:
@@ -126,7 +306,41 @@ class PaymentWebhook(models.Model):
         indexes = [
             models.Index(fields=['provider', 'processed']),
             models.Index(fields=['event_type', 'processed']),
+            # The processing queue, see apps.payments.webhooks
+            models.Index(
+                fields=['next_attempt_at', 'id'],
+                condition=models.Q(processed=False),
+                name='payment_webhooks_queue'
+            ),
         ]
     
     def __str__(self):
         return f'{self.provider} - {self.event_type} ({self.event_id})'
+
+
+class PaymentAllocation(models.Model):
+    """Part of a payment without a bill applied to a bill by the allocation engine"""
+    
+    payment = models.ForeignKey(
+        Payment,
+        on_delete=models.CASCADE,
+        related_name='allocations'
+    )
+    bill = models.ForeignKey(
+        Bill,
+        on_delete=models.PROTECT,
+        related_name='allocations'
+    )
+    amount = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        validators=[MinValueValidator(0)]
+    )
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        db_table = 'payment_allocations'
+        ordering = ['created_at', 'id']
+    
+    def __str__(self):
+        return f'Payment #{self.payment_id} -> Bill #{self.bill_id}: {self.amount}'
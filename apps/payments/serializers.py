@@ -1,10 +1,11 @@
 from rest_framework import serializers
+from config.expansion import DynamicFieldsMixin
 from .models import Payment
 from apps.contracts.serializers import RentalContractSerializer
 from apps.billing.serializers import BillSerializer
 
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Payment model"""
 
     contract_detail = RentalContractSerializer(source='contract', read_only=True)
@@ -18,4 +19,6 @@ class PaymentSerializer(serializers.ModelSerializer):
         model = Payment
         fields = '__all__'
         read_only_fields = ('id', 'created_at', 'updated_at')
+        expandable_fields = {'contract': 'contract_detail', 'bill': 'bill_detail'}
+        select_related = ('received_by_user',)
 
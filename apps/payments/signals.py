@@ -0,0 +1,5 @@
+from config.conditional import connect_conditional_versions
+from .views import PaymentViewSet
+
+# Deleted payments change the list ETags, which skip COUNT(*)
+connect_conditional_versions(PaymentViewSet)
@@ -0,0 +1,61 @@
+from celery import shared_task
+from django.conf import settings
+from django.db import DatabaseError
+import logging
+
+from . import allocation, rollups, webhooks
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name='apps.payments.tasks.roll_up_payments')
+def roll_up_payments():
+    """
+    Roll up completed days of payments for the statistics endpoint
+    Run daily
+    """
+    rebuilt = rollups.roll_up(settings.PAYMENT_ROLLUP_WINDOW_DAYS)
+
+    if rebuilt is None:
+        logger.info('Payment rollups are up to date')
+        return {'first_day': None, 'last_day': None}
+
+    first_day, last_day = rebuilt
+    logger.info(f'Rolled up payments for {first_day} to {last_day}')
+    return {'first_day': first_day.isoformat(), 'last_day': last_day.isoformat()}
+
+
+@shared_task(
+    name='apps.payments.tasks.process_payment_webhooks',
+    ignore_result=True,
+    autoretry_for=(DatabaseError,),
+    retry_backoff=True,
+    max_retries=5
+)
+def process_payment_webhooks():
+    """
+    Apply stored webhook events to payments and bills, in batches until none is due
+    Run every minute and right after intake
+    """
+    batch_size = settings.PAYMENT_WEBHOOK_BATCH_SIZE
+    processed = failed = 0
+
+    while True:
+        batch_processed, batch_failed = webhooks.process_batch(batch_size)
+        processed += batch_processed
+        failed += batch_failed
+        if batch_processed + batch_failed < batch_size:
+            break
+
+    if processed or failed:
+        logger.info(f'Processed {processed} payment webhooks, {failed} failed')
+    return {'processed': processed, 'failed': failed}
+
+
+@shared_task(name='apps.payments.tasks.allocate_payments')
+def allocate_payments():
+    """
+    Apply succeeded payments without a bill to the open bills of their contract
+    Run daily
+    """
+    return allocation.allocate_all(settings.PAYMENT_ALLOCATION_CHUNK_SIZE)
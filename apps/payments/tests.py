@@ -0,0 +1,378 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+from itertools import count
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.billing.models import Bill
+from apps.billing.tests import create_bill, create_contract
+from .allocation import allocate_all, allocate_contracts
+from .models import Payment, PaymentAllocation, PaymentWebhook
+from .views import PaymentWebhookView
+from .webhooks import LocalProvider, process_batch, retry_delay
+
+_keys = count(1)
+
+
+def create_payment(contract, amount, bill=None, status='succeeded', **fields):
+    return Payment.objects.create(
+        contract=contract,
+        bill=bill,
+        amount=amount,
+        payment_type='rent',
+        status=status,
+        idempotency_key=f'test-{next(_keys)}',
+        **fields
+    )
+
+
+class PaymentLedgerTests(TestCase):
+    """Bill.amount_paid follows the succeeded payments of the bill"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.contract = create_contract()
+        cls.bill = create_bill(cls.contract)
+        cls.other_bill = create_bill(cls.contract, '2024-02')
+
+    def assertPaid(self, bill, amount):
+        self.assertEqual(Bill.objects.get(pk=bill.pk).amount_paid, Decimal(amount))
+
+    def test_create(self):
+        create_payment(self.contract, Decimal('5000'), self.bill)
+        create_payment(self.contract, Decimal('3000'), self.bill, status='pending')
+
+        self.assertPaid(self.bill, '5000')
+
+    def test_float_amount_is_stored_exactly(self):
+        create_payment(self.contract, 0.1, self.bill)
+        create_payment(self.contract, 0.2, self.bill)
+
+        self.assertPaid(self.bill, '0.30')
+
+    def test_status_change(self):
+        payment = create_payment(self.contract, Decimal('5000'), self.bill, status='pending')
+        self.assertPaid(self.bill, '0')
+
+        payment.status = 'succeeded'
+        payment.save()
+        self.assertPaid(self.bill, '5000')
+
+        payment.status = 'refunded'
+        payment.save()
+        self.assertPaid(self.bill, '0')
+
+    def test_amount_change(self):
+        payment = create_payment(self.contract, Decimal('5000'), self.bill)
+
+        payment.amount = Decimal('4500')
+        payment.save()
+
+        self.assertPaid(self.bill, '4500')
+
+    def test_bill_reassignment(self):
+        payment = create_payment(self.contract, Decimal('5000'), self.bill)
+
+        payment.bill = self.other_bill
+        payment.save()
+
+        self.assertPaid(self.bill, '0')
+        self.assertPaid(self.other_bill, '5000')
+
+    def test_stale_instance_does_not_double_count(self):
+        payment = create_payment(self.contract, Decimal('5000'), self.bill)
+        stale = Payment.objects.get(pk=payment.pk)
+
+        payment.save()
+        stale.save()
+
+        self.assertPaid(self.bill, '5000')
+
+    def test_delete(self):
+        kept = create_payment(self.contract, Decimal('2000'), self.bill)
+        deleted = create_payment(self.contract, Decimal('5000'), self.bill)
+
+        deleted.delete()
+
+        self.assertPaid(self.bill, kept.amount)
+
+
+class PaymentAllocationTests(TestCase):
+    """Credits (succeeded payments without a bill) applied to open bills oldest first"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.contract = create_contract(Decimal('10000'))
+        cls.bills = [create_bill(cls.contract, month) for month in ('2024-01', '2024-02', '2024-03')]
+
+    def bill_state(self):
+        return [
+            (bill.amount_paid, bill.status)
+            for bill in Bill.objects.filter(pk__in=[bill.pk for bill in self.bills]).order_by('due_date')
+        ]
+
+    def allocations(self):
+        return list(
+            PaymentAllocation.objects.order_by('payment_id', 'bill__due_date')
+            .values_list('payment_id', 'bill_id', 'amount')
+        )
+
+    def test_allocates_oldest_bill_first(self):
+        credit = create_payment(self.contract, Decimal('25000'))
+
+        result = allocate_contracts([self.contract.pk])
+
+        self.assertEqual(result, {'allocations': 3, 'payments': 1, 'bills': 3})
+        jan, feb, mar = self.bills
+        self.assertEqual(self.allocations(), [
+            (credit.pk, jan.pk, Decimal('10000')),
+            (credit.pk, feb.pk, Decimal('10000')),
+            (credit.pk, mar.pk, Decimal('5000')),
+        ])
+        self.assertEqual(self.bill_state(), [
+            (Decimal('10000'), 'paid'),
+            (Decimal('10000'), 'paid'),
+            (Decimal('5000'), 'partial'),
+        ])
+        credit.refresh_from_db()
+        self.assertEqual(credit.amount_allocated, Decimal('25000'))
+
+    def test_allocates_oldest_credit_first(self):
+        first = create_payment(self.contract, Decimal('6000'))
+        second = create_payment(self.contract, Decimal('8000'))
+
+        allocate_contracts([self.contract.pk])
+
+        jan, feb, _ = self.bills
+        self.assertEqual(self.allocations(), [
+            (first.pk, jan.pk, Decimal('6000')),
+            (second.pk, jan.pk, Decimal('4000')),
+            (second.pk, feb.pk, Decimal('4000')),
+        ])
+
+    def test_covers_only_what_bills_still_owe(self):
+        create_payment(self.contract, Decimal('3000'), self.bills[0])
+        create_payment(self.contract, Decimal('7000'))
+
+        allocate_contracts([self.contract.pk])
+
+        self.assertEqual(self.bill_state()[0], (Decimal('10000'), 'paid'))
+        self.assertEqual(self.bill_state()[1][0], 0)
+
+    def test_partial_allocation_continues_on_next_run(self):
+        credit = create_payment(self.contract, Decimal('45000'))
+
+        allocate_all(chunk_size=10)
+        credit.refresh_from_db()
+        self.assertEqual(credit.amount_allocated, Decimal('30000'))
+
+        april = create_bill(self.contract, '2024-04')
+        totals = allocate_all(chunk_size=10)
+
+        self.assertEqual(totals, {'allocations': 1, 'payments': 1, 'bills': 1})
+        april.refresh_from_db()
+        credit.refresh_from_db()
+        self.assertEqual((april.amount_paid, april.status), (Decimal('10000'), 'paid'))
+        self.assertEqual(credit.amount_allocated, Decimal('40000'))
+        self.assertEqual(allocate_all(chunk_size=10), {'allocations': 0, 'payments': 0, 'bills': 0})
+
+    def allocate_credit(self, amount='25000'):
+        credit = create_payment(self.contract, Decimal(amount))
+        allocate_contracts([self.contract.pk])
+        credit.refresh_from_db()
+        return credit
+
+    def assertReleased(self, credit):
+        self.assertEqual(self.allocations(), [])
+        self.assertEqual(self.bill_state(), [(Decimal('0'), 'overdue')] * 3)
+        if Payment.objects.filter(pk=credit.pk).exists():
+            self.assertEqual(Payment.objects.get(pk=credit.pk).amount_allocated, 0)
+
+    def test_release_on_refund(self):
+        credit = self.allocate_credit()
+
+        credit.status = 'refunded'
+        credit.save()
+
+        self.assertReleased(credit)
+        self.assertEqual(allocate_contracts([self.contract.pk])['allocations'], 0)
+
+    def test_release_on_amount_change(self):
+        credit = self.allocate_credit()
+
+        credit.amount = Decimal('15000')
+        credit.save()
+
+        self.assertReleased(credit)
+        allocate_contracts([self.contract.pk])
+        self.assertEqual(self.bill_state(), [
+            (Decimal('10000'), 'paid'),
+            (Decimal('5000'), 'partial'),
+            (Decimal('0'), 'overdue'),
+        ])
+
+    def test_release_on_delete(self):
+        credit = self.allocate_credit()
+
+        credit.delete()
+
+        self.assertReleased(credit)
+
+    def test_release_keeps_direct_payments(self):
+        create_payment(self.contract, Decimal('2000'), self.bills[0])
+        credit = self.allocate_credit()
+
+        credit.status = 'refunded'
+        credit.save()
+
+        self.assertEqual(self.bill_state()[0], (Decimal('2000'), 'partial'))
+
+
+WEBHOOK_SETTINGS = {
+    'PAYMENT_WEBHOOK_LOCAL_SECRET': 'test-secret',
+    'PAYMENT_WEBHOOK_MAX_ATTEMPTS': 3,
+    'PAYMENT_WEBHOOK_RETRY_BASE_SECONDS': 30,
+    'PAYMENT_WEBHOOK_RETRY_MAX_SECONDS': 3600,
+}
+
+
+def store_webhook(event_type, provider_payment_id, **fields):
+    event = LocalProvider.event(event_type, provider_payment_id)
+    return PaymentWebhook.objects.create(
+        provider='local',
+        event_id=event['id'],
+        event_type=event_type,
+        payload=event,
+        **fields
+    )
+
+
+@override_settings(**WEBHOOK_SETTINGS)
+class ProcessWebhookBatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.contract = create_contract()
+        cls.bill = create_bill(cls.contract)
+
+    def test_applies_events(self):
+        payment = create_payment(
+            self.contract, self.bill.amount, self.bill, status='pending', provider_payment_id='pi_paid'
+        )
+        webhook = store_webhook('payment_intent.succeeded', 'pi_paid')
+
+        self.assertEqual(process_batch(10), (1, 0))
+
+        payment.refresh_from_db()
+        webhook.refresh_from_db()
+        bill = Bill.objects.get(pk=self.bill.pk)
+        self.assertEqual(payment.status, 'succeeded')
+        self.assertEqual((bill.amount_paid, bill.status), (self.bill.amount, 'paid'))
+        self.assertTrue(webhook.processed)
+        self.assertIsNone(webhook.next_attempt_at)
+
+    def test_late_event_does_not_undo_final_status(self):
+        payment = create_payment(self.contract, Decimal('5000'), self.bill, provider_payment_id='pi_late')
+        webhook = store_webhook('payment_intent.processing', 'pi_late')
+
+        self.assertEqual(process_batch(10), (1, 0))
+
+        payment.refresh_from_db()
+        webhook.refresh_from_db()
+        self.assertEqual(payment.status, 'succeeded')
+        self.assertTrue(webhook.processed)
+
+    def test_skips_events_not_due(self):
+        store_webhook(
+            'payment_intent.succeeded', 'pi_later', next_attempt_at=timezone.now() + timedelta(minutes=5)
+        )
+
+        self.assertEqual(process_batch(10), (0, 0))
+
+    def test_failed_event_backs_off_until_giving_up(self):
+        webhook = store_webhook('payment_intent.succeeded', 'pi_missing')
+
+        for attempt, delay in ((1, 30), (2, 60)):
+            before = timezone.now()
+            self.assertEqual(process_batch(10), (0, 1))
+
+            webhook.refresh_from_db()
+            self.assertEqual(webhook.attempts, attempt)
+            self.assertFalse(webhook.processed)
+            self.assertIn('pi_missing', webhook.error_message)
+            self.assertGreaterEqual(webhook.next_attempt_at, before + timedelta(seconds=delay))
+            self.assertEqual(process_batch(10), (0, 0))
+
+            PaymentWebhook.objects.filter(pk=webhook.pk).update(next_attempt_at=timezone.now())
+
+        self.assertEqual(process_batch(10), (0, 1))
+        webhook.refresh_from_db()
+        self.assertEqual(webhook.attempts, 3)
+        self.assertIsNone(webhook.next_attempt_at)
+        self.assertEqual(process_batch(10), (0, 0))
+
+    def test_retry_delay_is_capped(self):
+        self.assertEqual(retry_delay(1), timedelta(seconds=30))
+        self.assertEqual(retry_delay(4), timedelta(seconds=240))
+        self.assertEqual(retry_delay(20), timedelta(seconds=3600))
+
+
+@override_settings(**WEBHOOK_SETTINGS)
+class PaymentWebhookViewTests(TestCase):
+    def setUp(self):
+        cache.delete(PaymentWebhookView.SCHEDULED_KEY)
+        patcher = mock.patch('apps.payments.views.process_payment_webhooks')
+        self.task = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, event, provider='local', signature=None):
+        body = json.dumps(event).encode()
+        return self.client.post(
+            reverse('payment-webhook', args=[provider]),
+            body,
+            content_type='application/json',
+            HTTP_X_WEBHOOK_SIGNATURE=signature or LocalProvider('test-secret').sign(body)
+        )
+
+    def test_stores_event_and_schedules_processing(self):
+        event = LocalProvider.event('payment_intent.succeeded', 'pi_1')
+
+        response = self.post(event)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'received': True})
+        webhook = PaymentWebhook.objects.get()
+        self.assertEqual((webhook.event_id, webhook.provider, webhook.processed), (event['id'], 'local', False))
+        self.task.delay.assert_called_once_with()
+
+    def test_rejects_bad_signature(self):
+        response = self.post(LocalProvider.event('payment_intent.succeeded', 'pi_1'), signature='sha256=0')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PaymentWebhook.objects.exists())
+        self.task.delay.assert_not_called()
+
+    def test_rejects_malformed_event(self):
+        response = self.post({'type': 'payment_intent.succeeded'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PaymentWebhook.objects.exists())
+
+    def test_unknown_provider(self):
+        response = self.post(LocalProvider.event('payment_intent.succeeded', 'pi_1'), provider='paypal')
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_duplicate_event_is_stored_once(self):
+        event = LocalProvider.event('payment_intent.succeeded', 'pi_1')
+
+        responses = [self.post(event), self.post(event)]
+
+        self.assertEqual([response.status_code for response in responses], [200, 200])
+        self.assertEqual(PaymentWebhook.objects.filter(event_id=event['id']).count(), 1)
+        # Both requests fall in one scheduling window
+        self.task.delay.assert_called_once_with()
@@ -1,11 +1,14 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PaymentViewSet
+from .views import PaymentViewSet, PaymentStatisticsView, PaymentWebhookView
 
 router = DefaultRouter()
 router.register(r'payments', PaymentViewSet, basename='payment')
 
 urlpatterns = [
+    # Ahead of the router, which would match it as a detail route
+    path('payments/statistics/', PaymentStatisticsView.as_view(), name='payment-statistics'),
+    path('webhooks/<str:provider>/', PaymentWebhookView.as_view(), name='payment-webhook'),
     path('', include(router.urls)),
 ]
 
@@ -1,14 +1,28 @@
+import logging
+
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
 from drf_spectacular.utils import extend_schema, extend_schema_view
-from django.db.models import Sum
 
-from .models import Payment
+from config.async_views import AsyncAPIView, CachedStatisticsView
+from config.conditional import ConditionalGetMixin
+from config.expansion import ExpandableViewSetMixin
+from config.exports import ExportMixin
+from config.pagination import PageNumberOrCursorPagination
+from . import rollups
+from .models import Payment, PaymentWebhook
+from .tasks import process_payment_webhooks
+from .webhooks import WebhookSignatureError, get_provider
 from .serializers import PaymentSerializer
 
+logger = logging.getLogger(__name__)
+
 
 @extend_schema_view(
     list=extend_schema(
@@ -41,23 +55,41 @@ from .serializers import PaymentSerializer
         summary="Delete payment",
         tags=['Payments']
     ),
+    export=extend_schema(
+        summary="Export payments",
+        tags=['Payments']
+    ),
 )
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(ExportMixin, ConditionalGetMixin, ExpandableViewSetMixin, viewsets.ModelViewSet):
     """ViewSet for Payment model"""
 
-    queryset = Payment.objects.select_related(
-        'contract',
-        'contract__unit',
-        'bill',
-        'received_by_user'
-    )
+    # Payments are rarely deleted; deletes bump the version instead of every list counting rows
+    conditional_count = False
+    conditional_dependencies = (Payment,)
+    queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = PageNumberOrCursorPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['contract', 'bill', 'payment_type', 'provider', 'status']
-    search_fields = ['provider_payment_id', 'idempotency_key', 'contract__unit__unit_no']
+    search_fields = ['provider_payment_id', 'idempotency_key', 'contract__unit__apartment_no']
     ordering_fields = ['created_at', 'amount', 'status']
     ordering = ['-created_at']
+    export_name = 'payments'
+    export_fields = (
+        ('id', 'id'),
+        ('contract', 'contract_id'),
+        ('unit', 'contract__unit__apartment_no'),
+        ('bill', 'bill_id'),
+        ('amount', 'amount'),
+        ('amount_allocated', 'amount_allocated'),
+        ('payment_type', 'payment_type'),
+        ('provider', 'provider'),
+        ('provider_payment_id', 'provider_payment_id'),
+        ('status', 'status'),
+        ('received_by', 'received_by_user__phone'),
+        ('created_at', 'created_at'),
+    )
 
     @extend_schema(
         description="Get successful payments",
@@ -67,7 +99,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def successful(self, request):
         """Get all successful payments"""
-        payments = self.queryset.filter(status='succeeded')
+        payments = self.get_queryset().filter(status='succeeded')
         serializer = self.get_serializer(payments, many=True)
         return Response(serializer.data)
 
@@ -79,29 +111,62 @@ class PaymentViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def pending(self, request):
         """Get all pending payments"""
-        payments = self.queryset.filter(status='pending')
+        payments = self.get_queryset().filter(status='pending')
         serializer = self.get_serializer(payments, many=True)
         return Response(serializer.data)
 
-    @extend_schema(
-        description="Get payment statistics",
-        summary="Get payment statistics",
-        tags=['Payments']
-    )
-    @action(detail=False, methods=['get'])
-    def statistics(self, request):
-        """Get payment statistics"""
-        total_amount = self.queryset.filter(status='succeeded').aggregate(
-            total=Sum('amount')
-        )['total'] or 0
-
-        stats = {
-            'total_payments': self.queryset.count(),
-            'successful_payments': self.queryset.filter(status='succeeded').count(),
-            'pending_payments': self.queryset.filter(status='pending').count(),
-            'failed_payments': self.queryset.filter(status='failed').count(),
-            'total_amount_collected': float(total_amount),
-        }
-
-        return Response(stats)
 
+class PaymentStatisticsView(CachedStatisticsView):
+    """Payment statistics, served by an async view from the cache"""
+
+    cache_key = 'statistics:payments'
+
+    def compute(self):
+        return rollups.statistics()
+
+
+class PaymentWebhookView(AsyncAPIView):
+    """
+    Intake of payment provider webhooks
+
+    The event is verified and stored, then answered right away; the
+    process_payment_webhooks task applies it. Events already stored are
+    skipped by the INSERT itself, so provider retries are answered as fast
+    as new events.
+    """
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    # Set while a processing run is queued, so a burst of events queues one
+    SCHEDULED_KEY = 'payments:webhooks:scheduled'
+
+    async def post(self, request, provider):
+        webhook_provider = get_provider(provider)
+        if webhook_provider is None:
+            return self.render({'detail': 'Unknown payment provider.'}, status=404)
+
+        try:
+            event = webhook_provider.verify(request.body, request.META)
+        except WebhookSignatureError as exc:
+            logger.warning(f'Rejected {provider} webhook: {exc}')
+            return self.render({'detail': 'Invalid webhook signature or payload.'}, status=400)
+
+        await PaymentWebhook.objects.abulk_create([
+            PaymentWebhook(
+                provider=provider,
+                event_id=event['id'],
+                event_type=event['type'],
+                payload=event,
+            )
+        ], ignore_conflicts=True)
+
+        await self.schedule_processing()
+        return self.render({'received': True})
+
+    async def schedule_processing(self):
+        try:
+            if await cache.aadd(self.SCHEDULED_KEY, 1, settings.PAYMENT_WEBHOOK_SCHEDULE_SECONDS):
+                await sync_to_async(process_payment_webhooks.delay)()
+        except Exception as exc:
+            logger.warning(f'Could not queue webhook processing, left to the periodic run: {exc}')
@@ -0,0 +1,251 @@
+"""
+Payment provider webhooks
+
+Intake (PaymentWebhookView) only verifies the signature and stores the raw
+event with a single INSERT ... ON CONFLICT (event_id) DO NOTHING, so a
+provider retrying an event that is already stored costs one statement and
+never waits on a lock. Events are applied to payments and bills later, in
+batches, by the process_payment_webhooks task. Concurrent workers claim
+different events through SELECT ... FOR UPDATE SKIP LOCKED.
+
+An event that fails, e.g. one arriving before its payment exists, is
+retried with exponential backoff until PAYMENT_WEBHOOK_MAX_ATTEMPTS. After
+that it stays unprocessed with no next attempt, for inspection in the
+admin.
+
+Both providers take Stripe-shaped events: ``{"id", "type", "data":
+{"object": {...}}}``. The local provider signs them with an HMAC of the
+body instead of Stripe's header, so development and tests can post
+events without Stripe (see LocalProvider.sign).
+"""
+import hashlib
+import hmac
+import json
+import logging
+import uuid
+from datetime import timedelta
+
+import stripe
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.billing.models import Bill
+from .models import Payment, PaymentWebhook
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookSignatureError(Exception):
+    """The request is not a correctly signed event of the provider"""
+
+
+class PaymentNotFound(Exception):
+    """No payment has the event's provider payment ID (yet)"""
+
+
+class StripeProvider:
+    """Stripe events, verified with the Stripe-Signature header"""
+
+    name = 'stripe'
+    signature_header = 'HTTP_STRIPE_SIGNATURE'
+
+    # Event type -> Payment.status
+    STATUSES = {
+        'payment_intent.processing': 'processing',
+        'payment_intent.succeeded': 'succeeded',
+        'payment_intent.payment_failed': 'failed',
+        'payment_intent.canceled': 'failed',
+        'charge.refunded': 'refunded',
+    }
+
+    # Statuses only left for the listed ones, so late or replayed events
+    # cannot undo a payment
+    FINAL_STATUSES = {
+        'succeeded': {'refunded'},
+        'refunded': set(),
+    }
+
+    def __init__(self, secret):
+        self.secret = secret
+
+    @classmethod
+    def from_settings(cls):
+        return cls(settings.STRIPE_WEBHOOK_SECRET)
+
+    @property
+    def enabled(self):
+        return bool(self.secret)
+
+    def verify(self, body, meta):
+        """The event of a request body, if its signature is valid"""
+        try:
+            stripe.WebhookSignature.verify_header(
+                body.decode('utf-8'),
+                meta.get(self.signature_header, ''),
+                self.secret,
+                settings.PAYMENT_WEBHOOK_TOLERANCE,
+            )
+        except (stripe.error.SignatureVerificationError, UnicodeDecodeError) as exc:
+            raise WebhookSignatureError(str(exc))
+        return self.parse(body)
+
+    def parse(self, body):
+        try:
+            event = json.loads(body)
+        except ValueError as exc:
+            raise WebhookSignatureError(f'Malformed event: {exc}')
+        if not isinstance(event, dict) or not event.get('id') or not event.get('type'):
+            raise WebhookSignatureError('Malformed event: id and type are required')
+        return event
+
+    def payment_update(self, event):
+        """(provider payment ID, new status) of an event, or None if it does not concern payments"""
+        status = self.STATUSES.get(event['type'])
+        if status is None:
+            return None
+
+        obj = event['data']['object']
+        payment_id = obj.get('payment_intent') if obj.get('object') == 'charge' else obj.get('id')
+        return payment_id, status
+
+
+class LocalProvider(StripeProvider):
+    """
+    Stand-in provider for development and tests
+
+    Takes the same events as Stripe, signed with ``X-Webhook-Signature:
+    sha256=<hex HMAC-SHA256 of the body>`` keyed by
+    PAYMENT_WEBHOOK_LOCAL_SECRET. Disabled while the secret is empty.
+    """
+
+    name = 'local'
+    signature_header = 'HTTP_X_WEBHOOK_SIGNATURE'
+
+    @classmethod
+    def from_settings(cls):
+        return cls(settings.PAYMENT_WEBHOOK_LOCAL_SECRET)
+
+    def sign(self, body):
+        """Signature header value for a request body"""
+        digest = hmac.new(self.secret.encode(), body, hashlib.sha256).hexdigest()
+        return f'sha256={digest}'
+
+    def verify(self, body, meta):
+        if not hmac.compare_digest(meta.get(self.signature_header, ''), self.sign(body)):
+            raise WebhookSignatureError('Signature mismatch')
+        return self.parse(body)
+
+    @staticmethod
+    def event(event_type, provider_payment_id, event_id=None):
+        """A Stripe-shaped event about a payment"""
+        return {
+            'id': event_id or f'evt_local_{uuid.uuid4().hex}',
+            'type': event_type,
+            'data': {'object': {'object': 'payment_intent', 'id': provider_payment_id}},
+        }
+
+
+PROVIDERS = {provider.name: provider for provider in (StripeProvider, LocalProvider)}
+
+
+def get_provider(name):
+    """The configured provider called ``name``, or None if unknown or disabled"""
+    provider_class = PROVIDERS.get(name)
+    if provider_class is None:
+        return None
+    provider = provider_class.from_settings()
+    return provider if provider.enabled else None
+
+
+def retry_delay(attempts):
+    """Backoff before the next attempt after ``attempts`` failures"""
+    return timedelta(seconds=min(
+        settings.PAYMENT_WEBHOOK_RETRY_BASE_SECONDS * 2 ** (attempts - 1),
+        settings.PAYMENT_WEBHOOK_RETRY_MAX_SECONDS,
+    ))
+
+
+def apply_event(webhook, provider):
+    """
+    Apply one stored event to its payment
+
+    Returns:
+        ID of the payment's bill if its status may have changed, else None
+    """
+    update = provider.payment_update(webhook.payload)
+    if update is None:
+        return None
+
+    provider_payment_id, status = update
+    payment = Payment.objects.filter(provider_payment_id=provider_payment_id).first()
+    if payment is None:
+        raise PaymentNotFound(f'No payment with provider payment ID {provider_payment_id!r}')
+
+    allowed = provider.FINAL_STATUSES.get(payment.status)
+    if payment.status == status or (allowed is not None and status not in allowed):
+        return None
+
+    payment.status = status
+    payment.save()
+    return payment.bill_id
+
+
+def process_batch(batch_size):
+    """
+    Claim up to ``batch_size`` due events and apply them
+
+    Each event runs in a savepoint, so a failing one is rescheduled without
+    affecting the others. Bill statuses are synced once for the batch.
+
+    Returns:
+        (events processed, events failed)
+    """
+    now = timezone.now()
+    processed = failed = 0
+
+    with transaction.atomic():
+        webhooks = list(
+            PaymentWebhook.objects.select_for_update(skip_locked=True).filter(
+                processed=False,
+                next_attempt_at__lte=now
+            ).order_by('next_attempt_at', 'id')[:batch_size]
+        )
+
+        bill_ids = set()
+        for webhook in webhooks:
+            provider_class = PROVIDERS.get(webhook.provider)
+            try:
+                if provider_class is None:
+                    raise ValueError(f'Unknown provider {webhook.provider!r}')
+                with transaction.atomic():
+                    bill_id = apply_event(webhook, provider_class.from_settings())
+            except Exception as exc:
+                webhook.attempts += 1
+                webhook.error_message = str(exc)
+                webhook.next_attempt_at = (
+                    now + retry_delay(webhook.attempts)
+                    if webhook.attempts < settings.PAYMENT_WEBHOOK_MAX_ATTEMPTS else None
+                )
+                failed += 1
+                logger.warning(
+                    f'Webhook {webhook.event_id} failed (attempt {webhook.attempts}): {exc}'
+                )
+                continue
+
+            if bill_id is not None:
+                bill_ids.add(bill_id)
+            webhook.processed = True
+            webhook.processed_at = now
+            webhook.error_message = None
+            webhook.next_attempt_at = None
+            processed += 1
+
+        if bill_ids:
+            Bill.objects.filter(pk__in=bill_ids).sync_payment_status()
+        PaymentWebhook.objects.bulk_update(
+            webhooks,
+            ['processed', 'processed_at', 'error_message', 'attempts', 'next_attempt_at']
+        )
+
+    return processed, failed
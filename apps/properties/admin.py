@@ -171,7 +171,7 @@ class UnitAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         """Optimize queryset"""
         qs = super().get_queryset(request)
-        return qs.select_related('property', 'property__location')
+        return qs.with_availability().select_related('property', 'property__location')
 
 
 @admin.register(UnitRoomSummary)
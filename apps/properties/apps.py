@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class PropertiesConfig(AppConfig):
+    name = 'apps.properties'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,124 @@
+"""
+Bulk onboarding of the units of a property
+
+A roster of validated unit rows (UnitRosterSerializer) is written in one
+transaction with a fixed number of statements, whatever its size: units
+are upserted on (property, apartment_no), their room summary, rental terms
+and policy on the unit, and their utilities on (unit, utility_type), each
+with one INSERT ... ON CONFLICT DO UPDATE. Units of the property missing
+from the roster are left alone.
+
+Nested objects are written as given: fields left out of a row's
+``rental_terms`` take the model defaults, also when updating. A row's
+``utilities`` is the unit's complete list, so utilities not in it are
+removed; rows without ``utilities`` keep the current ones.
+
+bulk_create sends no post_save signals, so the unit search index rows
+are refreshed here, in the same transaction, and callers invalidate the
+responses cached for the units themselves.
+"""
+import logging
+
+from django.db import transaction
+
+from . import search_index
+from .models import Unit, UnitRoomSummary, RentalTerms, UnitPolicy, UnitUtility
+
+logger = logging.getLogger(__name__)
+
+UNIT_FIELDS = ('floor_no', 'facing_direction', 'size_sqft')
+
+# Row key -> one-to-one model keyed on the unit
+UNIT_DETAILS = {
+    'room_summary': UnitRoomSummary,
+    'rental_terms': RentalTerms,
+    'policy': UnitPolicy,
+}
+
+
+def _detail_fields(model):
+    return [
+        field.name for field in model._meta.concrete_fields
+        if field.name not in ('unit', 'created_at')
+    ]
+
+
+def upsert_units(property_obj, rows):
+    """
+    Create or update the units of ``rows`` on ``property_obj``
+
+    Returns:
+        (unit id by apartment number, apartment numbers created)
+    """
+    apartment_nos = [row['apartment_no'] for row in rows]
+    units = Unit.objects.filter(property=property_obj, apartment_no__in=apartment_nos)
+
+    with transaction.atomic():
+        existing = set(units.values_list('apartment_no', flat=True))
+
+        Unit.objects.bulk_create(
+            [
+                Unit(property=property_obj, apartment_no=row['apartment_no'], **{
+                    field: row[field] for field in UNIT_FIELDS
+                })
+                for row in rows
+            ],
+            update_conflicts=True,
+            unique_fields=['property', 'apartment_no'],
+            update_fields=[*UNIT_FIELDS, 'updated_at']
+        )
+        unit_ids = dict(units.values_list('apartment_no', 'id'))
+
+        for key, model in UNIT_DETAILS.items():
+            details = [
+                model(unit_id=unit_ids[row['apartment_no']], **row[key])
+                for row in rows if key in row
+            ]
+            if details:
+                model.objects.bulk_create(
+                    details,
+                    update_conflicts=True,
+                    unique_fields=['unit'],
+                    update_fields=_detail_fields(model)
+                )
+
+        _replace_utilities(unit_ids, [row for row in rows if 'utilities' in row])
+        search_index.refresh_units(unit_ids.values())
+
+    created = [apartment_no for apartment_no in apartment_nos if apartment_no not in existing]
+    logger.info(
+        f'Bulk roster of property {property_obj.pk}: {len(created)} units created, '
+        f'{len(rows) - len(created)} updated'
+    )
+    return unit_ids, created
+
+
+def _replace_utilities(unit_ids, rows):
+    if not rows:
+        return
+
+    wanted = {
+        (unit_ids[row['apartment_no']], utility['utility_type'].pk)
+        for row in rows
+        for utility in row['utilities']
+    }
+    current = UnitUtility.objects.filter(unit_id__in=[unit_ids[row['apartment_no']] for row in rows])
+    stale = [
+        pk for pk, unit_id, utility_type_id in current.values_list('pk', 'unit_id', 'utility_type_id')
+        if (unit_id, utility_type_id) not in wanted
+    ]
+    if stale:
+        UnitUtility.objects.filter(pk__in=stale).delete()
+
+    utilities = [
+        UnitUtility(unit_id=unit_ids[row['apartment_no']], **utility)
+        for row in rows
+        for utility in row['utilities']
+    ]
+    if utilities:
+        UnitUtility.objects.bulk_create(
+            utilities,
+            update_conflicts=True,
+            unique_fields=['unit', 'utility_type'],
+            update_fields=['billing_type', 'is_included_in_rent', 'updated_at']
+        )
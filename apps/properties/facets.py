@@ -0,0 +1,167 @@
+"""
+Facet counts of the unit search
+
+Alongside a page of results the unit search returns how many matching
+units fall in each district, bedroom count and asking rent bucket
+(UNIT_SEARCH_RENT_BUCKETS). Facets are disjunctive: each one is counted
+with every filter of the search except its own, so picking a district
+still shows the counts of the other districts. That is one grouped query
+per facet over the search index, whatever the number of buckets.
+
+Counts are cached per distinct set of filters under the version of the
+search index's FACET_CACHE_NAMESPACE, which every index refresh bumps;
+paging and ordering through the results reuses them.
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from rest_framework.pagination import PageNumberPagination
+
+from config.caching import cache_version
+from .search_index import FACET_CACHE_NAMESPACE
+
+logger = logging.getLogger(__name__)
+
+# Facet -> its own filter parameters, left out when counting it
+FACET_PARAMS = {
+    'district': ('district',),
+    'bedrooms': ('bedrooms', 'bedrooms_min'),
+    'rent': ('rent_min', 'rent_max'),
+}
+
+# Parameters that change the page, not the matching units
+PAGE_PARAMS = ('page', 'page_size', 'ordering', 'fields', 'expand', 'format')
+
+
+def rent_buckets():
+    """(min, max) asking rent bounds of the rent facet; the last max is None"""
+    bounds = [0, *settings.UNIT_SEARCH_RENT_BUCKETS, None]
+    return list(zip(bounds, bounds[1:]))
+
+
+def _count_districts(units):
+    return list(
+        units.values('district').annotate(count=Count('pk')).order_by('-count', 'district')
+    )
+
+
+def _count_bedrooms(units):
+    return list(
+        units.filter(bedrooms__isnull=False)
+        .values('bedrooms').annotate(count=Count('pk')).order_by('bedrooms')
+    )
+
+
+def _count_rent(units):
+    buckets = rent_buckets()
+    counts = units.aggregate(**{
+        f'bucket_{index}': Count('pk', filter=Q(
+            asking_rent__gte=low,
+            **({} if high is None else {'asking_rent__lt': high})
+        ))
+        for index, (low, high) in enumerate(buckets)
+    })
+    return [
+        {'min': low, 'max': high, 'count': counts[f'bucket_{index}']}
+        for index, (low, high) in enumerate(buckets)
+    ]
+
+
+COUNTERS = {
+    'district': _count_districts,
+    'bedrooms': _count_bedrooms,
+    'rent': _count_rent,
+}
+
+
+def count_facets(queryset, filterset_class, params):
+    """
+    Facet counts of ``queryset`` filtered by ``params`` (a QueryDict)
+
+    ``queryset`` holds what applies to every facet, e.g. the ``?q=`` search;
+    ``params`` must already be valid for ``filterset_class``.
+    """
+    queryset = queryset.order_by()
+    facets = {}
+    for name, own_params in FACET_PARAMS.items():
+        facet_params = params.copy()
+        for key in own_params:
+            facet_params.pop(key, None)
+        units = filterset_class(facet_params, queryset=queryset).qs
+        facets[name] = COUNTERS[name](units)
+    return facets
+
+
+def _cache_key(params):
+    items = sorted(
+        (key, sorted(values)) for key, values in params.lists() if key not in PAGE_PARAMS
+    )
+    digest = hashlib.sha1(repr(items).encode()).hexdigest()
+    return f'{FACET_CACHE_NAMESPACE}:facets:{cache_version(FACET_CACHE_NAMESPACE)}:{digest}'
+
+
+def cached_facets(queryset, filterset_class, params):
+    """count_facets, served from the cache while the search index is unchanged"""
+    try:
+        key = _cache_key(params)
+        facets = cache.get(key)
+    except Exception as exc:
+        logger.warning(f'Facet cache unavailable: {exc}')
+        return count_facets(queryset, filterset_class, params)
+
+    if facets is None:
+        facets = count_facets(queryset, filterset_class, params)
+        try:
+            cache.set(key, facets, settings.UNIT_SEARCH_FACET_CACHE_TIMEOUT)
+        except Exception as exc:
+            logger.warning(f'Failed to cache facets {key}: {exc}')
+    return facets
+
+
+def _counts_schema(value_name, value_type):
+    return {
+        'type': 'array',
+        'items': {
+            'type': 'object',
+            'properties': {
+                value_name: {'type': value_type},
+                'count': {'type': 'integer'},
+            },
+        },
+    }
+
+
+class FacetedPageNumberPagination(PageNumberPagination):
+    """Page number pagination adding the ``facets`` the view set on the paginator"""
+
+    facets = None
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['facets'] = self.facets
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['facets'] = {
+            'type': 'object',
+            'properties': {
+                'district': _counts_schema('district', 'string'),
+                'bedrooms': _counts_schema('bedrooms', 'integer'),
+                'rent': {
+                    'type': 'array',
+                    'items': {
+                        'type': 'object',
+                        'properties': {
+                            'min': {'type': 'integer'},
+                            'max': {'type': 'integer', 'nullable': True},
+                            'count': {'type': 'integer'},
+                        },
+                    },
+                },
+            },
+        }
+        return response_schema
@@ -0,0 +1,51 @@
+import django_filters
+
+from .models import Unit, UnitPolicy, UnitSearchIndex
+
+
+class UnitFilter(django_filters.FilterSet):
+    """Filters for Unit model"""
+
+    is_available = django_filters.BooleanFilter(
+        method='filter_is_available',
+        label='Filter by availability'
+    )
+
+    class Meta:
+        model = Unit
+        fields = ['property', 'floor_no', 'facing_direction', 'is_available']
+
+    def filter_is_available(self, queryset, name, value):
+        """Requires a queryset annotated by UnitQuerySet.with_availability()"""
+        return queryset.filter(has_active_contract=not value)
+
+
+class CharInFilter(django_filters.BaseInFilter, django_filters.CharFilter):
+    """Comma separated values, any of which matches"""
+
+
+class UnitSearchFilter(django_filters.FilterSet):
+    """Filters of the faceted unit search, over UnitSearchIndex"""
+
+    district = CharInFilter(label='Districts, comma separated')
+    division = CharInFilter(label='Divisions, comma separated')
+    upazila_or_thana = CharInFilter(label='Upazilas or thanas, comma separated')
+    rent_min = django_filters.NumberFilter(field_name='asking_rent', lookup_expr='gte')
+    rent_max = django_filters.NumberFilter(field_name='asking_rent', lookup_expr='lte')
+    bedrooms = django_filters.NumberFilter()
+    bedrooms_min = django_filters.NumberFilter(field_name='bedrooms', lookup_expr='gte')
+    bathrooms_min = django_filters.NumberFilter(field_name='bathrooms', lookup_expr='gte')
+    gender = django_filters.ChoiceFilter(
+        choices=[choice for choice in UnitPolicy.GENDER_CHOICES if choice[0] != 'any'],
+        method='filter_gender',
+        label='Units open to tenants of this gender'
+    )
+
+    class Meta:
+        model = UnitSearchIndex
+        fields = [
+            'property', 'has_lift', 'has_parking', 'bachelor_allowed', 'pets_allowed', 'is_available',
+        ]
+
+    def filter_gender(self, queryset, name, value):
+        return queryset.filter(gender_restricted__in=['any', value])
@@ -0,0 +1,142 @@
+# Generated by Django 4.2.9 on 2026-10-17 04:25
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+# Search vectors use the 'simple' configuration: names are lowercased but
+# not stemmed, which suits Bangla and transliterated place names alike.
+# Weights: house name A, area B, thana C, district and division D (for
+# locations: area A, thana B, district C, division D).
+SEARCH_TRIGGERS_SQL = """
+CREATE FUNCTION locations_search_update() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(NEW.area_name, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(NEW.upazila_or_thana, '')), 'B')
+        || setweight(to_tsvector('simple', NEW.district), 'C')
+        || setweight(to_tsvector('simple', NEW.division), 'D');
+    NEW.search_document := concat_ws(' ', NEW.area_name, NEW.upazila_or_thana, NEW.district, NEW.division);
+    RETURN NEW;
+END
+$$;
+
+CREATE TRIGGER locations_search_update
+    BEFORE INSERT OR UPDATE ON locations
+    FOR EACH ROW EXECUTE FUNCTION locations_search_update();
+
+CREATE FUNCTION properties_search_update() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    SELECT
+        setweight(to_tsvector('simple', NEW.house_name), 'A')
+        || setweight(to_tsvector('simple', coalesce(l.area_name, '')), 'B')
+        || setweight(to_tsvector('simple', coalesce(l.upazila_or_thana, '')), 'C')
+        || setweight(to_tsvector('simple', l.district || ' ' || l.division), 'D'),
+        concat_ws(' ', NEW.house_name, l.area_name, l.upazila_or_thana, l.district, l.division)
+    INTO NEW.search_vector, NEW.search_document
+    FROM locations l
+    WHERE l.id = NEW.location_id;
+    RETURN NEW;
+END
+$$;
+
+CREATE TRIGGER properties_search_update
+    BEFORE INSERT OR UPDATE ON properties
+    FOR EACH ROW EXECUTE FUNCTION properties_search_update();
+
+-- Renaming an area or thana re-indexes the properties located there
+CREATE FUNCTION locations_search_cascade() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE properties SET location_id = location_id WHERE location_id = NEW.id;
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER locations_search_cascade
+    AFTER UPDATE ON locations
+    FOR EACH ROW
+    WHEN (
+        OLD.area_name IS DISTINCT FROM NEW.area_name
+        OR OLD.upazila_or_thana IS DISTINCT FROM NEW.upazila_or_thana
+        OR OLD.district IS DISTINCT FROM NEW.district
+        OR OLD.division IS DISTINCT FROM NEW.division
+    )
+    EXECUTE FUNCTION locations_search_cascade();
+
+UPDATE locations SET id = id;
+UPDATE properties SET id = id;
+"""
+
+DROP_SEARCH_TRIGGERS_SQL = """
+DROP TRIGGER locations_search_cascade ON locations;
+DROP TRIGGER properties_search_update ON properties;
+DROP TRIGGER locations_search_update ON locations;
+DROP FUNCTION locations_search_cascade();
+DROP FUNCTION properties_search_update();
+DROP FUNCTION locations_search_update();
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("properties", "0001_initial"),
+    ]
+
+    operations = [
+        # gin_trgm_ops indexes and the trigram similarity of ?q= searches
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="location",
+            name="search_document",
+            field=models.TextField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="location",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="property",
+            name="search_document",
+            field=models.TextField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="property",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunSQL(SEARCH_TRIGGERS_SQL, DROP_SEARCH_TRIGGERS_SQL),
+        migrations.AddIndex(
+            model_name="location",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="locations_search_vector"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="location",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_document"],
+                name="locations_search_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="property",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="properties_search_vector"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="property",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_document"],
+                name="properties_search_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
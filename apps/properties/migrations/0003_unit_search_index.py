@@ -0,0 +1,112 @@
+# Generated by Django 4.2.9 on 2026-10-17 04:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Initial fill, a frozen copy of apps.properties.search_index.REFRESH_SQL
+BACKFILL_SQL = """
+INSERT INTO unit_search_index (
+    unit_id, property_id, apartment_no, floor_no, size_sqft, house_name, area_name,
+    upazila_or_thana, district, division, asking_rent, bedrooms, bathrooms,
+    has_lift, has_parking, bachelor_allowed, pets_allowed, gender_restricted,
+    is_available, updated_at
+)
+SELECT
+    u.id, p.id, u.apartment_no, u.floor_no, u.size_sqft, p.house_name, l.area_name,
+    l.upazila_or_thana, l.district, l.division, t.asking_rent, r.bedrooms, r.bathrooms,
+    p.has_lift, p.has_parking,
+    COALESCE(pol.bachelor_allowed, TRUE),
+    COALESCE(pol.pets_allowed, FALSE),
+    COALESCE(pol.gender_restricted, 'any'),
+    NOT EXISTS (
+        SELECT 1 FROM rental_contracts c WHERE c.unit_id = u.id AND c.status = 'active'
+    ),
+    now()
+FROM units u
+JOIN properties p ON p.id = u.property_id
+JOIN locations l ON l.id = p.location_id
+LEFT JOIN rental_terms t ON t.unit_id = u.id
+LEFT JOIN unit_room_summary r ON r.unit_id = u.id
+LEFT JOIN unit_policy pol ON pol.unit_id = u.id
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("contracts", "0001_initial"),
+        ("properties", "0002_full_text_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UnitSearchIndex",
+            fields=[
+                (
+                    "unit",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search_index",
+                        serialize=False,
+                        to="properties.unit",
+                    ),
+                ),
+                ("apartment_no", models.CharField(max_length=50)),
+                ("floor_no", models.IntegerField()),
+                ("size_sqft", models.IntegerField()),
+                ("house_name", models.CharField(max_length=255)),
+                ("area_name", models.CharField(max_length=255, null=True)),
+                ("upazila_or_thana", models.CharField(max_length=255, null=True)),
+                ("district", models.CharField(max_length=255)),
+                ("division", models.CharField(max_length=255)),
+                (
+                    "asking_rent",
+                    models.DecimalField(decimal_places=2, max_digits=10, null=True),
+                ),
+                ("bedrooms", models.IntegerField(null=True)),
+                ("bathrooms", models.IntegerField(null=True)),
+                ("has_lift", models.BooleanField()),
+                ("has_parking", models.BooleanField()),
+                ("bachelor_allowed", models.BooleanField()),
+                ("pets_allowed", models.BooleanField()),
+                (
+                    "gender_restricted",
+                    models.CharField(
+                        choices=[
+                            ("any", "Any"),
+                            ("male", "Male Only"),
+                            ("female", "Female Only"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("is_available", models.BooleanField()),
+                ("updated_at", models.DateTimeField()),
+                (
+                    "property",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="properties.property",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Unit Search Index",
+                "db_table": "unit_search_index",
+                "ordering": ["asking_rent", "unit"],
+                "indexes": [
+                    models.Index(
+                        fields=["district", "asking_rent"],
+                        name="unit_search_district_rent",
+                    ),
+                    models.Index(
+                        fields=["bedrooms", "asking_rent"],
+                        name="unit_search_bedrooms_rent",
+                    ),
+                    models.Index(fields=["asking_rent"], name="unit_search_rent"),
+                ],
+            },
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -1,5 +1,8 @@
 import builtins
+from django.contrib.postgres.search import SearchVectorField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
+from django.db.models import Exists, OuterRef
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
 
@@ -18,6 +21,10 @@ class Location(models.Model):
     district = models.CharField(max_length=255)
     division = models.CharField(max_length=255)
     country = models.CharField(max_length=100, default='Bangladesh')
+    # Kept up to date by database triggers (migration 0002_full_text_search),
+    # searched through config.search.RankedSearchFilter
+    search_vector = SearchVectorField(null=True, editable=False)
+    search_document = models.TextField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -27,6 +34,8 @@ class Location(models.Model):
         indexes = [
             models.Index(fields=['district', 'division']),
             models.Index(fields=['upazila_or_thana']),
+            GinIndex(fields=['search_vector'], name='locations_search_vector'),
+            GinIndex(fields=['search_document'], opclasses=['gin_trgm_ops'], name='locations_search_trgm'),
         ]
     
     def __str__(self):
@@ -64,6 +73,10 @@ class Property(models.Model):
         on_delete=models.PROTECT,
         related_name='properties_created'
     )
+    # House name and location, kept up to date by database triggers
+    # (migration 0002_full_text_search)
+    search_vector = SearchVectorField(null=True, editable=False)
+    search_document = models.TextField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -74,12 +87,27 @@ class Property(models.Model):
         indexes = [
             models.Index(fields=['location', 'created_at']),
             models.Index(fields=['created_by']),
+            GinIndex(fields=['search_vector'], name='properties_search_vector'),
+            GinIndex(fields=['search_document'], opclasses=['gin_trgm_ops'], name='properties_search_trgm'),
         ]
     
     def __str__(self):
         return f'{self.house_name} - {self.location.district}'
 
 
+class UnitQuerySet(models.QuerySet):
+    """QuerySet for Unit model"""
+    
+    def with_availability(self):
+        """Annotate has_active_contract so is_available needs no query per unit"""
+        from apps.contracts.models import RentalContract
+        return self.annotate(
+            has_active_contract=Exists(
+                RentalContract.objects.filter(unit=OuterRef('pk'), status='active')
+            )
+        )
+
+
 class Unit(models.Model):
     """Property unit/apartment"""
     
@@ -106,6 +134,8 @@ class Unit(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = UnitQuerySet.as_manager()
+    
     class Meta:
         db_table = 'units'
         ordering = ['property', 'floor_no', 'apartment_no']
@@ -120,6 +150,11 @@ class Unit(models.Model):
     @builtins.property
     def is_available(self):
         """Check if unit is available for rent"""
+        if hasattr(self, 'has_active_contract'):
+            return not self.has_active_contract
+        if hasattr(self, 'active_contracts'):  # Prefetched by UnitSerializer when expanded
+            return not self.active_contracts
+        
         from apps.contracts.models import RentalContract
         return not RentalContract.objects.filter(
             unit=self,
@@ -285,3 +320,57 @@ class UnitUtility(models.Model):
     
     def __str__(self):
         return f'{self.unit} - {self.utility_type.name}'
+
+
+class UnitSearchIndex(models.Model):
+    """
+    One denormalized row per unit for the faceted unit search
+    
+    Copies what tenants filter on from the unit, its property, location,
+    rental terms, room summary and policy, plus whether it has an active
+    contract, so a search needs no joins. Rows are written only by
+    apps.properties.search_index.
+    """
+    
+    unit = models.OneToOneField(
+        Unit,
+        on_delete=models.CASCADE,
+        related_name='search_index',
+        primary_key=True
+    )
+    property = models.ForeignKey(
+        Property,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    apartment_no = models.CharField(max_length=50)
+    floor_no = models.IntegerField()
+    size_sqft = models.IntegerField()
+    house_name = models.CharField(max_length=255)
+    area_name = models.CharField(max_length=255, null=True)
+    upazila_or_thana = models.CharField(max_length=255, null=True)
+    district = models.CharField(max_length=255)
+    division = models.CharField(max_length=255)
+    asking_rent = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    bedrooms = models.IntegerField(null=True)
+    bathrooms = models.IntegerField(null=True)
+    has_lift = models.BooleanField()
+    has_parking = models.BooleanField()
+    bachelor_allowed = models.BooleanField()
+    pets_allowed = models.BooleanField()
+    gender_restricted = models.CharField(max_length=10, choices=UnitPolicy.GENDER_CHOICES)
+    is_available = models.BooleanField()
+    updated_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'unit_search_index'
+        verbose_name_plural = 'Unit Search Index'
+        ordering = ['asking_rent', 'unit']
+        indexes = [
+            models.Index(fields=['district', 'asking_rent'], name='unit_search_district_rent'),
+            models.Index(fields=['bedrooms', 'asking_rent'], name='unit_search_bedrooms_rent'),
+            models.Index(fields=['asking_rent'], name='unit_search_rent'),
+        ]
+    
+    def __str__(self):
+        return f'{self.house_name} - Apt {self.apartment_no}'
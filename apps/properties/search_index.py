@@ -0,0 +1,90 @@
+"""
+Maintenance of the unit search index (UnitSearchIndex)
+
+Rows are rebuilt from the unit, its property, location, rental terms,
+room summary, policy and active contracts with one INSERT ... SELECT ...
+ON CONFLICT DO UPDATE, for a list of units or for all of them. Units
+without a policy get the policy defaults; units without rental terms or
+a room summary get NULL rent and room counts, and match no filter on
+them.
+
+Saves and deletes of the source models refresh the affected rows once
+the write commits (see signals); bulk writes refresh explicitly. Writes
+that bypass both, such as QuerySet.update() of contract statuses, are
+repaired by the periodic rebuild_unit_search_index task.
+
+Every refresh bumps the FACET_CACHE_NAMESPACE version, so cached facet
+counts are never older than the index.
+"""
+import logging
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from config.caching import bump_cache_version
+
+logger = logging.getLogger(__name__)
+
+FACET_CACHE_NAMESPACE = 'unit-search'
+
+INDEXED_COLUMNS = (
+    'property_id', 'apartment_no', 'floor_no', 'size_sqft', 'house_name', 'area_name',
+    'upazila_or_thana', 'district', 'division', 'asking_rent', 'bedrooms', 'bathrooms',
+    'has_lift', 'has_parking', 'bachelor_allowed', 'pets_allowed', 'gender_restricted',
+    'is_available', 'updated_at',
+)
+
+REFRESH_SQL = """
+INSERT INTO unit_search_index (unit_id, {columns})
+SELECT
+    u.id, p.id, u.apartment_no, u.floor_no, u.size_sqft, p.house_name, l.area_name,
+    l.upazila_or_thana, l.district, l.division, t.asking_rent, r.bedrooms, r.bathrooms,
+    p.has_lift, p.has_parking,
+    COALESCE(pol.bachelor_allowed, TRUE),
+    COALESCE(pol.pets_allowed, FALSE),
+    COALESCE(pol.gender_restricted, 'any'),
+    NOT EXISTS (
+        SELECT 1 FROM rental_contracts c WHERE c.unit_id = u.id AND c.status = 'active'
+    ),
+    %(now)s
+FROM units u
+JOIN properties p ON p.id = u.property_id
+JOIN locations l ON l.id = p.location_id
+LEFT JOIN rental_terms t ON t.unit_id = u.id
+LEFT JOIN unit_room_summary r ON r.unit_id = u.id
+LEFT JOIN unit_policy pol ON pol.unit_id = u.id
+WHERE {condition}
+ON CONFLICT (unit_id) DO UPDATE SET {updates}
+""".format(
+    columns=', '.join(INDEXED_COLUMNS),
+    condition='{condition}',
+    updates=', '.join(f'{column} = EXCLUDED.{column}' for column in INDEXED_COLUMNS),
+)
+
+
+def refresh_units(unit_ids=None):
+    """
+    Rebuild the index rows of ``unit_ids`` (ids or a values_list queryset), or of every unit
+
+    Returns:
+        Number of rows written
+    """
+    if unit_ids is None:
+        condition, params = 'TRUE', {}
+    else:
+        unit_ids = list(unit_ids)
+        if not unit_ids:
+            return 0
+        condition, params = 'u.id = ANY(%(unit_ids)s)', {'unit_ids': unit_ids}
+
+    with connection.cursor() as cursor:
+        cursor.execute(REFRESH_SQL.format(condition=condition), {**params, 'now': timezone.now()})
+        rows = cursor.rowcount
+
+    transaction.on_commit(lambda: bump_cache_version(FACET_CACHE_NAMESPACE))
+    return rows
+
+
+def schedule_refresh(unit_ids):
+    """Refresh ``unit_ids`` once the current transaction commits (right away outside one)"""
+    transaction.on_commit(lambda: refresh_units(unit_ids))
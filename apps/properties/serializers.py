@@ -1,34 +1,44 @@
+from django.conf import settings
+from django.db.models import Prefetch
 from rest_framework import serializers
-from .models import Location, Property, Unit, UtilityType
+from apps.contracts.models import RentalContract
+from config.expansion import DynamicFieldsMixin
+from .models import (
+    Location, Property, Unit, UnitRoomSummary, RentalTerms, UnitPolicy, UtilityType, UnitUtility,
+    UnitSearchIndex
+)
 
 
-class LocationSerializer(serializers.ModelSerializer):
+class LocationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Location model"""
 
     class Meta:
         model = Location
-        fields = '__all__'
+        exclude = ('search_vector', 'search_document')
         read_only_fields = ('id', 'created_at', 'updated_at')
 
 
-class PropertySerializer(serializers.ModelSerializer):
+class PropertySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Property model"""
 
     location_detail = LocationSerializer(source='location', read_only=True)
     created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
-    total_units = serializers.IntegerField(source='units.count', read_only=True)
+    # Annotated by PropertyViewSet; left out where the property is nested or just written
+    total_units = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Property
-        fields = '__all__'
+        exclude = ('search_vector', 'search_document')
         read_only_fields = ('id', 'created_by', 'created_at', 'updated_at')
+        expandable_fields = {'location': 'location_detail'}
+        select_related = ('created_by',)
 
     def create(self, validated_data):
         validated_data['created_by'] = self.context['request'].user
         return super().create(validated_data)
 
 
-class UnitSerializer(serializers.ModelSerializer):
+class UnitSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Unit model"""
 
     property_detail = PropertySerializer(source='property', read_only=True)
@@ -38,9 +48,18 @@ class UnitSerializer(serializers.ModelSerializer):
         model = Unit
         fields = '__all__'
         read_only_fields = ('id', 'created_at', 'updated_at')
-
-
-class UtilityTypeSerializer(serializers.ModelSerializer):
+        expandable_fields = {'property': 'property_detail'}
+        # UnitViewSet annotates has_active_contract instead
+        nested_prefetch_related = (
+            Prefetch(
+                'rental_contracts',
+                queryset=RentalContract.objects.filter(status='active').only('id', 'unit_id'),
+                to_attr='active_contracts'
+            ),
+        )
+
+
+class UtilityTypeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for UtilityType model"""
 
     class Meta:
@@ -48,3 +67,120 @@ class UtilityTypeSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('id', 'created_at', 'updated_at')
 
+
+class UnitRoomSummaryRowSerializer(serializers.ModelSerializer):
+    """Room summary of a unit in a bulk roster"""
+
+    class Meta:
+        model = UnitRoomSummary
+        exclude = ('unit', 'created_at', 'updated_at')
+
+
+class RentalTermsRowSerializer(serializers.ModelSerializer):
+    """Rental terms of a unit in a bulk roster"""
+
+    class Meta:
+        model = RentalTerms
+        exclude = ('unit', 'created_at', 'updated_at')
+
+
+class UnitPolicyRowSerializer(serializers.ModelSerializer):
+    """Policy of a unit in a bulk roster"""
+
+    class Meta:
+        model = UnitPolicy
+        exclude = ('unit', 'created_at', 'updated_at')
+
+
+class UnitUtilityRowSerializer(serializers.ModelSerializer):
+    """
+    Utility of a unit in a bulk roster
+
+    ``utility_type`` is checked against the ``utility_types`` dict of the
+    context (see UnitRosterSerializer), not with a query per row.
+    """
+
+    utility_type = serializers.IntegerField()
+
+    class Meta:
+        model = UnitUtility
+        fields = ('utility_type', 'billing_type', 'is_included_in_rent')
+
+    def validate_utility_type(self, value):
+        utility_type = self.context['utility_types'].get(value)
+        if utility_type is None:
+            raise serializers.ValidationError(f'Invalid pk "{value}" - object does not exist.')
+        return utility_type
+
+
+class UnitRosterRowSerializer(serializers.ModelSerializer):
+    """One unit of a bulk roster with its nested terms, policy, rooms and utilities"""
+
+    room_summary = UnitRoomSummaryRowSerializer(required=False)
+    rental_terms = RentalTermsRowSerializer(required=False)
+    policy = UnitPolicyRowSerializer(required=False)
+    utilities = UnitUtilityRowSerializer(many=True, required=False)
+
+    class Meta:
+        model = Unit
+        fields = (
+            'apartment_no', 'floor_no', 'facing_direction', 'size_sqft',
+            'room_summary', 'rental_terms', 'policy', 'utilities'
+        )
+
+    def validate_utilities(self, utilities):
+        utility_type_ids = [utility['utility_type'].pk for utility in utilities]
+        if len(set(utility_type_ids)) != len(utility_type_ids):
+            raise serializers.ValidationError('Each utility type can only be listed once per unit.')
+        return utilities
+
+
+class UnitRosterSerializer(serializers.Serializer):
+    """
+    Units of a property to create or update in one request
+
+    Validation runs over all rows without queries; errors are reported per
+    row, in the order of ``units``. The context needs ``utility_types``,
+    all utility types by id.
+    """
+
+    units = UnitRosterRowSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=settings.PROPERTY_BULK_UNITS_MAX
+    )
+
+    def validate_units(self, units):
+        seen = set()
+        errors = []
+        for unit in units:
+            apartment_no = unit['apartment_no']
+            errors.append(
+                {'apartment_no': ['Duplicate apartment number in this request.']}
+                if apartment_no in seen else {}
+            )
+            seen.add(apartment_no)
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return units
+
+
+class UnitRosterResultSerializer(serializers.Serializer):
+    """Outcome of a bulk roster request"""
+
+    created = serializers.IntegerField()
+    updated = serializers.IntegerField()
+    units = serializers.DictField(
+        child=serializers.IntegerField(),
+        help_text='Unit id by apartment number'
+    )
+
+
+class UnitSearchSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Serializer for UnitSearchIndex rows returned by the unit search"""
+
+    class Meta:
+        model = UnitSearchIndex
+        fields = '__all__'
+
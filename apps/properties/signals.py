@@ -0,0 +1,49 @@
+from django.db.models.signals import post_delete, post_save
+
+from apps.contracts.models import RentalContract
+from config.caching import connect_cache_invalidation
+from config.conditional import connect_conditional_versions
+from . import search_index
+from .models import Location, Property, RentalTerms, Unit, UnitPolicy, UnitRoomSummary
+from .views import LocationViewSet, PropertyViewSet, UnitViewSet, UtilityTypeViewSet
+
+# Cached list/retrieve responses are dropped when their dependencies change
+for viewset in (LocationViewSet, PropertyViewSet, UtilityTypeViewSet):
+    connect_cache_invalidation(viewset)
+
+# ETags change with the models that only show up through counts and annotations
+for viewset in (PropertyViewSet, UnitViewSet):
+    connect_conditional_versions(viewset)
+
+
+# Unit search index rows follow their sources; deleted units drop their row by cascade
+def _refresh_unit(sender, instance, **kwargs):
+    search_index.schedule_refresh([instance.pk])
+
+
+def _refresh_unit_of(sender, instance, **kwargs):
+    search_index.schedule_refresh([instance.unit_id])
+
+
+def _refresh_property_units(sender, instance, **kwargs):
+    search_index.schedule_refresh(
+        Unit.objects.filter(property_id=instance.pk).values_list('pk', flat=True)
+    )
+
+
+def _refresh_location_units(sender, instance, **kwargs):
+    search_index.schedule_refresh(
+        Unit.objects.filter(property__location_id=instance.pk).values_list('pk', flat=True)
+    )
+
+
+post_save.connect(_refresh_unit, sender=Unit, dispatch_uid='unit-search-unit')
+post_save.connect(_refresh_property_units, sender=Property, dispatch_uid='unit-search-property')
+post_save.connect(_refresh_location_units, sender=Location, dispatch_uid='unit-search-location')
+for model in (RentalTerms, UnitRoomSummary, UnitPolicy, RentalContract):
+    for signal in (post_save, post_delete):
+        signal.connect(
+            _refresh_unit_of,
+            sender=model,
+            dispatch_uid=f'unit-search-{model._meta.label}-{signal is post_save}'
+        )
@@ -0,0 +1,17 @@
+from celery import shared_task
+import logging
+
+from . import search_index
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name='apps.properties.tasks.rebuild_unit_search_index')
+def rebuild_unit_search_index():
+    """
+    Rebuild every row of the unit search index, repairing writes that bypass its signals
+    Run hourly
+    """
+    rows = search_index.refresh_units()
+    logger.info(f'Rebuilt {rows} unit search index rows')
+    return {'rows': rows}
@@ -0,0 +1,339 @@
+from datetime import date, timedelta
+from itertools import count
+
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.accounts.models import Household, User
+from apps.contracts.models import RentalContract
+from . import search_index
+from .models import (
+    Location, Property, RentalTerms, Unit, UnitRoomSummary, UnitSearchIndex, UnitUtility, UtilityType
+)
+
+_phones = count(1)
+
+
+def create_user():
+    return User.objects.create_user(phone=f'+88018{next(_phones):08d}', password='x')
+
+
+def create_property(user, house_name='Test House', district='Dhaka', area_name=None):
+    location = Location.objects.create(district=district, division='Dhaka', area_name=area_name)
+    return Property.objects.create(location=location, house_name=house_name, total_floors=5, created_by=user)
+
+
+def create_unit(property_obj, apartment_no='1A', **fields):
+    fields = {'floor_no': 1, 'facing_direction': 'north', 'size_sqft': 900, **fields}
+    return Unit.objects.create(property=property_obj, apartment_no=apartment_no, **fields)
+
+
+class ConditionalGetTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.property = create_property(cls.user)
+        cls.unit = create_unit(cls.property)
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def get(self, url, **headers):
+        return self.client.get(url, headers=headers)
+
+    def test_unchanged_list_is_not_modified(self):
+        url = reverse('unit-list')
+        etag = self.get(url)['ETag']
+
+        response = self.get(url, if_none_match=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_changed_row_changes_list_etag(self):
+        url = reverse('unit-list')
+        etag = self.get(url)['ETag']
+
+        self.unit.floor_no = 2
+        self.unit.save()
+        response = self.get(url, if_none_match=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_added_row_changes_list_etag(self):
+        url = reverse('unit-list')
+        etag = self.get(url)['ETag']
+
+        # Count changes even though MAX(updated_at) may not
+        Unit.objects.bulk_create([Unit(
+            property=self.property, apartment_no='2A', floor_no=2, facing_direction='south',
+            size_sqft=900, updated_at=self.unit.updated_at
+        )])
+
+        self.assertEqual(self.get(url, if_none_match=etag).status_code, 200)
+
+    def test_etag_depends_on_query_string(self):
+        etag = self.get(reverse('unit-list'))['ETag']
+
+        response = self.get(reverse('unit-list') + '?floor_no=1', if_none_match=etag)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_dependency_change_changes_etag(self):
+        url = reverse('unit-list')
+        etag = self.get(url)['ETag']
+
+        household = Household.objects.create(user=self.user, name='Tenant', contact_phone=self.user.phone)
+        with self.captureOnCommitCallbacks(execute=True):
+            RentalContract.objects.create(
+                unit=self.unit,
+                tenant_household=household,
+                contract_from=date(2024, 1, 1),
+                contract_to=date(2024, 12, 31),
+                rent_amount_at_contract=20000,
+                created_by=self.user
+            )
+
+        self.assertEqual(self.get(url, if_none_match=etag).status_code, 200)
+
+    def test_nested_unit_change_changes_property_etag(self):
+        url = reverse('property-list')
+        etag = self.get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.unit.floor_no = 2
+            self.unit.save()
+
+        self.assertEqual(self.get(url, if_none_match=etag).status_code, 200)
+
+    def test_retrieve_honors_if_modified_since(self):
+        url = reverse('unit-detail', args=[self.unit.pk])
+        response = self.get(url)
+        self.assertIn('Last-Modified', response)
+
+        self.assertEqual(self.get(url, if_modified_since=response['Last-Modified']).status_code, 304)
+
+        Unit.objects.filter(pk=self.unit.pk).update(updated_at=timezone.now() + timedelta(minutes=1))
+        self.assertEqual(self.get(url, if_modified_since=response['Last-Modified']).status_code, 200)
+
+    def test_etag_is_per_user(self):
+        url = reverse('unit-list')
+        etag = self.get(url)['ETag']
+
+        self.client.force_authenticate(create_user())
+
+        self.assertEqual(self.get(url, if_none_match=etag).status_code, 200)
+
+    def test_missing_object_is_not_found(self):
+        response = self.get(reverse('unit-detail', args=[self.unit.pk + 1000]), if_none_match='*')
+
+        self.assertEqual(response.status_code, 404)
+
+
+class BulkUnitsTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.property = create_property(cls.user)
+        cls.untouched = create_unit(cls.property, '9Z')
+        cls.gas = UtilityType.objects.create(name='Gas')
+        cls.water = UtilityType.objects.create(name='Water')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def post(self, *units):
+        return self.client.post(
+            reverse('property-bulk-units', args=[self.property.pk]), {'units': list(units)}, format='json'
+        )
+
+    def row(self, apartment_no, **fields):
+        return {'apartment_no': apartment_no, 'floor_no': 1, 'facing_direction': 'north', 'size_sqft': 900, **fields}
+
+    def utility(self, utility_type, billing_type='meter', **fields):
+        return {'utility_type': utility_type.pk, 'billing_type': billing_type, **fields}
+
+    def test_creates_units_with_details(self):
+        response = self.post(
+            self.row('1A', rental_terms={'asking_rent': '20000', 'minimum_rent': '18000'},
+                     utilities=[self.utility(self.gas)]),
+            self.row('1B'),
+        )
+
+        self.assertEqual(response.status_code, 200)
+        units = dict(Unit.objects.filter(property=self.property).values_list('apartment_no', 'pk'))
+        self.assertEqual(response.data, {'created': 2, 'updated': 0, 'units': {'1A': units['1A'], '1B': units['1B']}})
+        self.assertEqual(RentalTerms.objects.get(unit_id=units['1A']).asking_rent, 20000)
+        self.assertEqual(list(UnitUtility.objects.filter(unit_id=units['1A']).values_list('utility_type', flat=True)),
+                         [self.gas.pk])
+        self.assertEqual(UnitSearchIndex.objects.filter(unit_id__in=response.data['units'].values()).count(), 2)
+
+    def test_updates_existing_units_in_place(self):
+        unit = create_unit(self.property, '1A')
+
+        response = self.post(self.row('1A', floor_no=3), self.row('2A', floor_no=2))
+
+        self.assertEqual((response.data['created'], response.data['updated']), (1, 1))
+        self.assertEqual(response.data['units']['1A'], unit.pk)
+        unit.refresh_from_db()
+        self.assertEqual(unit.floor_no, 3)
+        self.assertEqual(Unit.objects.filter(property=self.property).count(), 3)
+        self.assertTrue(Unit.objects.filter(pk=self.untouched.pk, floor_no=1).exists())
+
+    def test_omitted_terms_fields_take_defaults(self):
+        unit = create_unit(self.property, '1A')
+        RentalTerms.objects.create(unit=unit, asking_rent=20000, minimum_rent=18000, payment_due_day=10)
+
+        self.post(self.row('1A', rental_terms={'asking_rent': '21000', 'minimum_rent': '18000'}))
+
+        terms = RentalTerms.objects.get(unit=unit)
+        self.assertEqual((terms.asking_rent, terms.payment_due_day), (21000, 5))
+
+    def test_utilities_are_replaced(self):
+        unit = create_unit(self.property, '1A')
+        UnitUtility.objects.create(unit=unit, utility_type=self.gas, billing_type='meter')
+        UnitUtility.objects.create(unit=unit, utility_type=self.water, billing_type='meter')
+
+        self.post(self.row('1A', utilities=[self.utility(self.water, 'fixed', is_included_in_rent=True)]))
+
+        self.assertEqual(
+            list(UnitUtility.objects.filter(unit=unit).values_list('utility_type', 'billing_type', 'is_included_in_rent')),
+            [(self.water.pk, 'fixed', True)]
+        )
+
+    def test_rows_without_utilities_keep_them(self):
+        unit = create_unit(self.property, '1A')
+        UnitUtility.objects.create(unit=unit, utility_type=self.gas, billing_type='meter')
+
+        self.post(self.row('1A', floor_no=2))
+
+        self.assertTrue(UnitUtility.objects.filter(unit=unit, utility_type=self.gas).exists())
+
+    def test_rejects_duplicate_apartment_numbers(self):
+        response = self.post(self.row('1A'), self.row('1A'))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['details']['units'][1]['apartment_no'], ['Duplicate apartment number in this request.'])
+        self.assertFalse(Unit.objects.filter(apartment_no='1A').exists())
+
+
+class RankedSearchTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.gulshan_heights = create_property(cls.user, 'Gulshan Heights', area_name='Banani')
+        cls.lake_view = create_property(cls.user, 'Lake View', area_name='Gulshan')
+        cls.rose_villa = create_property(cls.user, 'Rose Villa', area_name='Mohammadpur')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def search(self, q, **params):
+        response = self.client.get(reverse('property-list'), {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [row['house_name'] for row in response.data['results']]
+
+    def test_orders_by_rank(self):
+        # House names weigh more than areas
+        self.assertEqual(self.search('gulshan'), ['Gulshan Heights', 'Lake View'])
+
+    def test_ordering_parameter_overrides_rank(self):
+        self.assertEqual(self.search('gulshan', ordering='-house_name'), ['Lake View', 'Gulshan Heights'])
+
+    def test_web_search_syntax(self):
+        self.assertEqual(self.search('"lake view"'), ['Lake View'])
+        self.assertEqual(self.search('gulshan -banani'), ['Lake View'])
+
+    def test_matches_misspellings(self):
+        self.assertEqual(self.search('Mohammodpur'), ['Rose Villa'])
+
+    def test_renamed_area_is_searchable(self):
+        Location.objects.filter(pk=self.rose_villa.location_id).update(area_name='Dhanmondi')
+
+        self.assertEqual(self.search('dhanmondi'), ['Rose Villa'])
+        self.assertEqual(self.search('mohammadpur'), [])
+
+
+class UnitSearchFacetTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        dhaka = create_property(cls.user, 'Dhaka House', district='Dhaka')
+        chattogram = create_property(cls.user, 'Port House', district='Chattogram')
+        for property_obj, apartment_no, bedrooms, rent in [
+            (dhaka, '1A', 2, 15000),
+            (dhaka, '1B', 3, 25000),
+            (chattogram, '1A', 2, 15000),
+            (chattogram, '1B', 3, 60000),
+        ]:
+            unit = create_unit(property_obj, apartment_no)
+            UnitRoomSummary.objects.create(unit=unit, bedrooms=bedrooms)
+            RentalTerms.objects.create(unit=unit, asking_rent=rent, minimum_rent=rent)
+        # Neither rooms nor terms: counted by district only
+        create_unit(dhaka, '1C')
+        search_index.refresh_units()
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        # Cached facets outlive the rollback of each test
+        cache.clear()
+
+    def search(self, **params):
+        response = self.client.get(reverse('unit-search-list'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def counts(self, facet, key):
+        return {row[key]: row['count'] for row in facet}
+
+    def rent_counts(self, facet):
+        return [row['count'] for row in facet]
+
+    def test_counts_without_filters(self):
+        facets = self.search()['facets']
+
+        self.assertEqual(facets['district'], [
+            {'district': 'Dhaka', 'count': 3},
+            {'district': 'Chattogram', 'count': 2},
+        ])
+        self.assertEqual(facets['bedrooms'], [{'bedrooms': 2, 'count': 2}, {'bedrooms': 3, 'count': 2}])
+        self.assertEqual(facets['rent'][0], {'min': 0, 'max': 10000, 'count': 0})
+        self.assertEqual(self.rent_counts(facets['rent']), [0, 2, 1, 0, 1, 0])
+
+    def test_facet_ignores_its_own_filter(self):
+        data = self.search(district='Dhaka')
+
+        self.assertEqual(data['count'], 3)
+        self.assertEqual(self.counts(data['facets']['district'], 'district'), {'Dhaka': 3, 'Chattogram': 2})
+        self.assertEqual(self.counts(data['facets']['bedrooms'], 'bedrooms'), {2: 1, 3: 1})
+        self.assertEqual(self.rent_counts(data['facets']['rent']), [0, 1, 1, 0, 0, 0])
+
+    def test_facets_apply_the_other_filters(self):
+        data = self.search(district='Dhaka', bedrooms=2)
+
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(self.counts(data['facets']['district'], 'district'), {'Dhaka': 1, 'Chattogram': 1})
+        self.assertEqual(self.counts(data['facets']['bedrooms'], 'bedrooms'), {2: 1, 3: 1})
+        self.assertEqual(self.rent_counts(data['facets']['rent']), [0, 1, 0, 0, 0, 0])
+
+    def test_rent_range_filters_both_rent_params(self):
+        data = self.search(rent_min=20000, rent_max=70000)
+
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(self.counts(data['facets']['district'], 'district'), {'Dhaka': 1, 'Chattogram': 1})
+        self.assertEqual(self.rent_counts(data['facets']['rent']), [0, 2, 1, 0, 1, 0])
+
+    def test_reordering_reuses_counts_until_the_index_changes(self):
+        self.search()
+        UnitRoomSummary.objects.filter(bedrooms=3).update(bedrooms=4)
+
+        facets = self.search(ordering='-asking_rent')['facets']
+        self.assertEqual(self.counts(facets['bedrooms'], 'bedrooms'), {2: 2, 3: 2})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            search_index.refresh_units()
+        facets = self.search(ordering='-asking_rent')['facets']
+        self.assertEqual(self.counts(facets['bedrooms'], 'bedrooms'), {2: 2, 4: 2})
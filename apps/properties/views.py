@@ -1,15 +1,27 @@
-from rest_framework import viewsets, filters, status
+from rest_framework import mixins, viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db.models import Count
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
-from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, extend_schema_view
 
-from .models import Location, Property, Unit, UtilityType
+from config.caching import CachedResponseMixin, bump_cache_version
+from config.conditional import ConditionalGetMixin, bump_conditional_version
+from config.expansion import ExpandableViewSetMixin
+from config.search import RankedSearchFilter
+from apps.accounts.models import User
+from apps.contracts.models import RentalContract
+from . import facets
+from .bulk import upsert_units
+from .filters import UnitFilter, UnitSearchFilter
+from .models import Location, Property, Unit, UnitSearchIndex, UtilityType
 from .serializers import (
     LocationSerializer,
     PropertySerializer,
+    UnitRosterResultSerializer,
+    UnitRosterSerializer,
+    UnitSearchSerializer,
     UnitSerializer,
     UtilityTypeSerializer
 )
@@ -47,15 +59,19 @@ from .serializers import (
         tags=['Properties']
     ),
 )
-class LocationViewSet(viewsets.ModelViewSet):
+class LocationViewSet(ConditionalGetMixin, CachedResponseMixin, ExpandableViewSetMixin, viewsets.ModelViewSet):
     """ViewSet for Location model"""
 
+    cache_namespace = 'locations'
+    cache_dependencies = (Location,)
     queryset = Location.objects.all()
     serializer_class = LocationSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, RankedSearchFilter]
     filterset_fields = ['district', 'division', 'country']
     search_fields = ['area_name', 'district', 'division', 'upazila_or_thana']
+    search_vector = 'search_vector'
+    search_document = 'search_document'
     ordering_fields = ['created_at', 'district']
     ordering = ['-created_at']
 
@@ -92,15 +108,21 @@ class LocationViewSet(viewsets.ModelViewSet):
         tags=['Properties']
     ),
 )
-class PropertyViewSet(viewsets.ModelViewSet):
+class PropertyViewSet(ConditionalGetMixin, CachedResponseMixin, ExpandableViewSetMixin, viewsets.ModelViewSet):
     """ViewSet for Property model"""
 
-    queryset = Property.objects.select_related('location', 'created_by').prefetch_related('units')
+    cache_namespace = 'properties'
+    # User for created_by_name
+    cache_dependencies = (Property, Location, Unit, User)
+    conditional_dependencies = (Unit,)
+    queryset = Property.objects.annotate(total_units=Count('units'))
     serializer_class = PropertySerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, RankedSearchFilter]
     filterset_fields = ['location', 'has_lift', 'has_parking', 'has_security_guard']
     search_fields = ['house_name', 'location__district', 'location__area_name']
+    search_vector = 'search_vector'
+    search_document = 'search_document'
     ordering_fields = ['created_at', 'house_name', 'total_floors']
     ordering = ['-created_at']
 
@@ -114,10 +136,43 @@ class PropertyViewSet(viewsets.ModelViewSet):
     def units(self, request, pk=None):
         """Get all units for a property"""
         property_obj = self.get_object()
-        units = property_obj.units.all()
-        serializer = UnitSerializer(units, many=True)
+        units = self.expand_queryset(property_obj.units.with_availability(), UnitSerializer)
+        serializer = UnitSerializer(units, many=True, context=self.get_serializer_context())
         return Response(serializer.data)
 
+    @extend_schema(
+        description=(
+            "Create or update many units of a property in one request, each with its "
+            "room summary, rental terms, policy and utilities. Units are matched on "
+            "apartment_no; units not listed are left unchanged. Nothing is written "
+            "unless every row is valid, and errors are returned per row."
+        ),
+        summary="Bulk create/update property units",
+        tags=['Properties'],
+        request=UnitRosterSerializer,
+        responses={200: UnitRosterResultSerializer}
+    )
+    @action(detail=True, methods=['post'], url_path='units/bulk')
+    def bulk_units(self, request, pk=None):
+        """Upsert a roster of units with their nested details"""
+        property_obj = self.get_object()
+        context = self.get_serializer_context()
+        context['utility_types'] = UtilityType.objects.in_bulk()
+        serializer = UnitRosterSerializer(data=request.data, context=context)
+        serializer.is_valid(raise_exception=True)
+
+        unit_ids, created = upsert_units(property_obj, serializer.validated_data['units'])
+        # bulk_create bypasses the post_save invalidation of the cached responses and ETags
+        bump_cache_version(self.cache_namespace)
+        bump_conditional_version(Unit)
+
+        result = {
+            'created': len(created),
+            'updated': len(unit_ids) - len(created),
+            'units': unit_ids,
+        }
+        return Response(UnitRosterResultSerializer(result).data)
+
 
 @extend_schema_view(
     list=extend_schema(
@@ -151,35 +206,37 @@ class PropertyViewSet(viewsets.ModelViewSet):
         tags=['Properties']
     ),
 )
-class UnitViewSet(viewsets.ModelViewSet):
+class UnitViewSet(ConditionalGetMixin, ExpandableViewSetMixin, viewsets.ModelViewSet):
     """ViewSet for Unit model"""
 
-    queryset = Unit.objects.select_related('property', 'property__location')
+    conditional_dependencies = (RentalContract,)
+    queryset = Unit.objects.with_availability()
     serializer_class = UnitSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['property', 'floor_no', 'facing_direction']
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter, RankedSearchFilter]
+    filterset_class = UnitFilter
     search_fields = ['apartment_no', 'property__house_name']
+    search_vector = 'property__search_vector'
+    search_document = 'property__search_document'
     ordering_fields = ['created_at', 'floor_no']
     ordering = ['-created_at']
 
     @extend_schema(
-        description="Get available units",
+        description="Get available units (no active rental contract), filterable by property, floor and facing",
         summary="Get available units",
         tags=['Properties'],
-        parameters=[
-            OpenApiParameter(
-                name='available',
-                type=OpenApiTypes.BOOL,
-                location=OpenApiParameter.QUERY,
-                description='Filter by availability'
-            )
-        ]
+        responses={200: UnitSerializer(many=True)}
     )
     @action(detail=False, methods=['get'])
     def available(self, request):
         """Get all available units"""
-        units = self.queryset.filter(is_available=True)
+        units = self.filter_queryset(self.get_queryset()).filter(has_active_contract=False)
+
+        page = self.paginate_queryset(units)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
         serializer = self.get_serializer(units, many=True)
         return Response(serializer.data)
 
@@ -216,9 +273,11 @@ class UnitViewSet(viewsets.ModelViewSet):
         tags=['Properties']
     ),
 )
-class UtilityTypeViewSet(viewsets.ModelViewSet):
+class UtilityTypeViewSet(CachedResponseMixin, ExpandableViewSetMixin, viewsets.ModelViewSet):
     """ViewSet for UtilityType model"""
 
+    cache_namespace = 'utility-types'
+    cache_dependencies = (UtilityType,)
     queryset = UtilityType.objects.all()
     serializer_class = UtilityTypeSerializer
     permission_classes = [IsAuthenticated]
@@ -227,3 +286,42 @@ class UtilityTypeViewSet(viewsets.ModelViewSet):
     ordering_fields = ['name', 'created_at']
     ordering = ['name']
 
+
+@extend_schema_view(
+    list=extend_schema(
+        description=(
+            "Search units by district, rent range, bedrooms, bathrooms, lift/parking, "
+            "bachelor/pets policy and gender restriction, optionally with q= text search. "
+            "Each page carries facet counts of the matching units per district, bedroom "
+            "count and rent bucket; each facet ignores the search's own filter on it."
+        ),
+        summary="Faceted unit search",
+        tags=['Properties']
+    ),
+)
+class UnitSearchViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Faceted search over the denormalized unit search index"""
+
+    queryset = UnitSearchIndex.objects.all()
+    serializer_class = UnitSearchSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = facets.FacetedPageNumberPagination
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, RankedSearchFilter]
+    filterset_class = UnitSearchFilter
+    search_vector = 'property__search_vector'
+    search_document = 'property__search_document'
+    ordering_fields = ['asking_rent', 'size_sqft', 'bedrooms', 'floor_no']
+    ordering = ['asking_rent', 'unit_id']
+
+    def list(self, request, *args, **kwargs):
+        # Filtering first rejects invalid parameters before any facet is counted
+        queryset = self.filter_queryset(self.get_queryset())
+        self.paginator.facets = facets.cached_facets(
+            RankedSearchFilter().filter_queryset(request, self.get_queryset(), self),
+            self.filterset_class,
+            request.query_params
+        )
+
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
@@ -0,0 +1,21 @@
+import os
+
+import django
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Each ASGI request runs its ORM calls in a thread of its own, so a kept
+# connection would never be reused. Only the async endpoints are served
+# through this module (rental-backend-async in k8s/deployment.yaml); the
+# rest of the API runs on config.wsgi with persistent connections.
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+
+django.setup(set_prefix=False)
+
+from config import db_connections  # noqa: E402
+from config.telemetry import configure_tracing  # noqa: E402
+
+configure_tracing()
+db_connections.install()
+
+application = get_asgi_application()
@@ -0,0 +1,95 @@
+"""
+Async views for I/O-bound endpoints
+
+DRF 3.14 views are sync only, so these are plain Django async views. Under
+ASGI (config.asgi) a request waiting on the cache or the database here
+gives the event loop back instead of holding a worker; under WSGI Django
+runs them in an event loop of their own with the same results.
+
+Authentication and permissions are DRF's, run through sync_to_async since
+the JWT user lookup may query the database. Responses are rendered by the
+first DEFAULT_RENDERER_CLASSES renderer, as JSON like the DRF views.
+"""
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAPIView(View):
+    """
+    Async Django view authenticated and authorized like an APIView
+
+    Handlers are coroutines (``async def get``) receiving the DRF Request
+    and returning ``self.render(data)``.
+    """
+
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    permission_classes = api_settings.DEFAULT_PERMISSION_CLASSES
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Like APIView: requests are authenticated by token, not session cookie
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        request = Request(request, authenticators=[auth() for auth in self.authentication_classes])
+        try:
+            await sync_to_async(self.check_permissions)(request)
+        except exceptions.APIException as exc:
+            response = self.render({'detail': exc.detail}, status=exc.status_code)
+            if isinstance(exc, exceptions.NotAuthenticated) and request.authenticators:
+                response['WWW-Authenticate'] = request.authenticators[0].authenticate_header(request)
+            return response
+        return await super().dispatch(request, *args, **kwargs)
+
+    def check_permissions(self, request):
+        for permission in [permission() for permission in self.permission_classes]:
+            if not permission.has_permission(request, self):
+                if request.authenticators and not request.successful_authenticator:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+    def render(self, data, status=200):
+        renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+        return HttpResponse(renderer.render(data), status=status, content_type=renderer.media_type)
+
+
+class CachedStatisticsView(AsyncAPIView):
+    """
+    Statistics computed in a thread and cached for STATISTICS_CACHE_TIMEOUT seconds
+
+    Subclasses set ``cache_key`` and implement ``compute()``. Within the
+    timeout every request is answered from the cache alone.
+    """
+
+    cache_key = None
+
+    def compute(self):
+        raise NotImplementedError
+
+    async def get(self, request):
+        try:
+            data = await cache.aget(self.cache_key)
+        except Exception as exc:
+            logger.warning(f'Statistics cache unavailable: {exc}')
+            data = None
+
+        if data is None:
+            data = await sync_to_async(self.compute)()
+            try:
+                await cache.aset(self.cache_key, data, settings.STATISTICS_CACHE_TIMEOUT)
+            except Exception as exc:
+                logger.warning(f'Failed to cache {self.cache_key}: {exc}')
+
+        return self.render(data)
@@ -0,0 +1,197 @@
+import hashlib
+import logging
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from drf_spectacular.utils import extend_schema
+from rest_framework import views
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'response'
+
+# Namespaces with invalidation connected, reported by CacheStatsView
+_namespaces = set()
+
+
+def _version_key(namespace):
+    return f'{KEY_PREFIX}:{namespace}:version'
+
+
+def _stat_key(namespace, name):
+    return f'{KEY_PREFIX}:{namespace}:{name}'
+
+
+def cache_version(namespace):
+    """Current version of a namespace, also for keys of entries cached outside CachedResponseMixin"""
+    return cache_versions([namespace])[namespace]
+
+
+def cache_versions(namespaces):
+    """
+    Current versions of several namespaces, read in one round trip
+
+    Namespaces without a version are given a new random one, so a version
+    lost to eviction never comes back as a value a client has already seen.
+    """
+    keys = {namespace: _version_key(namespace) for namespace in namespaces}
+    if not keys:
+        return {}
+    found = cache.get_many(list(keys.values()))
+
+    versions = {}
+    for namespace, key in keys.items():
+        if key not in found:
+            cache.add(key, uuid.uuid4().hex, None)
+            found[key] = cache.get(key)
+        versions[namespace] = found[key]
+    return versions
+
+
+def bump_cache_version(namespace):
+    """Make every cached response of a namespace unreachable"""
+    try:
+        cache.set(_version_key(namespace), uuid.uuid4().hex, None)
+    except Exception as exc:
+        logger.error(f'Failed to invalidate response cache {namespace}: {exc}')
+
+
+def bump_all_cache_versions():
+    """Invalidate every namespace, e.g. after bulk loads that bypass signals"""
+    for namespace in sorted(_namespaces):
+        bump_cache_version(namespace)
+
+
+def connect_cache_invalidation(viewset_class):
+    """
+    Bump the viewset's cache version after any save/delete of its dependencies
+
+    The bump runs once the write commits, so a concurrent request cannot
+    re-cache the data read before the commit under the new version.
+    """
+    namespace = viewset_class.cache_namespace
+    _namespaces.add(namespace)
+
+    def invalidate(sender, **kwargs):
+        transaction.on_commit(lambda: bump_cache_version(namespace))
+
+    for model in viewset_class.cache_dependencies:
+        for signal in (post_save, post_delete):
+            signal.connect(
+                invalidate,
+                sender=model,
+                weak=False,
+                dispatch_uid=f'response-cache-{namespace}-{model._meta.label}-{signal is post_save}'
+            )
+
+
+def _count(namespace, name):
+    key = _stat_key(namespace, name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+class CachedResponseMixin:
+    """
+    ViewSet mixin caching list and retrieve responses
+
+    Entries are keyed on the namespace's current version, the user scope,
+    the action with its URL kwargs and the normalized query parameters.
+    Versions are bumped by connect_cache_invalidation when one of
+    ``cache_dependencies`` is saved or deleted; writes through
+    ``QuerySet.update()`` must call bump_cache_version themselves.
+    """
+
+    cache_namespace = None
+    cache_dependencies = ()
+    cache_timeout = None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cache_scope(self, request):
+        """Part of the key for responses that differ between users"""
+        return 'staff' if request.user.is_staff else 'user'
+
+    def get_cache_key(self, request, version):
+        params = sorted(
+            (key, sorted(values)) for key, values in request.query_params.lists()
+        )
+        digest = hashlib.sha1(repr(params).encode()).hexdigest()
+        url_kwargs = ':'.join(f'{key}={value}' for key, value in sorted(self.kwargs.items()))
+
+        return ':'.join([
+            KEY_PREFIX,
+            self.cache_namespace,
+            str(version),
+            self.get_cache_scope(request),
+            self.action,
+            url_kwargs,
+            digest,
+        ])
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        timeout = self.cache_timeout or settings.RESPONSE_CACHE_TIMEOUT
+        try:
+            version = cache_version(self.cache_namespace)
+            key = self.get_cache_key(request, version)
+            cached = cache.get(key)
+        except Exception as exc:
+            logger.warning(f'Response cache unavailable: {exc}')
+            return handler(request, *args, **kwargs)
+
+        if cached is not None:
+            _count(self.cache_namespace, 'hits')
+            status_code, data = cached
+            return Response(data, status=status_code)
+
+        _count(self.cache_namespace, 'misses')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            try:
+                cache.set(key, (response.status_code, response.data), timeout)
+            except Exception as exc:
+                logger.warning(f'Failed to cache response {key}: {exc}')
+        return response
+
+
+class CacheStatsView(views.APIView):
+    """Hit/miss counters of the response cache"""
+
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        summary='Response cache statistics',
+        description='Hit and miss counts per cached endpoint namespace',
+        tags=['Monitoring']
+    )
+    def get(self, request):
+        keys = {
+            (namespace, name): _stat_key(namespace, name)
+            for namespace in sorted(_namespaces)
+            for name in ('hits', 'misses')
+        }
+        values = cache.get_many(list(keys.values()))
+
+        stats = {}
+        for namespace in sorted(_namespaces):
+            hits = values.get(keys[namespace, 'hits'], 0)
+            misses = values.get(keys[namespace, 'misses'], 0)
+            total = hits + misses
+            stats[namespace] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_ratio': round(hits / total, 4) if total else None,
+            }
+
+        return Response(stats)
@@ -1,5 +1,5 @@
 import os
-from celery import Celery
+from celery import Celery, signals
 from celery.schedules import crontab
 
 # Set default Django settings
@@ -27,9 +27,40 @@ app.conf.beat_schedule = {
         'task': 'apps.accounts.tasks.cleanup_expired_tokens',
         'schedule': crontab(hour=2, minute=0),  # Daily at 2 AM
     },
+    'maintain-audit-partitions': {
+        'task': 'apps.audit.tasks.maintain_audit_partitions',
+        'schedule': crontab(hour=3, minute=0),  # Daily at 3 AM
+    },
+    'roll-up-audit-logs': {
+        'task': 'apps.audit.tasks.roll_up_audit_logs',
+        'schedule': crontab(hour=0, minute=15),  # Daily at 00:15
+    },
+    'roll-up-payments': {
+        'task': 'apps.payments.tasks.roll_up_payments',
+        'schedule': crontab(hour=0, minute=20),  # Daily at 00:20
+    },
+    'allocate-payments': {
+        'task': 'apps.payments.tasks.allocate_payments',
+        'schedule': crontab(hour=0, minute=30),  # Daily at 00:30
+    },
+    'process-payment-webhooks': {
+        'task': 'apps.payments.tasks.process_payment_webhooks',
+        'schedule': crontab(),  # Every minute, for retries and missed intake runs
+    },
+    'rebuild-unit-search-index': {
+        'task': 'apps.properties.tasks.rebuild_unit_search_index',
+        'schedule': crontab(minute=45),  # Hourly at :45
+    },
 }
 
 
+@signals.worker_init.connect
+def install_connection_metrics(**kwargs):
+    # Runs after the Django fixup set Django up; prefork children inherit it
+    from config import db_connections
+    db_connections.install()
+
+
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
@@ -0,0 +1,180 @@
+import hashlib
+import logging
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete, post_save
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.pagination import CursorPagination
+
+from .caching import bump_cache_version, cache_versions
+from .expansion import DynamicFieldsMixin, parse_expand
+
+logger = logging.getLogger(__name__)
+
+
+def _dependency_namespace(model):
+    return f'conditional:{model._meta.label_lower}'
+
+
+def bump_conditional_version(model):
+    """Change the ETags depending on ``model`` once the current transaction commits"""
+    namespace = _dependency_namespace(model)
+    transaction.on_commit(lambda: bump_cache_version(namespace))
+
+
+def connect_conditional_versions(viewset_class):
+    """
+    Bump the versions of the viewset's conditional_dependencies after any save/delete
+
+    Writes that bypass signals (QuerySet.update(), bulk_create) call
+    bump_conditional_version themselves.
+    """
+    def bump(sender, **kwargs):
+        bump_conditional_version(sender)
+
+    for model in viewset_class.conditional_dependencies:
+        for signal in (post_save, post_delete):
+            signal.connect(
+                bump,
+                sender=model,
+                weak=False,
+                dispatch_uid=f'{_dependency_namespace(model)}-{signal is post_save}'
+            )
+
+
+class ConditionalGetMixin:
+    """
+    ViewSet mixin answering conditional list and retrieve requests
+
+    Validators are computed with one query instead of rendering the body:
+    MAX(conditional_field) over the filtered queryset, plus COUNT(*) unless
+    ``conditional_count`` is off, for list; the row's conditional_field for
+    retrieve. Relations the serializer joins in (select_related and to-one
+    expansions) contribute their own MAX(conditional_field), so a changed
+    nested object changes the ETag too. Cursor-paginated lists have no
+    total, so their validators are the conditional fields of the page's
+    own rows, read with the page's index range scan.
+
+    ``conditional_dependencies`` lists further models whose changes show up
+    in the response, e.g. through counts or annotations. They contribute a
+    version kept in the cache and bumped by connect_conditional_versions,
+    not an aggregate over their table. Views of tables that only grow can
+    turn ``conditional_count`` off and list their own model as a dependency,
+    so the occasional delete still changes the ETag.
+
+    The ETag also covers the query string, the user and the renderer, so a
+    304 is only returned for exactly the same request.
+    """
+
+    conditional_field = 'updated_at'
+    conditional_count = True
+    conditional_dependencies = ()
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        paths = self._conditional_paths()
+
+        cursor_paginator = self._cursor_paginator(request)
+        if cursor_paginator is not None:
+            ordering = [field.lstrip('-') for field in cursor_paginator.get_ordering(request, queryset, self)]
+            rows = cursor_paginator.paginate_queryset(
+                queryset.values(*dict.fromkeys([*ordering, *paths])), request, self
+            )
+            validators = [tuple(row.values()) for row in rows]
+        else:
+            aggregates = {f'modified_{index}': Max(path) for index, path in enumerate(paths)}
+            if self.conditional_count:
+                aggregates['count'] = Count('pk')
+            validators = queryset.aggregate(**aggregates)
+
+        return self.conditional_response(
+            request, validators, None, super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        validators = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        ).values_list(*self._conditional_paths()).first()
+        if validators is None:
+            # Let the normal path produce the 404
+            return super().retrieve(request, *args, **kwargs)
+
+        last_modified = max(filter(None, validators), default=None)
+        return self.conditional_response(
+            request, validators, last_modified, super().retrieve, *args, **kwargs
+        )
+
+    def conditional_response(self, request, validators, last_modified, handler, *args, **kwargs):
+        try:
+            dependencies = sorted(cache_versions(
+                _dependency_namespace(model) for model in self.conditional_dependencies
+            ).items())
+        except Exception as exc:
+            # Without the versions a 304 could hide changes; answer in full instead
+            logger.warning(f'Conditional request versions unavailable: {exc}')
+            return handler(request, *args, **kwargs)
+
+        etag = self.get_etag(request, [validators, dependencies])
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def get_etag(self, request, validators):
+        renderer = getattr(request, 'accepted_renderer', None)
+        state = repr([
+            self.action,
+            sorted(self.kwargs.items()),
+            sorted((key, sorted(values)) for key, values in request.query_params.lists()),
+            request.user.pk,
+            renderer.format if renderer else None,
+            validators,
+        ])
+        return f'W/"{hashlib.sha1(state.encode()).hexdigest()}"'
+
+    def _cursor_paginator(self, request):
+        """The cursor pagination serving this request, if any"""
+        paginator = self.paginator
+        if isinstance(paginator, CursorPagination):
+            return paginator
+        use_cursor = getattr(paginator, 'use_cursor', None)
+        if use_cursor is not None and use_cursor(request):
+            return paginator.cursor_pagination_class()
+        return None
+
+    def _conditional_paths(self):
+        """conditional_field of the model and of the relations joined for serializing"""
+        paths = [self.conditional_field]
+
+        serializer_class = self.get_serializer_class()
+        if issubclass(serializer_class, DynamicFieldsMixin):
+            select, _ = serializer_class.get_related_paths(parse_expand(self.request))
+            model = self.get_queryset().model
+            paths.extend(
+                f'{path}__{self.conditional_field}'
+                for path in select
+                if self._has_conditional_field(model, path)
+            )
+
+        return paths
+
+    def _has_conditional_field(self, model, path):
+        try:
+            for name in path.split('__'):
+                model = model._meta.get_field(name).related_model
+            model._meta.get_field(self.conditional_field)
+        except (FieldDoesNotExist, AttributeError):
+            return False
+        return True
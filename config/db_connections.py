@@ -0,0 +1,151 @@
+"""
+Persistent database connections and their metrics
+
+Each web and worker process keeps one connection per database alias open
+across requests and tasks. Django and the Celery Django fixup close it at
+the start and end of each one once it is older than CONN_MAX_AGE (the
+maximum lifetime) or has errored; with CONN_HEALTH_CHECKS it is pinged
+before its first use in a request or task, and reopened if the ping
+fails.
+
+The counters below are per process: how many times a request or task
+found its connection still open (a reuse) and how many connections had
+to be opened. DatabaseStatsView adds the server side, the connections of
+this application on PostgreSQL by state.
+
+Behind pgbouncer in transaction pooling mode (DB_PGBOUNCER) Django's
+server-side cursors are disabled, as a cursor cannot outlive the
+transaction that opened it there; cursors opened inside
+``transaction.atomic()``, like the audit partition archive's, still work.
+"""
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import DatabaseError, connections
+from django.db.backends.signals import connection_created
+from drf_spectacular.utils import extend_schema
+from rest_framework import views
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+CONNECTIONS_BY_STATE_SQL = """
+    SELECT COALESCE(state, 'unknown'), COUNT(*)
+    FROM pg_stat_activity
+    WHERE datname = current_database() AND application_name = %s
+    GROUP BY 1
+"""
+
+_lock = threading.Lock()
+_opened = Counter()
+_reused = Counter()
+# alias -> time.monotonic() the current connection was opened
+_opened_at = {}
+_installed = False
+
+
+def _connection_opened(sender, connection, **kwargs):
+    with _lock:
+        _opened[connection.alias] += 1
+    _opened_at[connection.alias] = time.monotonic()
+
+
+def _reusable(connection):
+    # Mirrors close_if_unusable_or_obsolete(), without closing anything
+    if connection.connection is None or connection.errors_occurred:
+        return False
+    return connection.close_at is None or time.monotonic() < connection.close_at
+
+
+def checkout(**kwargs):
+    """
+    Count the connections a request or task starts with
+
+    Connections that Django or the Celery fixup are about to close as
+    obsolete or broken are not counted as reused.
+    """
+    for connection in connections.all(initialized_only=True):
+        if _reusable(connection):
+            with _lock:
+                _reused[connection.alias] += 1
+
+
+def install():
+    """Start collecting the metrics in this process (web or worker)"""
+    global _installed
+    if _installed:
+        return
+    from celery.signals import task_prerun
+
+    connection_created.connect(_connection_opened, dispatch_uid='db_connections_opened')
+    request_started.connect(checkout, dispatch_uid='db_connections_request')
+    task_prerun.connect(checkout, dispatch_uid='db_connections_task', weak=False)
+    _installed = True
+
+
+def process_stats():
+    """Connection reuse counters of this process, per alias"""
+    now = time.monotonic()
+    open_aliases = {
+        connection.alias for connection in connections.all(initialized_only=True)
+        if connection.connection is not None
+    }
+    stats = {}
+    for alias in connections:
+        with _lock:
+            reused, opened = _reused[alias], _opened[alias]
+        is_open = alias in open_aliases
+        stats[alias] = {
+            'max_age': connections.settings[alias]['CONN_MAX_AGE'],
+            'health_checks': connections.settings[alias]['CONN_HEALTH_CHECKS'],
+            'open': is_open,
+            'age_seconds': round(now - _opened_at[alias], 1) if is_open and alias in _opened_at else None,
+            'opened': opened,
+            'reused': reused,
+            'reuse_ratio': round(reused / (reused + opened), 4) if reused + opened else None,
+        }
+    return stats
+
+
+def server_stats(alias):
+    """Connections of this application on the server of ``alias``, by state"""
+    with connections[alias].cursor() as cursor:
+        cursor.execute(CONNECTIONS_BY_STATE_SQL, [settings.DB_APPLICATION_NAME])
+        states = dict(cursor.fetchall())
+        cursor.execute("SELECT current_setting('max_connections')::int")
+        max_connections = cursor.fetchone()[0]
+    return {
+        'by_state': states,
+        'total': sum(states.values()),
+        'max_connections': max_connections,
+    }
+
+
+class DatabaseStatsView(views.APIView):
+    """Connection reuse of this process and connection counts on the server"""
+
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        summary='Database connection statistics',
+        description=(
+            'Connection reuse counters of the process serving the request and the '
+            "application's connections on each database server, by state"
+        ),
+        tags=['Monitoring']
+    )
+    def get(self, request):
+        servers = {}
+        for alias in connections:
+            try:
+                servers[alias] = server_stats(alias)
+            except DatabaseError as exc:
+                servers[alias] = {'error': str(exc)}
+
+        return Response({
+            'pgbouncer': settings.DB_PGBOUNCER,
+            'process': process_stats(),
+            'servers': servers,
+        })
@@ -0,0 +1,127 @@
+"""
+Read replica routing
+
+Reads go to a replica only inside ``replica_reads()``, which the
+ReplicaRoutingMiddleware enters for safe requests and ``use_replica``
+enters for reporting tasks; everything else, including all writes, uses
+the primary. Within a routed block, reads switch back to the primary as
+soon as anything is written or a transaction is open on it, so a request
+always sees its own writes. Replicas failing the periodic health check,
+or lagging more than REPLICA_MAX_LAG_SECONDS behind, are skipped until
+the next check.
+"""
+import contextvars
+import logging
+import random
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = 'default'
+
+# Seconds since the last replayed transaction; 0 when caught up or not a replica
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+
+class RoutingState:
+    """Routing of the current request or task"""
+
+    __slots__ = ('replica', 'wrote')
+
+    def __init__(self, replica):
+        self.replica = replica
+        self.wrote = False
+
+
+_state = contextvars.ContextVar('db_routing_state', default=None)
+
+# alias -> (healthy, time.monotonic() of the check), per process
+_health = {}
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Route the reads of the block to a replica (if ``enabled``)"""
+    state = RoutingState(enabled)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+def use_replica(func):
+    """Decorator running ``func`` inside replica_reads(), e.g. for reporting tasks"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def is_healthy(alias):
+    healthy, checked_at = _health.get(alias, (None, 0.0))
+    now = time.monotonic()
+    if healthy is None or now - checked_at >= settings.REPLICA_HEALTH_CHECK_INTERVAL:
+        healthy = _check_replica(alias)
+        _health[alias] = (healthy, now)
+    return healthy
+
+
+def _check_replica(alias):
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(LAG_SQL)
+            lag = cursor.fetchone()[0]
+    except DatabaseError as exc:
+        logger.warning(f'Read replica {alias} unavailable, using the primary: {exc}')
+        connection.close()
+        return False
+
+    if lag is not None and lag > settings.REPLICA_MAX_LAG_SECONDS:
+        logger.warning(f'Read replica {alias} is {lag:.0f}s behind, using the primary')
+        return False
+    return True
+
+
+def healthy_replicas():
+    return [alias for alias in settings.DATABASE_REPLICAS if is_healthy(alias)]
+
+
+class ReplicaRouter:
+    """Send reads to a healthy replica when the current context allows it"""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.replica or state.wrote:
+            return PRIMARY
+        if connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+
+        replicas = healthy_replicas()
+        return random.choice(replicas) if replicas else PRIMARY
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
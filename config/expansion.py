@@ -0,0 +1,169 @@
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+from .middleware import serializer_timing
+
+
+def parse_expand(request):
+    """
+    Parse ``?expand=`` into a nested dict
+
+    ``?expand=contract.unit.property,utility_type`` becomes
+    ``{'contract': {'unit': {'property': {}}}, 'utility_type': {}}``
+    """
+    tree = {}
+    if request is None:
+        return tree
+
+    for value in request.query_params.getlist('expand'):
+        for path in filter(None, (item.strip() for item in value.split(','))):
+            node = tree
+            for name in path.split('.'):
+                node = node.setdefault(name, {})
+    return tree
+
+
+def parse_fields(request):
+    """Parse ``?fields=`` into a set of field names (empty means all fields)"""
+    if request is None or request.method not in SAFE_METHODS:
+        return set()
+
+    return {
+        name.strip()
+        for value in request.query_params.getlist('fields')
+        for name in value.split(',')
+        if name.strip()
+    }
+
+
+def _prefixed(lookup, prefix):
+    """Prefix a prefetch_related lookup given as a string or Prefetch"""
+    if isinstance(lookup, Prefetch):
+        return Prefetch(prefix + lookup.prefetch_through, lookup.queryset, lookup.to_attr)
+    return prefix + lookup
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin for ``?fields=`` sparse fieldsets and ``?expand=`` relations
+
+    Meta options:
+        expandable_fields: Maps an expansion name to the nested serializer
+            field it enables, e.g. ``{'contract': 'contract_detail'}``.
+            Expandable fields are left out unless requested, so clients get
+            the plain foreign key ids by default.
+        select_related / prefetch_related: Relations read by the serializer
+            itself (e.g. for ``*_name`` fields), used to build the queryset.
+        nested_prefetch_related: Like prefetch_related, but only loaded when
+            the serializer is expanded inside another one, for data the
+            view's own queryset annotates at the top level.
+
+    ``?fields=`` only applies to the top-level serializer of a read request.
+    The top-level serializer also reports its time as the serialize phase of
+    QueryInstrumentationMiddleware.
+    """
+
+    expand = None
+
+    def to_representation(self, instance):
+        if not self._is_root():
+            return super().to_representation(instance)
+        with serializer_timing(self.context.get('request')):
+            return super().to_representation(instance)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expand = self._get_expand()
+
+        for name, field_name in getattr(self.Meta, 'expandable_fields', {}).items():
+            if name not in expand:
+                fields.pop(field_name, None)
+                continue
+
+            child = fields.get(field_name)
+            if isinstance(child, serializers.ListSerializer):
+                child = child.child
+            if isinstance(child, DynamicFieldsMixin):
+                child.expand = expand[name]
+
+        if self._is_root():
+            requested = parse_fields(self.context.get('request'))
+            if requested:
+                for field_name in list(fields):
+                    if field_name not in requested:
+                        fields.pop(field_name)
+
+        return fields
+
+    def _is_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def _get_expand(self):
+        if self._is_root():
+            return parse_expand(self.context.get('request'))
+        return self.expand or {}
+
+    @classmethod
+    def get_related_paths(cls, expand, prefix=''):
+        """
+        Relations to load for serializing with the given expansion
+
+        Returns:
+            (select_related paths, prefetch_related paths)
+        """
+        meta = cls.Meta
+        select = [prefix + path for path in getattr(meta, 'select_related', ())]
+        prefetch = [_prefixed(lookup, prefix) for lookup in getattr(meta, 'prefetch_related', ())]
+        if prefix:
+            prefetch.extend(_prefixed(lookup, prefix) for lookup in getattr(meta, 'nested_prefetch_related', ()))
+
+        for name, subtree in expand.items():
+            field_name = getattr(meta, 'expandable_fields', {}).get(name)
+            if field_name is None:
+                continue
+
+            field = cls._declared_fields[field_name]
+            path = prefix + (field.source or field_name).replace('.', '__')
+            many = isinstance(field, serializers.ListSerializer)
+            child = field.child if many else field
+
+            (prefetch if many else select).append(path)
+
+            if isinstance(child, DynamicFieldsMixin):
+                child_select, child_prefetch = type(child).get_related_paths(subtree, path + '__')
+                # Anything reached through a to-many relation has to be prefetched
+                (prefetch if many else select).extend(child_select)
+                prefetch.extend(child_prefetch)
+
+        return select, prefetch
+
+
+class ExpandableViewSetMixin:
+    """
+    ViewSet mixin that loads the relations requested with ``?expand=``
+
+    Works with serializers using DynamicFieldsMixin; the base queryset only
+    needs to hold filtering and annotations.
+    """
+
+    def get_queryset(self):
+        return self.expand_queryset(super().get_queryset())
+
+    def expand_queryset(self, queryset, serializer_class=None):
+        """Apply select_related/prefetch_related for the requested expansion"""
+        serializer_class = serializer_class or self.get_serializer_class()
+        if not issubclass(serializer_class, DynamicFieldsMixin):
+            return queryset
+
+        select, prefetch = serializer_class.get_related_paths(
+            parse_expand(getattr(self, 'request', None))
+        )
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
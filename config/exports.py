@@ -0,0 +1,198 @@
+"""
+Streaming CSV and JSON Lines exports of list endpoints
+
+``GET <list>/export/`` runs the list endpoint's filterset, search and
+ordering over the whole result instead of one page, and streams it as
+flat rows: ``?format=csv`` (the default) or ``?format=jsonl``, or the
+matching Accept header.
+
+Rows are read with ``values_list().iterator(chunk_size=EXPORT_CHUNK_SIZE)``,
+a server-side cursor on PostgreSQL, and written out a chunk at a time, so
+memory stays the same whatever the size of the export. Behind pgbouncer
+(DB_PGBOUNCER) server-side cursors are disabled and the driver fetches
+the whole result at once instead.
+
+Under ASGI the rows are fetched in the request's sync_to_async thread and
+streamed as an async iterator; Django would otherwise read a sync
+iterator into memory before sending it.
+"""
+import csv
+import io
+from datetime import datetime
+from decimal import Decimal
+
+import orjson
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework.decorators import action
+from rest_framework.renderers import BaseRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from .renderers import ORJSON_OPTIONS
+
+# Leading characters spreadsheets evaluate as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class CSVRenderer(BaseRenderer):
+    """CSV export rows, after a header row of the column names"""
+
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return self.render_rows(None, data)
+
+    def render_header(self, columns):
+        return self.render_rows(columns, [columns])
+
+    def render_rows(self, columns, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows([self.cell(value) for value in row] for row in rows)
+        return buffer.getvalue().encode(self.charset)
+
+    def cell(self, value):
+        if value is None:
+            return ''
+        if isinstance(value, datetime):
+            value = value.isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        if isinstance(value, (dict, list)):
+            return orjson.dumps(value, option=ORJSON_OPTIONS).decode()
+        if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+            return "'" + value
+        return value
+
+
+class JSONLinesRenderer(BaseRenderer):
+    """JSON Lines export rows, one object per line"""
+
+    media_type = 'application/x-ndjson'
+    format = 'jsonl'
+    charset = None
+
+    def __init__(self):
+        self._default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return b''.join(
+            orjson.dumps(row, default=self.encode, option=ORJSON_OPTIONS) + b'\n' for row in data
+        )
+
+    def render_header(self, columns):
+        return b''
+
+    def render_rows(self, columns, rows):
+        return b''.join(
+            orjson.dumps(dict(zip(columns, row)), default=self.encode, option=ORJSON_OPTIONS) + b'\n'
+            for row in rows
+        )
+
+    def encode(self, value):
+        # Amounts as strings, like the serializers' DecimalField
+        if isinstance(value, Decimal):
+            return str(value)
+        try:
+            return self._default(value)
+        except TypeError:
+            # Values of custom model fields, e.g. PhoneNumber
+            return str(value)
+
+
+def stream_rows(renderer, columns, rows, chunk_size):
+    """The header, then the rows encoded ``chunk_size`` at a time"""
+    yield renderer.render_header(columns)
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield renderer.render_rows(columns, chunk)
+            chunk = []
+    if chunk:
+        yield renderer.render_rows(columns, chunk)
+
+
+async def _async_chunks(chunks):
+    fetch = sync_to_async(next)
+    while True:
+        chunk = await fetch(chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+class ExportMixin:
+    """
+    ViewSet mixin adding the ``export`` list action
+
+    ``export_fields`` lists the ``(column, lookup)`` pairs of a row, lookups
+    spanning relations like ``('unit', 'contract__unit__apartment_no')``; rows
+    are plain values, no serializer is involved. ``export_name`` prefixes
+    the file name.
+    """
+
+    export_fields = ()
+    export_name = 'export'
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        # Errors of exports are JSON, like those of every other endpoint
+        if self.action == 'export' and isinstance(response, Response):
+            request.accepted_renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+            request.accepted_media_type = request.accepted_renderer.media_type
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    @extend_schema(
+        description=(
+            'Stream every row matching the list filters, search and ordering as CSV '
+            '(format=csv, the default) or JSON Lines (format=jsonl)'
+        ),
+        filters=True,
+        parameters=[
+            OpenApiParameter(
+                name='format',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                enum=['csv', 'jsonl'],
+                description='Export format'
+            ),
+        ],
+        responses={
+            (200, CSVRenderer.media_type): OpenApiTypes.STR,
+            (200, JSONLinesRenderer.media_type): OpenApiTypes.STR,
+        }
+    )
+    @action(detail=False, methods=['get'], renderer_classes=[CSVRenderer, JSONLinesRenderer])
+    def export(self, request):
+        """Stream the filtered queryset as CSV or JSON Lines"""
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        # Resolved now, while the request's replica routing still applies
+        queryset = queryset.using(queryset.db)
+
+        columns = [column for column, _ in self.export_fields]
+        rows = queryset.values_list(*(lookup for _, lookup in self.export_fields)).iterator(
+            chunk_size=settings.EXPORT_CHUNK_SIZE
+        )
+        renderer = request.accepted_renderer
+        chunks = stream_rows(renderer, columns, rows, settings.EXPORT_CHUNK_SIZE)
+        if isinstance(request._request, ASGIRequest):
+            chunks = _async_chunks(chunks)
+
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f'{content_type}; charset={renderer.charset}'
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        filename = f"{self.export_name}-{timezone.now():%Y%m%dT%H%M%SZ}.{renderer.format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
@@ -0,0 +1,276 @@
+import hashlib
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from opentelemetry import trace
+
+from .db_router import replica_reads
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """A request ran more queries than the budget of its route"""
+
+
+class QueryMetrics:
+    """execute_wrapper counting queries and summing their duration"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+@contextmanager
+def serializer_timing(request):
+    """
+    Add the time spent in the block to the serialize phase of ``request``
+
+    SQL run inside the block (lazy relations) stays in the db phase. A no-op
+    for requests that did not go through QueryInstrumentationMiddleware.
+    """
+    request = getattr(request, '_request', request)
+    metrics = getattr(request, '_query_metrics', None)
+    if metrics is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    db_start = metrics.duration
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        request._serialize_time += max(elapsed - (metrics.duration - db_start), 0.0)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Record query count, DB, serialize and render time of every request
+
+    Times are split into:
+    - db: time spent executing SQL on any database alias
+    - serialize: time top-level serializers spent in ``to_representation``
+      (serializers using config.expansion.DynamicFieldsMixin)
+    - render: time the renderer took to encode the response body
+    - app: everything else in the request: routing, authentication,
+      permissions, filtering and the view itself
+
+    The metrics are added as ``Server-Timing`` and ``X-DB-Query-Count``
+    headers when DEBUG or QUERY_METRICS_HEADERS is on, and as attributes of
+    the current OpenTelemetry span (a no-op unless tracing is configured).
+
+    QUERY_BUDGETS maps URL names (``property-list``) to the maximum number
+    of queries of a request; QUERY_BUDGET_DEFAULT applies to the other
+    routes. Over-budget requests are logged, or raise QueryBudgetExceeded
+    when QUERY_BUDGET_ACTION is 'raise', which fails the test that made
+    the request.
+
+    Under ASGI the ORM runs in the request's sync_to_async thread, so the
+    connections of that thread are the ones wrapped.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.budgets = settings.QUERY_BUDGETS
+        self.default_budget = settings.QUERY_BUDGET_DEFAULT
+        self.action = settings.QUERY_BUDGET_ACTION
+        self.headers = settings.DEBUG or settings.QUERY_METRICS_HEADERS
+
+        if self.action not in ('log', 'raise'):
+            raise ImproperlyConfigured("QUERY_BUDGET_ACTION must be 'log' or 'raise'")
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        metrics = self.start(request)
+        start = time.perf_counter()
+
+        with self.wrap_connections(metrics):
+            response = self.get_response(request)
+
+        return self.finish(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        metrics = self.start(request)
+        start = time.perf_counter()
+
+        stack = await sync_to_async(self.wrap_connections)(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+
+        return self.finish(request, response, metrics, start)
+
+    def start(self, request):
+        metrics = QueryMetrics()
+        request._query_metrics = metrics
+        request._serialize_time = 0.0
+        request._render_time = 0.0
+        return metrics
+
+    def wrap_connections(self, metrics):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics))
+        return stack
+
+    def finish(self, request, response, metrics, start):
+        total = time.perf_counter() - start
+        serialize = request._serialize_time
+        render = request._render_time
+        timings = {
+            'db': metrics.duration,
+            'serialize': serialize,
+            'render': render,
+            'app': max(total - metrics.duration - serialize - render, 0.0),
+            'total': total,
+        }
+
+        self.record_span(request, metrics, timings)
+        if self.headers:
+            response['X-DB-Query-Count'] = str(metrics.count)
+            response['Server-Timing'] = ', '.join(
+                f'{name};dur={duration * 1000:.1f}' for name, duration in timings.items()
+            )
+
+        self.check_budget(request, metrics)
+        return response
+
+    def process_template_response(self, request, response):
+        # Called right before DRF renders the response
+        started = time.perf_counter()
+
+        def rendered(response):
+            request._render_time += time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def record_span(self, request, metrics, timings):
+        span = trace.get_current_span()
+        if not span.is_recording():
+            return
+
+        span.set_attribute('db.query_count', metrics.count)
+        for name, duration in timings.items():
+            span.set_attribute(f'http.server.{name}_time_ms', round(duration * 1000, 3))
+
+        route = self.route_name(request)
+        if route:
+            span.set_attribute('http.route_name', route)
+
+    def route_name(self, request):
+        match = getattr(request, 'resolver_match', None)
+        return match.view_name if match else None
+
+    def check_budget(self, request, metrics):
+        route = self.route_name(request)
+        budget = self.budgets.get(route, self.default_budget)
+        if budget is None or metrics.count <= budget:
+            return
+
+        message = (
+            f'{request.method} {request.path} ({route}) ran {metrics.count} queries, '
+            f'budget is {budget}'
+        )
+        if self.action == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Serve the reads of safe requests from the read replicas
+
+    A client that wrote something is pinned to the primary for
+    REPLICA_PIN_SECONDS, so it reads its own writes while the replicas
+    catch up. Clients are told apart by their Authorization header or
+    session cookie, and the pins are kept in the cache to hold across
+    processes. If the cache is unavailable, requests use the primary.
+    """
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        key = self.pin_key(request)
+        use_replica = request.method in self.SAFE_METHODS and not self.is_pinned(key)
+
+        with replica_reads(use_replica) as state:
+            response = self.get_response(request)
+
+        if state.wrote and key:
+            self.pin(key)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        key = self.pin_key(request)
+        use_replica = request.method in self.SAFE_METHODS and not await sync_to_async(self.is_pinned)(key)
+
+        with replica_reads(use_replica) as state:
+            response = await self.get_response(request)
+
+        if state.wrote and key:
+            await sync_to_async(self.pin)(key)
+        return response
+
+    def pin_key(self, request):
+        credentials = (
+            request.META.get('HTTP_AUTHORIZATION')
+            or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        )
+        if not credentials:
+            return None
+        return f'db:pin:{hashlib.sha1(credentials.encode()).hexdigest()}'
+
+    def is_pinned(self, key):
+        if key is None:
+            return False
+        try:
+            return cache.get(key) is not None
+        except Exception as exc:
+            logger.warning(f'Replica pin lookup failed, using the primary: {exc}')
+            return True
+
+    def pin(self, key):
+        try:
+            cache.set(key, 1, settings.REPLICA_PIN_SECONDS)
+        except Exception as exc:
+            logger.warning(f'Failed to pin client to the primary: {exc}')
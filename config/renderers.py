@@ -0,0 +1,45 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer encoding with orjson
+
+    dict, list, str, numbers, datetime, date, time and UUID are encoded
+    natively; everything else (Decimal, timedelta, lazy strings, querysets)
+    goes through DRF's JSONEncoder.default, as with the stdlib renderer.
+
+    The output is equivalent JSON but not byte-identical: large and small
+    floats use a different exponent form (``1e16`` instead of ``1e+16``)
+    and NaN/Infinity become ``null`` instead of being rejected.
+
+    Data orjson cannot encode, such as integers wider than 64 bits, is
+    rendered by JSONRenderer instead. So are indented output (``; indent=4``
+    or the browsable API) and UNICODE_JSON=False.
+    """
+
+    def __init__(self):
+        self._default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if self.ensure_ascii or not self.compact or self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self._default, option=ORJSON_OPTIONS)
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same \u2028/\u2029 escaping as JSONRenderer, keeping the output a
+        # strict JavaScript subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -0,0 +1,67 @@
+"""
+Ranked full-text search
+
+``?q=`` matches a view's ``search_vector`` (a tsvector kept up to date by
+database triggers) with ``websearch_to_tsquery``, so ``gulshan "road 11"``
+and ``banani -dhanmondi`` work as on search engines, and falls back to
+trigram word similarity against ``search_document`` (the same text, plain)
+for misspellings and alternative transliterations such as "Mohammadpur"
+for "Mohammodpur". Both are served by GIN indexes, unlike the ``ILIKE
+'%term%'`` of ``?search=``.
+
+Results are annotated with ``search_rank`` and ordered by it unless the
+request sets ``?ordering=``.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import F, Q
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
+
+# Text search configuration of the search vectors: lowercased, not stemmed
+SEARCH_CONFIG = 'simple'
+
+
+class RankedSearchFilter(BaseFilterBackend):
+    """
+    Filter backend for ``?q=``, listed after OrderingFilter
+
+    Views set ``search_vector`` and ``search_document`` to the field paths
+    to search, e.g. ``property__search_vector`` for units.
+    """
+
+    search_param = 'q'
+
+    def get_search_term(self, request):
+        return request.query_params.get(self.search_param, '').strip()
+
+    def filter_queryset(self, request, queryset, view):
+        term = self.get_search_term(request)
+        vector = getattr(view, 'search_vector', None)
+        if not term or vector is None:
+            return queryset
+
+        document = view.search_document
+        query = SearchQuery(term, config=SEARCH_CONFIG, search_type='websearch')
+        queryset = queryset.annotate(
+            search_rank=SearchRank(F(vector), query) + TrigramWordSimilarity(term, document)
+        ).filter(
+            Q(**{vector: query}) | Q(**{f'{document}__trigram_word_similar': term})
+        )
+
+        if api_settings.ORDERING_PARAM in request.query_params:
+            return queryset
+        return queryset.order_by('-search_rank', *queryset.query.order_by)
+
+    def get_schema_operation_parameters(self, view):
+        if getattr(view, 'search_vector', None) is None:
+            return []
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': (
+                'Full-text search ranked by relevance and tolerant of misspellings; '
+                'supports "quoted phrases" and -exclusions'
+            ),
+            'schema': {'type': 'string'},
+        }]
@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 from datetime import timedelta
 import dj_database_url
@@ -21,6 +22,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third-party apps
     'rest_framework',
@@ -38,9 +40,12 @@ INSTALLED_APPS = [
     'apps.billing',
     'apps.payments',
     'apps.audit',
+    'apps.benchmarks',
 ]
 
 MIDDLEWARE = [
+    'config.middleware.QueryInstrumentationMiddleware',
+    'config.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -92,6 +97,48 @@ DATABASES = {
     }
 }
 
+# Connection reuse (see config.db_connections): each web and worker process
+# keeps its connection for DB_CONN_MAX_AGE seconds (0 closes it after every
+# request/task), pinging it before reuse when DB_CONN_HEALTH_CHECKS is on.
+# Web and worker deployments read these from their own environment.
+# config.asgi defaults to 0: ASGI requests run their queries in a thread of
+# their own and cannot reuse a connection. That costs a new connection per
+# request, so only the async webhook and statistics endpoints are served over
+# ASGI; the rest of the API and the health probes stay on config.wsgi.
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=60, cast=int)
+DB_CONN_HEALTH_CHECKS = config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool)
+# Set when connecting through pgbouncer in transaction pooling mode, which
+# cannot keep server-side cursors open across transactions
+DB_PGBOUNCER = config('DB_PGBOUNCER', default=False, cast=bool)
+DB_APPLICATION_NAME = config('DB_APPLICATION_NAME', default='rental-backend')
+
+DATABASES['default'].update({
+    'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+    'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
+    'DISABLE_SERVER_SIDE_CURSORS': DB_PGBOUNCER,
+    'OPTIONS': {'application_name': DB_APPLICATION_NAME},
+})
+
+# Read replicas (see config.db_router), comma separated database URLs
+# registered as replica_1, replica_2, ...
+DATABASE_REPLICAS = []
+for index, url in enumerate(config('DATABASE_REPLICA_URLS', default='', cast=Csv()), start=1):
+    replica = dj_database_url.parse(url, conn_max_age=DB_CONN_MAX_AGE, conn_health_checks=DB_CONN_HEALTH_CHECKS)
+    DATABASES[f'replica_{index}'] = {
+        **replica,
+        'DISABLE_SERVER_SIDE_CURSORS': DB_PGBOUNCER,
+        'OPTIONS': {'application_name': DB_APPLICATION_NAME, **replica.get('OPTIONS', {})},
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['config.db_router.ReplicaRouter'] if DATABASE_REPLICAS else []
+# Seconds a client reads from the primary after writing (read-your-writes)
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=10, cast=int)
+# Replicas are re-checked every interval and skipped while down or lagging
+REPLICA_HEALTH_CHECK_INTERVAL = config('REPLICA_HEALTH_CHECK_INTERVAL', default=5, cast=int)
+REPLICA_MAX_LAG_SECONDS = config('REPLICA_MAX_LAG_SECONDS', default=30, cast=int)
+
 # Custom User Model
 AUTH_USER_MODEL = "accounts.User"
 
@@ -130,13 +177,27 @@ MEDIA_ROOT = BASE_DIR / 'media'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework
+# Render and parse JSON with orjson (config.renderers/config.parsers). The
+# output is equivalent to DRF's stdlib JSONRenderer but not byte-identical
+# (float exponents, NaN as null); data orjson cannot encode falls back to it
+FAST_JSON = config('FAST_JSON', default=True, cast=bool)
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.accounts.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'config.renderers.ORJSONRenderer' if FAST_JSON else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'config.parsers.ORJSONParser' if FAST_JSON else 'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
@@ -169,6 +230,10 @@ SIMPLE_JWT = {
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
 }
 
+# Seconds a user loaded by CachedJWTAuthentication stays cached; entries are
+# also invalidated on every User write
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=300, cast=int)
+
 # CORS
 CORS_ALLOWED_ORIGINS = config('CORS_ALLOWED_ORIGINS', default='http://localhost:3000', cast=Csv())
 CORS_ALLOW_CREDENTIALS = True
@@ -183,6 +248,44 @@ CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
 
+# Billing
+# Active contracts per generate_monthly_bills shard
+BILLING_SHARD_SIZE = config('BILLING_SHARD_SIZE', default=5000, cast=int)
+
+# Properties
+# Maximum units in one bulk roster request (PropertyViewSet.bulk_units)
+PROPERTY_BULK_UNITS_MAX = config('PROPERTY_BULK_UNITS_MAX', default=1000, cast=int)
+# Upper bounds of the asking rent buckets counted by the unit search facets;
+# the last bucket has no upper bound
+UNIT_SEARCH_RENT_BUCKETS = config(
+    'UNIT_SEARCH_RENT_BUCKETS', default='10000,20000,30000,50000,100000', cast=Csv(int)
+)
+# Seconds the unit search facet counts are kept; refreshes of the search index invalidate them
+UNIT_SEARCH_FACET_CACHE_TIMEOUT = config('UNIT_SEARCH_FACET_CACHE_TIMEOUT', default=600, cast=int)
+
+# Audit log
+# Write AuditLog.log entries in batches from a background thread. Off by
+# default under the test runner, so tests read audit rows right after the
+# audited call (the writer thread would also write outside the test
+# transaction)
+AUDIT_LOG_BUFFERED = config('AUDIT_LOG_BUFFERED', default=sys.argv[1:2] != ['test'], cast=bool)
+AUDIT_LOG_BATCH_SIZE = config('AUDIT_LOG_BATCH_SIZE', default=500, cast=int)
+AUDIT_LOG_FLUSH_INTERVAL = config('AUDIT_LOG_FLUSH_INTERVAL', default=1.0, cast=float)
+AUDIT_LOG_QUEUE_SIZE = config('AUDIT_LOG_QUEUE_SIZE', default=10000, cast=int)
+# Failed batch writes are retried with a doubling delay, then written row by row
+AUDIT_LOG_WRITE_RETRIES = config('AUDIT_LOG_WRITE_RETRIES', default=3, cast=int)
+AUDIT_LOG_RETRY_DELAY = config('AUDIT_LOG_RETRY_DELAY', default=0.5, cast=float)
+# audit_logs is partitioned by month; partitions older than the retention
+# period are archived to gzipped JSON lines files and dropped
+AUDIT_LOG_PARTITIONS_AHEAD = config('AUDIT_LOG_PARTITIONS_AHEAD', default=3, cast=int)
+AUDIT_LOG_RETENTION_MONTHS = config('AUDIT_LOG_RETENTION_MONTHS', default=24, cast=int)
+AUDIT_LOG_ARCHIVE_DIR = config('AUDIT_LOG_ARCHIVE_DIR', default=str(BASE_DIR / 'archive' / 'audit_logs'))
+
+# Payments
+# Trailing days of payment rollups rebuilt daily, repairing bulk status
+# updates that bypass Payment.save
+PAYMENT_ROLLUP_WINDOW_DAYS = config('PAYMENT_ROLLUP_WINDOW_DAYS', default=7, cast=int)
+
 # Redis Cache
 CACHES = {
     'default': {
@@ -194,6 +297,40 @@ CACHES = {
     }
 }
 
+# Seconds a cached list/retrieve response is kept (see config.caching)
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=300, cast=int)
+# Seconds the payment and audit statistics are served from the cache (see config.async_views)
+STATISTICS_CACHE_TIMEOUT = config('STATISTICS_CACHE_TIMEOUT', default=60, cast=int)
+# Rows per server-side cursor fetch and per written chunk of the CSV/JSON Lines
+# list exports (see config.exports)
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Request instrumentation (see config.middleware)
+# Add query count and Server-Timing headers to responses; always on with DEBUG
+QUERY_METRICS_HEADERS = config('QUERY_METRICS_HEADERS', default=False, cast=bool)
+# Maximum queries per request by URL name; QUERY_BUDGET_DEFAULT covers the
+# routes not listed (None disables the check). Over-budget requests are
+# logged, or raise with QUERY_BUDGET_ACTION=raise so tests fail on them.
+QUERY_BUDGETS = {
+    'location-list': 8,
+    'property-list': 10,
+    'unit-list': 10,
+    'unit-search-list': 6,
+    'household-list': 8,
+    'participant-list': 8,
+    'contract-list': 8,
+    'bill-list': 8,
+    'payment-list': 8,
+    'audit-log-list': 8,
+}
+QUERY_BUDGET_DEFAULT = config('QUERY_BUDGET_DEFAULT', default=None, cast=lambda value: int(value) if value else None)
+QUERY_BUDGET_ACTION = config('QUERY_BUDGET_ACTION', default='log')
+
+# OpenTelemetry
+# Traces are exported over OTLP/HTTP when an endpoint is set (see config.telemetry)
+OTEL_EXPORTER_OTLP_ENDPOINT = config('OTEL_EXPORTER_OTLP_ENDPOINT', default='')
+OTEL_SERVICE_NAME = config('OTEL_SERVICE_NAME', default='rental-management-backend')
+
 # Spectacular Settings (Swagger/OpenAPI Documentation)
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Rental Management API',
@@ -220,6 +357,7 @@ SPECTACULAR_SETTINGS = {
         {'name': 'Billing', 'description': 'Bill generation and management'},
         {'name': 'Payments', 'description': 'Payment processing and tracking'},
         {'name': 'Audit', 'description': 'Audit log and system tracking'},
+        {'name': 'Monitoring', 'description': 'Cache and runtime statistics'},
     ],
     'SERVERS': [
         {'url': 'http://localhost:8000', 'description': 'Local development server'},
@@ -249,6 +387,22 @@ STRIPE_SECRET_KEY = config('STRIPE_SECRET_KEY', default='')
 STRIPE_WEBHOOK_SECRET = config('STRIPE_WEBHOOK_SECRET', default='')
 STRIPE_PUBLISHABLE_KEY = config('STRIPE_PUBLISHABLE_KEY', default='')
 
+# Contracts allocated per transaction by the nightly allocation (see apps.payments.allocation)
+PAYMENT_ALLOCATION_CHUNK_SIZE = config('PAYMENT_ALLOCATION_CHUNK_SIZE', default=500, cast=int)
+
+# Payment webhooks (see apps.payments.webhooks)
+# Secret of the local stand-in provider; the provider is disabled while empty
+PAYMENT_WEBHOOK_LOCAL_SECRET = config('PAYMENT_WEBHOOK_LOCAL_SECRET', default='')
+# Maximum age in seconds of a signed Stripe event
+PAYMENT_WEBHOOK_TOLERANCE = config('PAYMENT_WEBHOOK_TOLERANCE', default=300, cast=int)
+PAYMENT_WEBHOOK_BATCH_SIZE = config('PAYMENT_WEBHOOK_BATCH_SIZE', default=200, cast=int)
+# Failed events are retried after 30s, 60s, 120s, ... up to the maximum delay
+PAYMENT_WEBHOOK_MAX_ATTEMPTS = config('PAYMENT_WEBHOOK_MAX_ATTEMPTS', default=8, cast=int)
+PAYMENT_WEBHOOK_RETRY_BASE_SECONDS = config('PAYMENT_WEBHOOK_RETRY_BASE_SECONDS', default=30, cast=int)
+PAYMENT_WEBHOOK_RETRY_MAX_SECONDS = config('PAYMENT_WEBHOOK_RETRY_MAX_SECONDS', default=3600, cast=int)
+# Intake queues at most one processing run per this many seconds
+PAYMENT_WEBHOOK_SCHEDULE_SECONDS = config('PAYMENT_WEBHOOK_SCHEDULE_SECONDS', default=2, cast=int)
+
 # Logging
 LOGGING = {
     'version': 1,
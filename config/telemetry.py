@@ -0,0 +1,40 @@
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def configure_tracing():
+    """
+    Export OpenTelemetry traces of requests, SQL and Redis calls over OTLP/HTTP
+
+    Does nothing unless OTEL_EXPORTER_OTLP_ENDPOINT is set. Must run before
+    the WSGI application is created so the Django instrumentation can wrap
+    the request handling.
+    """
+    endpoint = settings.OTEL_EXPORTER_OTLP_ENDPOINT
+    if not endpoint:
+        return False
+
+    from opentelemetry import trace
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    from opentelemetry.instrumentation.django import DjangoInstrumentor
+    from opentelemetry.instrumentation.psycopg2 import Psycopg2Instrumentor
+    from opentelemetry.instrumentation.redis import RedisInstrumentor
+    from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    provider = TracerProvider(resource=Resource.create({SERVICE_NAME: settings.OTEL_SERVICE_NAME}))
+    provider.add_span_processor(
+        BatchSpanProcessor(OTLPSpanExporter(endpoint=f'{endpoint.rstrip("/")}/v1/traces'))
+    )
+    trace.set_tracer_provider(provider)
+
+    DjangoInstrumentor().instrument()
+    Psycopg2Instrumentor().instrument(skip_dep_check=True)
+    RedisInstrumentor().instrument()
+
+    logger.info(f'Exporting traces to {endpoint}')
+    return True
@@ -9,6 +9,8 @@ from drf_spectacular.views import (
 )
 from rest_framework_simplejwt.views import TokenRefreshView
 from apps.accounts.views import HealthCheckView
+from config.caching import CacheStatsView
+from config.db_connections import DatabaseStatsView
 
 urlpatterns = [
     # Admin
@@ -17,6 +19,10 @@ urlpatterns = [
     # Health Check
     path('health/', HealthCheckView.as_view(), name='health-check'),
     
+    # Monitoring
+    path('api/v1/monitoring/cache/', CacheStatsView.as_view(), name='cache-stats'),
+    path('api/v1/monitoring/database/', DatabaseStatsView.as_view(), name='database-stats'),
+    
     # API Documentation
     path('api/schema/', SpectacularAPIView.as_view(permission_classes=[]), name='schema'),
     path('api/schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema', permission_classes=[]), name='swagger-ui'),
@@ -1,6 +1,16 @@
 import os
+
+import django
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
+django.setup(set_prefix=False)
+
+from config import db_connections  # noqa: E402
+from config.telemetry import configure_tracing  # noqa: E402
+
+configure_tracing()
+db_connections.install()
+
 application = get_wsgi_application()